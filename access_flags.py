@@ -35,25 +35,57 @@ _ACC_FLAGS = { 'ACC_PUBLIC': 'public', 'ACC_PRIVATE': 'private', 'ACC_PROTECTED'
 
 class InvalidFlags(Exception):
     def __init__(self, message, flags):
-        super().__init__(message=message, flags=flags, descriptor='{:4x}'.format(flags))
+        super().__init__('{}: 0x{:04x}'.format(message, flags))
+        self.message = message
+        self.flags = flags
+
+
+class _FlagsInfo:
+    __slots__ = ('signature', 'errors')
+
+    def __init__(self, signature):
+        self.signature = signature
+        self.errors = {}
 
 
 class AccessFlags:
-    def __init__(self, f, flag_map):
+    """Raw access flags of a class, field or method.
+
+    The modifiers string and the validation outcome (for each validation context) only depend on the flags value, so
+    they are computed once per process and kept in the per kind `_FLAGS_INFO` table.
+    """
+    __slots__ = ('flags',)
+    flag_map = {}
+    _FLAGS_INFO = {}
+
+    def __init__(self, f):
         self.flags = f.read_u2()
-        self.flag_map = flag_map
-        self._signature = None
 
-    def init(self):
-        pass
+    def init(self, *context):
+        errors = self._flags_info().errors
+        if context not in errors:
+            errors[context] = None
+            try:
+                self._check(*context)
+            except InvalidFlags as e:
+                errors[context] = e.message
+        if errors[context]:
+            raise InvalidFlags(errors[context], self.flags)
 
     def signature(self):
-        if self._signature is None:
-            self._calc_signature()
-        return self._signature
+        return self._flags_info().signature
+
+    def _flags_info(self):
+        info = self._FLAGS_INFO.get(self.flags)
+        if info is None:
+            info = self._FLAGS_INFO[self.flags] = _FlagsInfo(self._calc_signature())
+        return info
 
     def _calc_signature(self):
-        return
+        return ''
+
+    def _check(self, *context):
+        pass
 
     def _check_exclusive_flags(self, exclusive_flags):
         for i, flag_i in enumerate(exclusive_flags):
@@ -87,12 +119,12 @@ class AccessFlags:
     def _check_mandatory_flags(self, flags):
         for flag in flags:
             if not (self.flags & flag):
-                raise InvalidFlags('{} flag is mandatory'.format(self.flag_map[flag]))
+                raise InvalidFlags('{} flag is mandatory'.format(self.flag_map[flag]), self.flags)
 
     def _check_not_allowed_flags(self, no_flags):
         for flag in no_flags:
             if self.flags & flag:
-                raise InvalidFlags('{} flag is not allowed'.format(self.flag_map[flag]))
+                raise InvalidFlags('{} flag is not allowed'.format(self.flag_map[flag]), self.flags)
 
     def _get_signatures(self, mask=0xffff):
         flag_signatures = []
@@ -155,18 +187,17 @@ class AccessFlags:
     def _is_volatile(self):
         return self.flags & ACC_VOLATILE
 
-    def _set_signature(self, mask):
-        self._signature = ' '.join(self._get_signatures(mask))
+    def _join_signatures(self, mask):
+        return ' '.join(self._get_signatures(mask))
 
 
 class ClassAccessFlags(AccessFlags):
-    _FLAG_MAP = {0x0001: 'ACC_PUBLIC', 0x0010: 'ACC_FINAL', 0x0020: 'ACC_SUPER', 0x0200: 'ACC_INTERFACE',
-                 0x0400: 'ACC_ABSTRACT', 0x1000: 'ACC_SYNTHETIC', 0x2000: 'ACC_ANNOTATION', 0x4000: 'ACC_ENUM'}
-
-    def __init__(self, f):
-        super().__init__(f, ClassAccessFlags._FLAG_MAP)
+    __slots__ = ()
+    _FLAGS_INFO = {}
+    flag_map = {0x0001: 'ACC_PUBLIC', 0x0010: 'ACC_FINAL', 0x0020: 'ACC_SUPER', 0x0200: 'ACC_INTERFACE',
+                0x0400: 'ACC_ABSTRACT', 0x1000: 'ACC_SYNTHETIC', 0x2000: 'ACC_ANNOTATION', 0x4000: 'ACC_ENUM'}
 
-    def init(self):
+    def _check(self):
         self._check_implied_flags(ACC_INTERFACE, [ACC_ABSTRACT])
         self._check_implied_not_flags(ACC_INTERFACE, [ACC_FINAL, ACC_SUPER, ACC_ENUM])
         self._check_implied_flags(ACC_ANNOTATION, [ACC_INTERFACE])
@@ -179,22 +210,20 @@ class ClassAccessFlags(AccessFlags):
         return self._is_interface()
 
     def _calc_signature(self):
-        self._set_signature(0x4411)
+        signature = self._join_signatures(0x4411)
         if self._is_interface():
-            self._signature += ' interface'
-        else:
-            self._signature += ' class'
+            return signature + ' interface'
+        return signature + ' class'
 
 
 class FieldAccessFlags(AccessFlags):
-    _FLAG_MAP = {0x0001: 'ACC_PUBLIC', 0x0002: 'ACC_PRIVATE', 0x0004: 'ACC_PROTECTED', 0x0008: 'ACC_STATIC',
-                 0x0010: 'ACC_FINAL', 0x0040: 'ACC_VOLATILE', 0x0080: 'ACC_TRANSIENT', 0x1000: 'ACC_SYNTHETIC',
-                 0x4000: 'ACC_ENUM'}
+    __slots__ = ()
+    _FLAGS_INFO = {}
+    flag_map = {0x0001: 'ACC_PUBLIC', 0x0002: 'ACC_PRIVATE', 0x0004: 'ACC_PROTECTED', 0x0008: 'ACC_STATIC',
+                0x0010: 'ACC_FINAL', 0x0040: 'ACC_VOLATILE', 0x0080: 'ACC_TRANSIENT', 0x1000: 'ACC_SYNTHETIC',
+                0x4000: 'ACC_ENUM'}
 
-    def __init__(self, f):
-        super().__init__(f, FieldAccessFlags._FLAG_MAP)
-
-    def init(self, is_interface):
+    def _check(self, is_interface):
         self._check_exclusive_flags([ACC_PUBLIC, ACC_PRIVATE, ACC_PROTECTED])
         self._check_exclusive_flags([ACC_FINAL, ACC_VOLATILE])
         if is_interface:
@@ -202,18 +231,17 @@ class FieldAccessFlags(AccessFlags):
             self._check_not_allowed_flags([ACC_PRIVATE, ACC_PROTECTED, ACC_VOLATILE, ACC_ENUM])
 
     def _calc_signature(self):
-        self._set_signature(0x50df)
+        return self._join_signatures(0x50df)
 
 
 class MethodAccessFlags(AccessFlags):
-    _FLAG_MAP = {0x0001: 'ACC_PUBLIC', 0x0002: 'ACC_PRIVATE', 0x0004: 'ACC_PROTECTED', 0x0008: 'ACC_STATIC',
-                 0x0010: 'ACC_FINAL', 0x0020: 'ACC_SYNCHRONIZED', 0x0040: 'ACC_BRIDGE', 0x0080: 'ACC_VARARSGS',
-                 0x0100: 'ACC_NATIVE', 0x0400: 'ACC_ABSTRACT', 0x0800: 'ACC_STRICT', 0x1000: 'ACC_SYNTHETIC'}
-
-    def __init__(self, f):
-        super().__init__(f, MethodAccessFlags._FLAG_MAP)
+    __slots__ = ()
+    _FLAGS_INFO = {}
+    flag_map = {0x0001: 'ACC_PUBLIC', 0x0002: 'ACC_PRIVATE', 0x0004: 'ACC_PROTECTED', 0x0008: 'ACC_STATIC',
+                0x0010: 'ACC_FINAL', 0x0020: 'ACC_SYNCHRONIZED', 0x0040: 'ACC_BRIDGE', 0x0080: 'ACC_VARARSGS',
+                0x0100: 'ACC_NATIVE', 0x0400: 'ACC_ABSTRACT', 0x0800: 'ACC_STRICT', 0x1000: 'ACC_SYNTHETIC'}
 
-    def init(self, is_interface, is_initialization):
+    def _check(self, is_interface, is_initialization):
         self._check_exclusive_flags([ACC_PUBLIC, ACC_PRIVATE, ACC_PROTECTED])
         if is_interface:
             self._check_not_allowed_flags([ACC_PROTECTED, ACC_FINAL, ACC_SYNCHRONIZED, ACC_NATIVE])
@@ -223,4 +251,4 @@ class MethodAccessFlags(AccessFlags):
             self._check_not_allowed_flags([ACC_FINAL, ACC_SYNCHRONIZED, ACC_BRIDGE, ACC_NATIVE, ACC_ABSTRACT])
 
     def _calc_signature(self):
-        self._set_signature(0x1d3f)
+        return self._join_signatures(0x1d3f)
@@ -0,0 +1,298 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import json
+from array import array
+from collections import namedtuple
+
+from index_format import (InvalidIndex, read_array, read_bytes, read_header, read_strings, write_array, write_bytes,
+                          write_header, write_strings)
+from signatures import InvalidDescriptor, parse_field_type_descriptor
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+TARGET_CLASS = 0
+TARGET_FIELD = 1
+TARGET_METHOD = 2
+TARGET_PARAMETER = 3
+TARGET_TYPE = 4
+
+NO_SYMBOL = -1
+
+_MAGIC = b'JANX'
+_FORMAT_VERSION = 1
+
+# Annotated element: `name` and `descriptor` are the field's or method's (None for the class), `position` the
+# parameter index of parameter annotations, the target_type of type annotations and -1 otherwise.
+AnnotationTarget = namedtuple('AnnotationTarget', ['kind', 'class_name', 'name', 'descriptor', 'position'])
+
+EnumValue = namedtuple('EnumValue', ['type', 'name'])
+ClassValue = namedtuple('ClassValue', ['name'])
+AnnotationValue = namedtuple('AnnotationValue', ['type', 'values'])
+
+_ANNOTATIONS_ATTRIBUTES = (('RuntimeVisibleAnnotations', True), ('RuntimeInvisibleAnnotations', False))
+_PARAMETER_ANNOTATIONS_ATTRIBUTES = (('RuntimeVisibleParameterAnnotations', True),
+                                     ('RuntimeInvisibleParameterAnnotations', False))
+_TYPE_ANNOTATIONS_ATTRIBUTES = (('RuntimeVisibleTypeAnnotations', True), ('RuntimeInvisibleTypeAnnotations', False))
+
+
+def _type_name(descriptor):
+    try:
+        return parse_field_type_descriptor(descriptor)
+    except InvalidDescriptor:
+        return descriptor
+
+
+def scan_annotations(class_file):
+    """Yield (AnnotationTarget, visible, Annotation) for the annotations of a class, its fields and its methods.
+
+    Only annotation attributes are decoded, so with the 'signatures' profile Code attributes are never read; type
+    annotations inside Code aren't reported.
+    """
+    this_class = class_file.this_class
+    class_name = this_class.name()
+    elements = [(TARGET_CLASS, None, None, this_class.attributes)]
+    elements += [(TARGET_FIELD, field.name(), field.descriptor(), field.attributes)
+                 for field in this_class.fields.entries]
+    elements += [(TARGET_METHOD, method.name(), method.descriptor(), method.attributes)
+                 for method in this_class.methods.entries]
+    for kind, name, descriptor, attributes in elements:
+        for attribute_name, visible in _ANNOTATIONS_ATTRIBUTES:
+            for attribute in attributes.get_all(attribute_name):
+                for annotation in attribute.annotations:
+                    yield AnnotationTarget(kind, class_name, name, descriptor, -1), visible, annotation
+        if kind == TARGET_METHOD:
+            for attribute_name, visible in _PARAMETER_ANNOTATIONS_ATTRIBUTES:
+                for attribute in attributes.get_all(attribute_name):
+                    for parameter, annotations in enumerate(attribute.parameter_annotations):
+                        for annotation in annotations:
+                            yield (AnnotationTarget(TARGET_PARAMETER, class_name, name, descriptor, parameter),
+                                   visible, annotation)
+        for attribute_name, visible in _TYPE_ANNOTATIONS_ATTRIBUTES:
+            for attribute in attributes.get_all(attribute_name):
+                for annotation in attribute.annotations:
+                    yield (AnnotationTarget(TARGET_TYPE, class_name, name, descriptor, annotation.target_type),
+                           visible, annotation)
+
+
+def read_annotations(name, source):
+    """Return (class name, [(type, AnnotationTarget, visible, encoded values)], errors) for a class file; a
+    batch.map_batch function.
+
+    When the class file can't be read or has no valid name, the class name is None and errors say why, as
+    batch.ClassResult errors.
+    """
+    from batch import exception_errors
+    from javadec import READ_ERRORS, ClassFile
+    try:
+        class_file = ClassFile(source, lazy=True, profile='signatures')
+        if class_file.this_class.name() is None:
+            return None, None, tuple((name, pos, message) for message, pos in class_file.errors)
+        constant_pool = class_file.constant_pool
+        annotations = []
+        for target, visible, annotation in scan_annotations(class_file):
+            try:
+                annotation_type = _type_name(constant_pool.get_utf8(annotation.type_index))
+                values = annotation.values(constant_pool) if annotation.element_value_pairs else None
+            except ValueError:
+                continue
+            annotations.append((annotation_type, target, visible, _encode_values(values)))
+        return class_file.this_class.name(), annotations, ()
+    except READ_ERRORS as e:
+        return None, None, exception_errors(name, e)
+
+
+def _encode_values(values):
+    if not values:
+        return b''
+    return json.dumps(values, separators=(',', ':')).encode()
+
+
+def _decode_value(tag, value):
+    if tag == 'e':
+        return EnumValue(_type_name(value[0]), value[1])
+    if tag == 'c':
+        return ClassValue(value if value == 'V' else _type_name(value))
+    if tag == '@':
+        return AnnotationValue(_type_name(value[0]), _decode_values(value[1]))
+    if tag == '[':
+        return tuple(_decode_value(*element_value) for element_value in value)
+    return value
+
+
+def _decode_values(values):
+    return {name: _decode_value(*element_value) for name, element_value in values.items()}
+
+
+class AnnotationInstance:
+    """An indexed annotation; its element values are only decoded when values() is called."""
+    __slots__ = ('_index', '_id', '_values')
+
+    def __init__(self, index, annotation_id):
+        self._index = index
+        self._id = annotation_id
+        self._values = None
+
+    def __repr__(self):
+        return 'AnnotationInstance({!r}, {!r})'.format(self.type, self.target)
+
+    @property
+    def type(self):
+        return self._index.symbols[self._index.types[self._id]]
+
+    @property
+    def target(self):
+        return self._index.target(self._id)
+
+    @property
+    def visible(self):
+        return bool(self._index.visible[self._id])
+
+    def values(self):
+        """Element values by name: constants as Python values, EnumValue, ClassValue, AnnotationValue or tuples."""
+        if self._values is None:
+            index = self._index
+            data = index.values[index.value_offsets[self._id]:index.value_offsets[self._id + 1]]
+            self._values = _decode_values(json.loads(data.decode())) if data else {}
+        return self._values
+
+
+class AnnotationIndex:
+    """Annotations of the classes on a classpath, by annotation type.
+
+    Names are interned as symbols. Annotation `a` is of type symbols[types[a]] on the target (target_kinds[a],
+    target_classes[a], target_names[a], target_descriptors[a], positions[a]); member symbols are NO_SYMBOL for
+    classes. Element values are kept encoded in `values`, [value_offsets[a], value_offsets[a + 1]) for `a`. When a
+    class is added more than once the first one wins. `errors` are those of the class files build() skipped, see
+    read_annotations().
+    """
+    def __init__(self):
+        self.symbols = []
+        self._symbol_ids = {}
+        self.types = array('I')
+        self.target_kinds = bytearray()
+        self.target_classes = array('I')
+        self.target_names = array('i')
+        self.target_descriptors = array('i')
+        self.positions = array('i')
+        self.visible = bytearray()
+        self.value_offsets = array('I', [0])
+        self.values = bytearray()
+        self._classes = set()
+        self._by_type = None
+        self.errors = []
+
+    def __len__(self):
+        return len(self.types)
+
+    def intern(self, symbol):
+        if symbol is None:
+            return NO_SYMBOL
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def add(self, class_name, annotations):
+        """Add the annotations of a class, as read by read_annotations()."""
+        class_id = self.intern(class_name)
+        if class_id in self._classes:
+            return
+        self._classes.add(class_id)
+        for annotation_type, target, visible, values in annotations:
+            self.types.append(self.intern(annotation_type))
+            self.target_kinds.append(target.kind)
+            self.target_classes.append(self.intern(target.class_name))
+            self.target_names.append(self.intern(target.name))
+            self.target_descriptors.append(self.intern(target.descriptor))
+            self.positions.append(target.position)
+            self.visible.append(visible)
+            self.values += values
+            self.value_offsets.append(len(self.values))
+        self._by_type = None
+
+    @classmethod
+    def build(cls, paths, workers=None, patterns=None, nested=True):
+        """Index the class files under `paths`, read by batch.map_batch `workers`."""
+        from batch import map_batch
+        index = cls()
+        for class_name, annotations, errors in map_batch(read_annotations, paths, workers, patterns=patterns,
+                                                         nested=nested):
+            index.errors += errors
+            if class_name is not None:
+                index.add(class_name, annotations)
+        return index
+
+    def target(self, annotation_id):
+        name = self.target_names[annotation_id]
+        descriptor = self.target_descriptors[annotation_id]
+        return AnnotationTarget(self.target_kinds[annotation_id], self.symbols[self.target_classes[annotation_id]],
+                                None if name == NO_SYMBOL else self.symbols[name],
+                                None if descriptor == NO_SYMBOL else self.symbols[descriptor],
+                                self.positions[annotation_id])
+
+    def annotation_types(self):
+        self._group()
+        return [self.symbols[type_id] for type_id in self._by_type]
+
+    def annotation_ids(self, annotation_type):
+        self._group()
+        return self._by_type.get(self._symbol_ids.get(annotation_type), [])
+
+    def annotations(self, annotation_type):
+        """The AnnotationInstances of `annotation_type` (a class name like 'java.lang.Deprecated')."""
+        return [AnnotationInstance(self, annotation_id) for annotation_id in self.annotation_ids(annotation_type)]
+
+    def targets(self, annotation_type, kind=None):
+        """The AnnotationTargets annotated with `annotation_type`, optionally only those of `kind`."""
+        return [self.target(annotation_id) for annotation_id in self.annotation_ids(annotation_type)
+                if kind is None or self.target_kinds[annotation_id] == kind]
+
+    def save(self, file):
+        """Write the index to a binary file object."""
+        write_header(file, _MAGIC, _FORMAT_VERSION)
+        write_strings(file, self.symbols)
+        write_array(file, array('I', sorted(self._classes)))
+        write_array(file, self.types)
+        write_bytes(file, self.target_kinds)
+        write_array(file, self.target_classes)
+        write_array(file, self.target_names)
+        write_array(file, self.target_descriptors)
+        write_array(file, self.positions)
+        write_bytes(file, self.visible)
+        write_array(file, self.value_offsets)
+        write_bytes(file, self.values)
+
+    @classmethod
+    def load(cls, file):
+        """Read an index written by save() from a binary file object."""
+        read_header(file, _MAGIC, _FORMAT_VERSION, 'annotation')
+        index = cls()
+        index.symbols = read_strings(file)
+        index._symbol_ids = {symbol: symbol_id for symbol_id, symbol in enumerate(index.symbols)}
+        index._classes = set(read_array(file, 'I'))
+        index.types = read_array(file, 'I')
+        index.target_kinds = bytearray(read_bytes(file))
+        index.target_classes = read_array(file, 'I')
+        index.target_names = read_array(file, 'i')
+        index.target_descriptors = read_array(file, 'i')
+        index.positions = read_array(file, 'i')
+        index.visible = bytearray(read_bytes(file))
+        index.value_offsets = read_array(file, 'I')
+        index.values = bytearray(read_bytes(file))
+        count = len(index.types)
+        if (any(len(values) != count for values in (index.target_kinds, index.target_classes, index.target_names,
+                                                     index.target_descriptors, index.positions, index.visible))
+                or len(index.value_offsets) != count + 1):
+            raise InvalidIndex('inconsistent annotation index')
+        return index
+
+    def _group(self):
+        if self._by_type is None:
+            self._by_type = {}
+            for annotation_id, type_id in enumerate(self.types):
+                self._by_type.setdefault(type_id, []).append(annotation_id)
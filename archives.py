@@ -0,0 +1,58 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import io
+import zipfile
+from fnmatch import fnmatchcase
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+ARCHIVE_EXTENSIONS = ('.jar', '.war', '.ear', '.zip')
+
+# Separator between an archive's name and the name of an entry in it, like in jar URLs.
+NESTED_SEPARATOR = '!/'
+
+
+def is_archive(name):
+    return name.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _matches(name, patterns):
+    return any(fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def iter_class_entries(archive, patterns=None, nested=True):
+    """Yield (name, bytes) for the class files in `archive`, a path or a binary file object.
+
+    Nothing is extracted to disk: each matching entry is read into a single buffer. Entries are filtered by their
+    name with the fnmatch `patterns` before being decompressed. Nested archives (e.g. BOOT-INF/lib/*.jar) are
+    walked too when `nested`; their entries are named 'outer.jar!/inner.jar!/a/B.class' relative to `archive`.
+    """
+    with zipfile.ZipFile(archive) as zip_file:
+        yield from _iter_zip_entries(zip_file, patterns, nested, '')
+
+
+def _iter_zip_entries(zip_file, patterns, nested, prefix):
+    for info in zip_file.infolist():
+        if info.is_dir():
+            continue
+        name = info.filename
+        if name.endswith('.class'):
+            if patterns is None or _matches(name, patterns):
+                yield prefix + name, zip_file.read(info)
+        elif nested and is_archive(name):
+            try:
+                with zipfile.ZipFile(io.BytesIO(zip_file.read(info))) as nested_file:
+                    yield from _iter_zip_entries(nested_file, patterns, nested, prefix + name + NESTED_SEPARATOR)
+            except zipfile.BadZipFile:
+                continue
+
+
+def iter_class_files(archive, patterns=None, nested=True, **class_file_args):
+    """Yield (name, ClassFile) for the class files in `archive`; see iter_class_entries."""
+    from javadec import ClassFile
+    for name, data in iter_class_entries(archive, patterns, nested):
+        yield name, ClassFile(data, **class_file_args)
@@ -1,7 +1,14 @@
 #!/usr/bin/python3 -O
-#  -*- coding:utf-8 -*-
+#  -*- coding:utf-8 -*-
 
+import struct
+from array import array
+
+import instrumentation
+from bytecode import CompactCode, iter_instructions
 from common import *
+from constant_pool import (CONSTANT_CLASS, CONSTANT_DOUBLE, CONSTANT_FLOAT, CONSTANT_INTEGER, CONSTANT_LONG,
+                           CONSTANT_METHOD_HANDLE, CONSTANT_METHOD_TYPE, CONSTANT_STRING)
 
 
 __author__ = 'Gonzalo Matamala'
@@ -10,13 +17,36 @@ __version__ = '0.1.0'
 
 
 class AttributeInfo(BaseEntry):
+    __slots__ = ('attribute_name_index', 'attribute_length', 'info_pos', '_name', '_f', '_info')
+
     def __init__(self, f):
         super().__init__(f)
         self.attribute_name_index = f.read_u2()
         self.attribute_length = f.read_u4()
-        self.info = f.read_buffer(self.attribute_length)
+        self.info_pos = f.tell()
+        if f.skip_attributes:
+            self._f = f
+            self._info = None
+            f.seek(self.attribute_length, SEEK_CUR)
+            if instrumentation.current is not None:
+                instrumentation.current.counters['attributes.skipped'] += 1
+                instrumentation.current.counters['attributes.skipped_bytes'] += self.attribute_length
+        else:
+            self._f = None
+            self._info = f.read_buffer(self.attribute_length)
         self._name = None
 
+    @property
+    def info(self):
+        if self._info is None:
+            if self._f is None:
+                raise ValueError('attribute {} info was released'.format(self._name))
+            pos = self._f.tell()
+            self._f.seek(self.info_pos, SEEK_SET)
+            self._info = self._f.read_buffer(self.attribute_length)
+            self._f.seek(pos, SEEK_SET)
+        return self._info
+
     def init(self, constant_pool):
         try:
             self._name = constant_pool.get_utf8(self.attribute_name_index)
@@ -27,32 +57,101 @@ class AttributeInfo(BaseEntry):
     def name(self):
         return self._name
 
+    def release(self):
+        self._info = None
+        self._f = None
+
 
 class AttributesInfo(ListEntry):
+    """Attributes of a class, field, method or Code attribute.
+
+    Attributes are decoded by the type registered for their name in ATTRIBUTE_TYPES the first time they are asked
+    for, and the decoded attribute is kept. Signature is decoded on init, as the owner needs it right away; at the
+    'full' validation level every attribute is, so that their errors are reported with the owner's.
+    """
+    __slots__ = ('_attributes_map', '_decoded', '_constant_pool')
+
     def __init__(self, f):
         super().__init__(AttributeInfo, f)
         self._attributes_map = {}
+        self._decoded = {}
+        self._constant_pool = None
 
     def init(self, constant_pool):
         super().init(constant_pool)
+        self._constant_pool = constant_pool
         for attribute in self.entries:
             if attribute.name():
-                self._attributes_map[attribute.name()] = attribute.info
+                self._attributes_map.setdefault(attribute.name(), []).append(attribute)
+        if constant_pool.validation == 'full':
+            for name in self._attributes_map:
+                self.get_all(name)
+        else:
+            self.get('Signature')
         return not self.errors
 
+    def names(self):
+        return list(self._attributes_map)
+
+    def get(self, name):
+        decoded = self.get_all(name)
+        if decoded:
+            return decoded[0]
+        return None
+
+    def get_all(self, name):
+        decoded = self._decoded.get(name)
+        if decoded is None:
+            decoded = self._decoded[name] = [self._decode(attribute)
+                                             for attribute in self._attributes_map.get(name, ())]
+        return decoded
+
     def get_attribute(self, name):
-        return self._attributes_map[name]
+        return self._attributes_map[name][0].info
+
+    def release(self):
+        """Drop the raw info of the attributes decoded so far; attributes not decoded yet keep theirs."""
+        for name, decoded in self._decoded.items():
+            for attribute in self._attributes_map.get(name, ()):
+                attribute.release()
+            for attribute in decoded:
+                attribute.release()
 
     def get_code(self):
-        if 'Code' in self._attributes_map:
-            return CodeAttribute(self._attributes_map['Code'])
+        """Return the CodeAttribute, or None if there is none or it couldn't be decoded."""
+        code = self.get('Code')
+        if isinstance(code, CodeAttribute):
+            return code
+        return None
+
+    def get_signature(self):
+        signature = self.get('Signature')
+        if signature is not None:
+            return signature.value()
         return None
 
+    def _decode(self, attribute):
+        AttributeType = ATTRIBUTE_TYPES.get(attribute.name(), Attribute)
+        if instrumentation.current is not None:
+            instrumentation.current.counters['attributes.decoded'] += 1
+        try:
+            decoded = AttributeType(attribute)
+        except struct.error:
+            decoded = Attribute(attribute)
+            decoded.append_error('truncated {} attribute'.format(attribute.name()), 0)
+        else:
+            decoded.init(self._constant_pool)
+        if decoded.errors:
+            self.add_errors(decoded.errors)
+        return decoded
+
 
 class Attribute:
+    __slots__ = ('attribute', 'errors', '_f')
+
     def __init__(self, attribute):
-        self .attribute = attribute
-        self.errors = []
+        self.attribute = attribute
+        self.errors = NO_ERRORS
         self._f = BufferFile(attribute.info)
 
     def init(self, constant_pool):
@@ -61,9 +160,28 @@ class Attribute:
     def name(self):
         return self.attribute.name()
 
+    def release(self):
+        self._f = None
+
+    def add_errors(self, errors):
+        if errors:
+            if self.errors is NO_ERRORS:
+                self.errors = []
+            self.errors += errors
+
+    def append_error(self, message, offset):
+        if self.errors is NO_ERRORS:
+            self.errors = []
+        self.errors.append((message, self.attribute.pos + 6 + offset))
+
 
 class CodeAttribute(Attribute):
+    __slots__ = ('max_stack', 'max_locals', 'code_length', 'code', 'exception_table_length', 'exception_table',
+                 'attributes', '_name', '_compact_code')
+
     class ExceptionEntry:
+        __slots__ = ('start_pc', 'end_pc', 'handler_pc', 'catch_type')
+
         def __init__(self, f):
             self.start_pc = f.read_u2()
             self.end_pc = f.read_u2()
@@ -82,25 +200,423 @@ class CodeAttribute(Attribute):
             self.exception_table.append(CodeAttribute.ExceptionEntry(self._f))
         self.attributes = AttributesInfo(self._f)
         self._name = 'Code'
+        self._compact_code = None
 
     def init(self, constant_pool):
         if not self.attributes.init(constant_pool):
-            self.errors += self.attributes.errors
+            self.add_errors(self.attributes.errors)
+        return not self.errors
+
+    def instructions(self):
+        return iter_instructions(self.code)
+
+    def compact_code(self):
+        if self._compact_code is None:
+            self._compact_code = CompactCode(self.code)
+        return self._compact_code
+
+    def release(self):
+        super().release()
+        self.attributes.release()
+
+
+class ConstantValue(Attribute):
+    __slots__ = ('constantvalue_index', '_value')
+
+    def __init__(self, attribute):
+        super().__init__(attribute)
+        self.constantvalue_index = self._f.read_u2()
+        self._value = None
+
+    def init(self, constant_pool):
+        try:
+            self._value = constant_pool.at(self.constantvalue_index).value()
+        except IndexError:
+            self.append_error('invalid constant value index {}'.format(self.constantvalue_index), 0)
         return not self.errors
 
+    def value(self):
+        return self._value
+
 
 class Deprecated(Attribute):
-    pass
+    __slots__ = ()
+
+
+class Exceptions(Attribute):
+    __slots__ = ('number_of_exceptions', 'exception_index_table', '_names')
+
+    def __init__(self, attribute):
+        super().__init__(attribute)
+        self.number_of_exceptions = self._f.read_u2()
+        self.exception_index_table = [self._f.read_u2() for i in range(self.number_of_exceptions)]
+        self._names = []
+
+    def init(self, constant_pool):
+        for i, index in enumerate(self.exception_index_table):
+            try:
+                self._names.append(constant_pool.get_class_name(index))
+            except ValueError as e:
+                self.append_error(str(e), 2 * (i + 1))
+        return not self.errors
+
+    def names(self):
+        return self._names
+
+
+class InnerClasses(Attribute):
+    __slots__ = ('number_of_classes', 'classes')
+
+    class InnerClass:
+        __slots__ = ('inner_class_info_index', 'outer_class_info_index', 'inner_name_index', 'inner_class_access_flags',
+                     'inner_class_name', 'outer_class_name', 'inner_name')
+
+        def __init__(self, f):
+            self.inner_class_info_index = f.read_u2()
+            self.outer_class_info_index = f.read_u2()
+            self.inner_name_index = f.read_u2()
+            self.inner_class_access_flags = f.read_u2()
+            self.inner_class_name = None
+            self.outer_class_name = None
+            self.inner_name = None
+
+    def __init__(self, attribute):
+        super().__init__(attribute)
+        self.number_of_classes = self._f.read_u2()
+        self.classes = [InnerClasses.InnerClass(self._f) for i in range(self.number_of_classes)]
+
+    def init(self, constant_pool):
+        for i, inner_class in enumerate(self.classes):
+            try:
+                inner_class.inner_class_name = constant_pool.get_class_name(inner_class.inner_class_info_index)
+                if inner_class.outer_class_info_index:
+                    inner_class.outer_class_name = constant_pool.get_class_name(inner_class.outer_class_info_index)
+                if inner_class.inner_name_index:
+                    inner_class.inner_name = constant_pool.get_utf8(inner_class.inner_name_index)
+            except ValueError as e:
+                self.append_error(str(e), 2 + 8 * i)
+        return not self.errors
+
+
+class LineNumberTable(Attribute):
+    __slots__ = ('line_number_table_length', 'start_pcs', 'line_numbers')
+
+    def __init__(self, attribute):
+        super().__init__(attribute)
+        self.line_number_table_length = self._f.read_u2()
+        self.start_pcs = array('H')
+        self.line_numbers = array('H')
+        for i in range(self.line_number_table_length):
+            self.start_pcs.append(self._f.read_u2())
+            self.line_numbers.append(self._f.read_u2())
+
+    def line_number(self, pc):
+        line_number = None
+        best_pc = -1
+        for start_pc, number in zip(self.start_pcs, self.line_numbers):
+            if best_pc < start_pc <= pc:
+                best_pc = start_pc
+                line_number = number
+        return line_number
+
+
+class LocalVariableTable(Attribute):
+    __slots__ = ('local_variable_table_length', 'local_variable_table')
+
+    class LocalVariable:
+        __slots__ = ('start_pc', 'length', 'name_index', 'descriptor_index', 'index', 'name', 'descriptor')
+
+        def __init__(self, f):
+            self.start_pc = f.read_u2()
+            self.length = f.read_u2()
+            self.name_index = f.read_u2()
+            self.descriptor_index = f.read_u2()
+            self.index = f.read_u2()
+            self.name = None
+            self.descriptor = None
+
+    def __init__(self, attribute):
+        super().__init__(attribute)
+        self.local_variable_table_length = self._f.read_u2()
+        self.local_variable_table = [LocalVariableTable.LocalVariable(self._f)
+                                     for i in range(self.local_variable_table_length)]
+
+    def init(self, constant_pool):
+        for i, local_variable in enumerate(self.local_variable_table):
+            try:
+                local_variable.name = constant_pool.get_utf8(local_variable.name_index)
+                local_variable.descriptor = constant_pool.get_utf8(local_variable.descriptor_index)
+            except ValueError as e:
+                self.append_error(str(e), 2 + 10 * i)
+        return not self.errors
+
+
+class LocalVariableTypeTable(LocalVariableTable):
+    __slots__ = ()
+
+
+class BootstrapMethods(Attribute):
+    __slots__ = ('num_bootstrap_methods', 'bootstrap_methods')
+
+    class BootstrapMethod:
+        __slots__ = ('pos', 'bootstrap_method_ref', 'num_bootstrap_arguments', 'bootstrap_arguments', 'handle',
+                     'arguments')
+
+        def __init__(self, f):
+            self.pos = f.tell()
+            self.bootstrap_method_ref = f.read_u2()
+            self.num_bootstrap_arguments = f.read_u2()
+            self.bootstrap_arguments = tuple(f.read_u2() for i in range(self.num_bootstrap_arguments))
+            self.handle = None
+            self.arguments = None
+
+        def init(self, constant_pool):
+            """Resolve the bootstrap method's MethodHandle and its static arguments' constant pool entries.
+
+            Both stay None when any of them is invalid.
+            """
+            handle = constant_pool.get_entry(self.bootstrap_method_ref, CONSTANT_METHOD_HANDLE).handle()
+            arguments = []
+            for index in self.bootstrap_arguments:
+                if constant_pool.tag(index) not in _BOOTSTRAP_ARGUMENT_TAGS:
+                    raise ValueError('index {} not refers a loadable constant'.format(index))
+                arguments.append(constant_pool.at(index))
+            self.handle = handle
+            self.arguments = tuple(arguments)
+
+    def __init__(self, attribute):
+        super().__init__(attribute)
+        self.num_bootstrap_methods = self._f.read_u2()
+        self.bootstrap_methods = [BootstrapMethods.BootstrapMethod(self._f) for i in range(self.num_bootstrap_methods)]
+
+    def init(self, constant_pool):
+        for bootstrap_method in self.bootstrap_methods:
+            try:
+                bootstrap_method.init(constant_pool)
+            except (IndexError, ValueError) as e:
+                self.append_error(str(e) or 'invalid constant pool index', bootstrap_method.pos)
+        return not self.errors
+
+
+_BOOTSTRAP_ARGUMENT_TAGS = frozenset((CONSTANT_CLASS, CONSTANT_DOUBLE, CONSTANT_FLOAT, CONSTANT_INTEGER, CONSTANT_LONG,
+                                      CONSTANT_METHOD_HANDLE, CONSTANT_METHOD_TYPE, CONSTANT_STRING))
+
+
+class ElementValue:
+    __slots__ = ('tag', 'const_value_index', 'type_name_index', 'const_name_index', 'class_info_index',
+                 'annotation_value', 'num_values', 'values')
+
+    def __init__(self, f):
+        self.tag = chr(f.read_u1())
+        if self.tag in 'BCDFIJSZs':
+            self.const_value_index = f.read_u2()
+        elif self.tag == 'e':
+            self.type_name_index = f.read_u2()
+            self.const_name_index = f.read_u2()
+        elif self.tag == 'c':
+            self.class_info_index = f.read_u2()
+        elif self.tag == '@':
+            self.annotation_value = Annotation(f)
+        elif self.tag == '[':
+            self.num_values = f.read_u2()
+            self.values = [ElementValue(f) for i in range(self.num_values)]
+        else:
+            raise ValueError('invalid element value tag {}'.format(self.tag))
+
+    def resolve(self, constant_pool):
+        """Return the value as a (tag, value) pair of plain values.
+
+        Constants are Python values, enum constants (type descriptor, constant name) pairs, classes return
+        descriptors, annotations (type descriptor, values) pairs as returned by Annotation.values() and arrays lists.
+        """
+        tag = self.tag
+        if tag in _ELEMENT_CONSTANT_TAGS:
+            value = constant_pool.get_entry(self.const_value_index, _ELEMENT_CONSTANT_TAGS[tag]).value()
+            if tag == 'Z':
+                value = bool(value)
+            elif tag == 'C':
+                value = chr(value)
+        elif tag == 's':
+            value = constant_pool.get_utf8(self.const_value_index)
+        elif tag == 'e':
+            value = (constant_pool.get_utf8(self.type_name_index), constant_pool.get_utf8(self.const_name_index))
+        elif tag == 'c':
+            value = constant_pool.get_utf8(self.class_info_index)
+        elif tag == '@':
+            value = (constant_pool.get_utf8(self.annotation_value.type_index),
+                     self.annotation_value.values(constant_pool))
+        else:
+            value = [element_value.resolve(constant_pool) for element_value in self.values]
+        return tag, value
+
+
+_ELEMENT_CONSTANT_TAGS = {'B': CONSTANT_INTEGER, 'C': CONSTANT_INTEGER, 'D': CONSTANT_DOUBLE, 'F': CONSTANT_FLOAT,
+                          'I': CONSTANT_INTEGER, 'J': CONSTANT_LONG, 'S': CONSTANT_INTEGER, 'Z': CONSTANT_INTEGER}
+
+
+class Annotation:
+    __slots__ = ('pos', 'type_index', 'num_element_value_pairs', 'element_value_pairs', 'type')
+
+    def __init__(self, f):
+        self.pos = f.tell()
+        self.type_index = f.read_u2()
+        self.num_element_value_pairs = f.read_u2()
+        self.element_value_pairs = []
+        for i in range(self.num_element_value_pairs):
+            element_name_index = f.read_u2()
+            self.element_value_pairs.append((element_name_index, ElementValue(f)))
+        self.type = None
+
+    def init(self, constant_pool):
+        self.type = constant_pool.get_utf8(self.type_index)
+
+    def values(self, constant_pool):
+        """Return the element values by name, resolved by ElementValue.resolve()."""
+        return {constant_pool.get_utf8(name_index): element_value.resolve(constant_pool)
+                for name_index, element_value in self.element_value_pairs}
+
+
+class TypeAnnotation(Annotation):
+    """Annotation on a type use; `target_info` holds the raw target_info fields and `type_path` (kind, index) pairs."""
+    __slots__ = ('target_type', 'target_info', 'type_path')
+
+    def __init__(self, f):
+        self.target_type = f.read_u1()
+        target_info_format = _TARGET_INFO_FORMATS.get(self.target_type)
+        if target_info_format is None:
+            raise ValueError('invalid type annotation target type 0x{:02X}'.format(self.target_type))
+        if target_info_format == 'localvar':
+            self.target_info = tuple((f.read_u2(), f.read_u2(), f.read_u2()) for i in range(f.read_u2()))
+        else:
+            self.target_info = tuple(f.read_u1() if size == 1 else f.read_u2() for size in target_info_format)
+        self.type_path = tuple((f.read_u1(), f.read_u1()) for i in range(f.read_u1()))
+        super().__init__(f)
+
+
+# Sizes of the target_info fields by target type; local variable targets hold a table.
+_TARGET_INFO_FORMATS = {
+    0x00: (1,), 0x01: (1,), 0x10: (2,), 0x11: (1, 1), 0x12: (1, 1), 0x13: (), 0x14: (), 0x15: (), 0x16: (1,),
+    0x17: (2,), 0x40: 'localvar', 0x41: 'localvar', 0x42: (2,), 0x43: (2,), 0x44: (2,), 0x45: (2,), 0x46: (2,),
+    0x47: (2, 1), 0x48: (2, 1), 0x49: (2, 1), 0x4A: (2, 1), 0x4B: (2, 1)}
+
+
+class RuntimeAnnotations(Attribute):
+    __slots__ = ('num_annotations', 'annotations')
+    AnnotationType = Annotation
+
+    def __init__(self, attribute):
+        super().__init__(attribute)
+        self.num_annotations = self._f.read_u2()
+        self.annotations = []
+        try:
+            for i in range(self.num_annotations):
+                self.annotations.append(self.AnnotationType(self._f))
+        except ValueError as e:
+            self.append_error(str(e), self._f.tell_prev())
+
+    def init(self, constant_pool):
+        for annotation in self.annotations:
+            try:
+                annotation.init(constant_pool)
+            except ValueError as e:
+                self.append_error(str(e), annotation.pos)
+        return not self.errors
+
+
+class RuntimeTypeAnnotations(RuntimeAnnotations):
+    __slots__ = ()
+    AnnotationType = TypeAnnotation
+
+
+class RuntimeParameterAnnotations(Attribute):
+    __slots__ = ('num_parameters', 'parameter_annotations')
+
+    def __init__(self, attribute):
+        super().__init__(attribute)
+        self.num_parameters = self._f.read_u1()
+        self.parameter_annotations = []
+        try:
+            for i in range(self.num_parameters):
+                num_annotations = self._f.read_u2()
+                self.parameter_annotations.append([Annotation(self._f) for j in range(num_annotations)])
+        except ValueError as e:
+            self.append_error(str(e), self._f.tell_prev())
+
+    def init(self, constant_pool):
+        for annotations in self.parameter_annotations:
+            for annotation in annotations:
+                try:
+                    annotation.init(constant_pool)
+                except ValueError as e:
+                    self.append_error(str(e), annotation.pos)
+        return not self.errors
+
+
+class AnnotationDefault(Attribute):
+    __slots__ = ('default_value',)
+
+    def __init__(self, attribute):
+        super().__init__(attribute)
+        try:
+            self.default_value = ElementValue(self._f)
+        except ValueError as e:
+            self.default_value = None
+            self.append_error(str(e), self._f.tell_prev())
 
 
 class Signature(Attribute):
+    __slots__ = ('signature_index', '_value')
+
     def __init__(self, attribute):
         super().__init__(attribute)
         self.signature_index = self._f.read_u2()
+        self._value = None
+
+    def init(self, constant_pool):
+        try:
+            self._value = constant_pool.get_utf8(self.signature_index)
+        except ValueError as e:
+            self.append_error(str(e), 0)
+        return not self.errors
+
+    def value(self):
+        return self._value
+
+
+class SourceFile(Attribute):
+    __slots__ = ('sourcefile_index', '_value')
+
+    def __init__(self, attribute):
+        super().__init__(attribute)
+        self.sourcefile_index = self._f.read_u2()
+        self._value = None
 
     def init(self, constant_pool):
-        pass
+        try:
+            self._value = constant_pool.get_utf8(self.sourcefile_index)
+        except ValueError as e:
+            self.append_error(str(e), 0)
+        return not self.errors
+
+    def value(self):
+        return self._value
 
 
 class SyntheticAttribute(Attribute):
-    pass
\ No newline at end of file
+    __slots__ = ()
+
+
+ATTRIBUTE_TYPES = {
+    'AnnotationDefault': AnnotationDefault, 'BootstrapMethods': BootstrapMethods, 'Code': CodeAttribute,
+    'ConstantValue': ConstantValue, 'Deprecated': Deprecated, 'Exceptions': Exceptions,
+    'InnerClasses': InnerClasses, 'LineNumberTable': LineNumberTable, 'LocalVariableTable': LocalVariableTable,
+    'LocalVariableTypeTable': LocalVariableTypeTable, 'RuntimeInvisibleAnnotations': RuntimeAnnotations,
+    'RuntimeInvisibleParameterAnnotations': RuntimeParameterAnnotations,
+    'RuntimeInvisibleTypeAnnotations': RuntimeTypeAnnotations, 'RuntimeVisibleAnnotations': RuntimeAnnotations,
+    'RuntimeVisibleParameterAnnotations': RuntimeParameterAnnotations,
+    'RuntimeVisibleTypeAnnotations': RuntimeTypeAnnotations,
+    'Signature': Signature, 'SourceFile': SourceFile, 'Synthetic': SyntheticAttribute}
+
+
+def register_attribute(name, AttributeType):
+    ATTRIBUTE_TYPES[name] = AttributeType
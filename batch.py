@@ -0,0 +1,162 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import os
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+from time import perf_counter
+
+import instrumentation
+
+from archives import NESTED_SEPARATOR, is_archive, iter_class_entries
+from javadec import ClassFile
+from summary import summarize
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+# Result of a batch item; errors are (item name, position, message) tuples, position is None when parsing failed.
+ClassResult = namedtuple('ClassResult', ['name', 'summary', 'errors'])
+
+DEFAULT_CHUNK_SIZE = 64
+
+
+# Per process ParseCache, by cache path; sqlite connections can't be shared with worker processes.
+_caches = {}
+
+
+def _get_cache(path):
+    if path not in _caches:
+        from parse_cache import ParseCache
+        _caches[path] = ParseCache(path)
+    return _caches[path]
+
+
+def exception_errors(name, e):
+    """ClassResult errors for an item whose parsing raised `e`."""
+    return ((name, None, '{}: {}'.format(type(e).__name__, e)),)
+
+
+def parse_class(name, source, class_file_args=None, cache=None):
+    """Parse `source` (class file bytes or path) into a ClassResult, never raising for invalid class files.
+
+    With a `cache` path, summaries are looked up in (and added to) that ParseCache.
+    """
+    try:
+        if cache is not None:
+            summary = _get_cache(cache).summarize(source, **(class_file_args or {}))
+        else:
+            summary = summarize(ClassFile(source, **(class_file_args or {})))
+    except Exception as e:
+        return ClassResult(name, None, exception_errors(name, e))
+    return ClassResult(name, summary, tuple((name, pos, message) for message, pos in summary.errors))
+
+
+def _map_items(function, items):
+    stats = instrumentation.current
+    if stats is None:
+        return [function(name, source) for name, source in items]
+    results = []
+    for name, source in items:
+        start = perf_counter()
+        results.append(function(name, source))
+        stats.add_class_time(name, perf_counter() - start)
+    stats.count('batch.items', len(items))
+    return results
+
+
+def _map_chunk(function, items, collect_stats):
+    if collect_stats:
+        with instrumentation.collect() as stats:
+            results = _map_items(function, items)
+        return results, stats.as_dict()
+    return _map_items(function, items), None
+
+
+def split_classpath(classpath):
+    """Split a classpath string; 'dir/*' entries stand for the jars in dir, like for java."""
+    paths = []
+    for entry in classpath.split(os.pathsep):
+        if not entry:
+            continue
+        if os.path.basename(entry) == '*':
+            directory = os.path.dirname(entry) or '.'
+            paths += [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                      if name.lower().endswith('.jar')]
+        else:
+            paths.append(entry)
+    return paths
+
+
+def iter_sources(paths, patterns=None, nested=True):
+    """Yield (name, source) items for the class files under `paths`.
+
+    `paths` may hold class files, directories (walked in sorted order), archives and classpath strings. Sources are
+    paths for plain class files and bytes for archive entries.
+    """
+    for path in paths:
+        if os.pathsep in path or os.path.basename(path) == '*':
+            yield from iter_sources(split_classpath(path), patterns, nested)
+        elif os.path.isdir(path):
+            for directory, directories, files in os.walk(path):
+                directories.sort()
+                for name in sorted(files):
+                    yield from iter_sources([os.path.join(directory, name)], patterns, nested)
+        elif is_archive(path):
+            for name, data in iter_class_entries(path, patterns, nested):
+                yield path + NESTED_SEPARATOR + name, data
+        elif path.endswith('.class'):
+            yield path, path
+
+
+def _chunks(items, chunk_size):
+    items = iter(items)
+    chunk = list(islice(items, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(items, chunk_size))
+
+
+def parse_batch(paths, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, patterns=None, nested=True, cache=None,
+                **class_file_args):
+    """Parse every class file under `paths` and yield their ClassResult, in input order.
+
+    See map_batch for `workers` and `chunk_size`. `cache` is the path of a ParseCache shared by all workers.
+    """
+    yield from map_batch(partial(parse_class, class_file_args=class_file_args, cache=cache), paths, workers,
+                         chunk_size, patterns, nested)
+
+
+def map_batch(function, paths, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, patterns=None, nested=True):
+    """Yield function(name, source) for every class file under `paths`, in input order.
+
+    Calls are run by a pool of `workers` processes (one per CPU by default; 1 runs them in this process),
+    `chunk_size` class files per task; `function` must be picklable. Instrumentation stats being collected by the
+    caller include the workers'.
+    """
+    chunks = _chunks(iter_sources(paths, patterns, nested), chunk_size)
+    if workers == 1:
+        for chunk in chunks:
+            yield from _map_items(function, chunk)
+        return
+    workers = workers or os.cpu_count() or 1
+    stats = instrumentation.current
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(_map_chunk, function, chunk, stats is not None))
+            if len(pending) >= 2 * workers:
+                yield from _chunk_results(pending.popleft(), stats)
+        for future in pending:
+            yield from _chunk_results(future, stats)
+
+
+def _chunk_results(future, stats):
+    results, chunk_stats = future.result()
+    if chunk_stats is not None:
+        stats.merge(chunk_stats)
+    return results
@@ -0,0 +1,8 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+"""Parser benchmarks; run `python3 -m benchmarks.run` from the repository root."""
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
@@ -0,0 +1,179 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import random
+import struct
+from collections import namedtuple
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+# Shape of a generated class: `pool_size` is the number of extra string constants, `descriptor_length` the number of
+# parameters of each method, `non_ascii` the share of those strings with non-ASCII characters and `code_size` the
+# length in bytes of each method's code.
+ClassShape = namedtuple('ClassShape', ['pool_size', 'methods', 'descriptor_length', 'non_ascii', 'code_size'])
+
+DEFAULT_SHAPE = ClassShape(pool_size=200, methods=20, descriptor_length=3, non_ascii=0.1, code_size=64)
+
+_PARAMETER_TYPES = ('I', 'J', 'D', 'Z', '[I', 'Ljava/lang/String;', 'Ljava/util/List;', '[[Ljava/lang/Object;')
+_WORDS = ('alpha', 'beta', 'gamma', 'delta', 'value', 'count', 'index', 'name', 'error', 'result')
+# Besides 2 and 3 bytes characters, NUL and a supplementary character exercise Modified UTF-8 specifics.
+_NON_ASCII = ('é', 'ß', 'ñ', 'Ω', 'ж', '中', '文', '\u0000', '\U0001F600')
+
+_U1 = struct.Struct('>B')
+_U2 = struct.Struct('>H')
+_U4 = struct.Struct('>I')
+
+
+def encode_modified_utf8(value):
+    data = bytearray()
+    for c in value:
+        code_point = ord(c)
+        if code_point == 0:
+            data += b'\xc0\x80'
+        elif code_point > 0xffff:
+            code_point -= 0x10000
+            data += chr(0xd800 | code_point >> 10).encode('utf-8', 'surrogatepass')
+            data += chr(0xdc00 | code_point & 0x3ff).encode('utf-8', 'surrogatepass')
+        else:
+            data += c.encode('utf-8', 'surrogatepass')
+    return bytes(data)
+
+
+class ClassWriter:
+    """Class file writer: constant pool entries are added on demand and deduplicated.
+
+    Methods, fields and attributes are built as bytes, adding the constants they use; build() is called last.
+    """
+    def __init__(self):
+        self.entries = []
+        self._indexes = {}
+
+    def _add(self, key, data):
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = len(self.entries) + 1
+            self.entries.append(data)
+        return index
+
+    def utf8(self, value):
+        data = encode_modified_utf8(value)
+        return self._add(('utf8', value), _U1.pack(1) + _U2.pack(len(data)) + data)
+
+    def integer(self, value):
+        return self._add(('integer', value), _U1.pack(3) + _U4.pack(value))
+
+    def class_info(self, name):
+        return self._add(('class', name), _U1.pack(7) + _U2.pack(self.utf8(name)))
+
+    def string(self, value):
+        return self._add(('string', value), _U1.pack(8) + _U2.pack(self.utf8(value)))
+
+    def name_and_type(self, name, descriptor):
+        return self._add(('nat', name, descriptor),
+                         _U1.pack(12) + _U2.pack(self.utf8(name)) + _U2.pack(self.utf8(descriptor)))
+
+    def method_ref(self, owner, name, descriptor):
+        name_and_type = self.name_and_type(name, descriptor)
+        return self._add(('methodref', owner, name, descriptor),
+                         _U1.pack(10) + _U2.pack(self.class_info(owner)) + _U2.pack(name_and_type))
+
+    def method_handle(self, reference_kind, reference_index):
+        return self._add(('mh', reference_kind, reference_index),
+                         _U1.pack(15) + _U1.pack(reference_kind) + _U2.pack(reference_index))
+
+    def method_type(self, descriptor):
+        return self._add(('mt', descriptor), _U1.pack(16) + _U2.pack(self.utf8(descriptor)))
+
+    def invoke_dynamic(self, bootstrap_method, name, descriptor):
+        return self._add(('indy', bootstrap_method, name, descriptor), _U1.pack(18) + _U2.pack(bootstrap_method) +
+                         _U2.pack(self.name_and_type(name, descriptor)))
+
+    def attribute(self, name, body):
+        return _U2.pack(self.utf8(name)) + _U4.pack(len(body)) + body
+
+    def code(self, max_stack, max_locals, code, exception_table=()):
+        """Code attribute; `exception_table` holds (start_pc, end_pc, handler_pc, catch_type index) tuples."""
+        return self.attribute('Code', _U2.pack(max_stack) + _U2.pack(max_locals) + _U4.pack(len(code)) + code +
+                              _U2.pack(len(exception_table)) +
+                              b''.join(b''.join(_U2.pack(value) for value in entry) for entry in exception_table) +
+                              _U2.pack(0))
+
+    def bootstrap_methods(self, bootstrap_methods):
+        """BootstrapMethods attribute of (method handle index, [argument indexes]) pairs."""
+        return self.attribute('BootstrapMethods', _U2.pack(len(bootstrap_methods)) + b''.join(
+            _U2.pack(handle) + _U2.pack(len(arguments)) + b''.join(_U2.pack(argument) for argument in arguments)
+            for handle, arguments in bootstrap_methods))
+
+    def member(self, access_flags, name, descriptor, attributes=()):
+        """A field_info or method_info."""
+        return (_U2.pack(access_flags) + _U2.pack(self.utf8(name)) + _U2.pack(self.utf8(descriptor)) +
+                _U2.pack(len(attributes)) + b''.join(attributes))
+
+    def build(self, name, fields=(), methods=(), attributes=(), super_name='java/lang/Object', interfaces=(),
+              access_flags=0x0021):
+        """Return the class file bytes."""
+        this_class = self.class_info(name)
+        super_class = self.class_info(super_name)
+        interfaces = [self.class_info(interface) for interface in interfaces]
+        body = (_U2.pack(access_flags) + _U2.pack(this_class) + _U2.pack(super_class) + _U2.pack(len(interfaces)) +
+                b''.join(_U2.pack(interface) for interface in interfaces) +
+                _U2.pack(len(fields)) + b''.join(fields) + _U2.pack(len(methods)) + b''.join(methods) +
+                _U2.pack(len(attributes)) + b''.join(attributes))
+        return (_U4.pack(0xcafebabe) + _U2.pack(0) + _U2.pack(52) + _U2.pack(len(self.entries) + 1) +
+                b''.join(self.entries) + body)
+
+
+def _code(writer, code_size, strings, max_locals):
+    code = bytearray()
+    i = 0
+    while len(code) + 5 <= code_size:
+        if strings and i % 2:
+            code += b'\x13' + _U2.pack(strings[i % len(strings)]) + b'\x57'     # ldc_w, pop
+        else:
+            code += b'\x03\x57'                                                 # iconst_0, pop
+        i += 1
+    code += b'\xb1'                                                             # return
+    return writer.code(1, max_locals, bytes(code))
+
+
+def _string_value(rng, non_ascii):
+    words = [rng.choice(_WORDS) for i in range(rng.randint(1, 6))]
+    if rng.random() < non_ascii:
+        for i in range(rng.randint(1, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(_NON_ASCII))
+    return ' '.join(words)
+
+
+def generate_class(shape=DEFAULT_SHAPE, seed=0, name='bench/Generated'):
+    """Return the bytes of a valid class file of the given ClassShape; the same arguments give the same bytes."""
+    rng = random.Random(seed)
+    writer = ClassWriter()
+    writer.class_info(name)
+    writer.class_info('java/lang/Object')
+    writer.class_info('java/lang/Runnable')
+    strings = [writer.string('{} {}'.format(i, _string_value(rng, shape.non_ascii))) for i in range(shape.pool_size)]
+
+    fields = [writer.member(0x0002, 'field{}'.format(i), rng.choice(_PARAMETER_TYPES))
+              for i in range(max(1, shape.methods // 4))]
+
+    init = writer.method_ref('java/lang/Object', '<init>', '()V')
+    methods = [writer.member(0x0001, '<init>', '()V', [writer.code(1, 1, b'\x2a\xb7' + _U2.pack(init) + b'\xb1')])]
+    for i in range(shape.methods):
+        parameters = [rng.choice(_PARAMETER_TYPES) for j in range(shape.descriptor_length)]
+        max_locals = sum(2 if parameter in ('J', 'D') else 1 for parameter in parameters)
+        attributes = [_code(writer, shape.code_size, strings, max_locals)]
+        if i % 4 == 3:
+            # Generic method: <T:Ljava/lang/Object;>(...)TT;
+            descriptor = '({})Ljava/lang/Object;'.format(''.join(parameters))
+            signature = '<T:Ljava/lang/Object;>({})TT;'.format(''.join(parameters))
+            attributes.append(writer.attribute('Signature', _U2.pack(writer.utf8(signature))))
+        else:
+            descriptor = '({})V'.format(''.join(parameters))
+        methods.append(writer.member(0x0009, 'method{}'.format(i), descriptor, attributes))
+    methods.append(writer.member(0x0001, 'run', '()V', [_code(writer, shape.code_size, strings, 1)]))
+
+    attributes = [writer.attribute('SourceFile', _U2.pack(writer.utf8('Generated.java')))]
+    return writer.build(name, fields, methods, attributes, interfaces=['java/lang/Runnable'])
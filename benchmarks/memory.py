@@ -0,0 +1,72 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+
+from javadec import ClassFile
+
+from benchmarks.generator import generate_class
+from benchmarks.run import CASES
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+# ClassFile arguments of the measured configurations.
+CONFIGURATIONS = {
+    'full': {},
+    'full_release': {'release': True},
+    'signatures': {'profile': 'signatures'},
+    'signatures_release': {'profile': 'signatures', 'release': True},
+}
+
+
+def measure(shape, count, class_file_args, seed=0):
+    """Return the resident bytes per parsed class, class file buffers included, keeping `count` classes."""
+    data = generate_class(shape, seed)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        class_files = [ClassFile(bytes(data), **class_file_args) for i in range(count)]
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    del class_files
+    return {'class_size': len(data), 'bytes_per_class': size / count}
+
+
+def run(cases=None, count=100, seed=0):
+    results = {'python': sys.version.split()[0], 'count': count, 'cases': []}
+    for name in cases or CASES:
+        case = {'name': name, 'shape': CASES[name]._asdict(), 'configurations': {}}
+        for configuration, class_file_args in CONFIGURATIONS.items():
+            case['configurations'][configuration] = measure(CASES[name], count, class_file_args, seed)
+        results['cases'].append(case)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='measure the memory kept by parsed classes')
+    parser.add_argument('cases', nargs='*', help='cases to run, of {} (default: all)'.format(', '.join(CASES)))
+    parser.add_argument('-n', '--count', type=int, default=100, help='classes kept resident per measure')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='JSON output file (default: stdout)')
+
+    args = parser.parse_args()
+    for case in args.cases:
+        if case not in CASES:
+            parser.error('unknown case {}'.format(case))
+    results = run(args.cases, args.count, args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
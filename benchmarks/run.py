@@ -0,0 +1,158 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import BufferFile
+from constant_pool import ConstantPool
+from generic_signatures import clear_signature_cache
+from javadec import ClassFile
+from signatures import clear_descriptor_cache
+from this_class import ThisClassInfo
+
+from benchmarks.generator import DEFAULT_SHAPE, generate_class
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+CASES = {
+    'default': DEFAULT_SHAPE,
+    'large_pool': DEFAULT_SHAPE._replace(pool_size=5000),
+    'many_methods': DEFAULT_SHAPE._replace(methods=500),
+    'long_descriptors': DEFAULT_SHAPE._replace(descriptor_length=40),
+    'non_ascii': DEFAULT_SHAPE._replace(pool_size=2000, non_ascii=1.0),
+    'large_code': DEFAULT_SHAPE._replace(code_size=8192),
+}
+
+JAVADEC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'javadec.py')
+
+# Offset of constant_pool_count: after magic, minor_version and major_version.
+_CONSTANT_POOL_POS = 8
+
+
+def _read_constant_pool(data, lazy=False):
+    f = BufferFile(data, _CONSTANT_POOL_POS)
+    return f, ConstantPool(f, lazy)
+
+
+def time_constant_pool_scan(data):
+    start = time.perf_counter()
+    _read_constant_pool(data, lazy=True)
+    return time.perf_counter() - start
+
+
+def time_constant_pool(data):
+    start = time.perf_counter()
+    _read_constant_pool(data)
+    return time.perf_counter() - start
+
+
+def time_constant_pool_init(data):
+    f, constant_pool = _read_constant_pool(data)
+    entries = [entry for entry in constant_pool.constant_pool if entry is not None]
+    start = time.perf_counter()
+    for entry in entries:
+        entry.init(constant_pool)
+    return time.perf_counter() - start
+
+
+def time_this_class_init(data):
+    f, constant_pool = _read_constant_pool(data)
+    this_class = ThisClassInfo(f)
+    clear_descriptor_cache()
+    clear_signature_cache()
+    start = time.perf_counter()
+    this_class.init(constant_pool)
+    return time.perf_counter() - start
+
+
+def time_signature(data):
+    this_class = ClassFile(data).this_class
+    clear_descriptor_cache()
+    clear_signature_cache()
+    start = time.perf_counter()
+    this_class.signature()
+    return time.perf_counter() - start
+
+
+def time_class_file(data):
+    start = time.perf_counter()
+    ClassFile(data)
+    return time.perf_counter() - start
+
+
+def time_cli(path):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, JAVADEC, '-C', '-S', path], check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+PHASES = {
+    'constant_pool_scan': time_constant_pool_scan,
+    'constant_pool': time_constant_pool,
+    'constant_pool_init': time_constant_pool_init,
+    'this_class_init': time_this_class_init,
+    'signature': time_signature,
+    'class_file': time_class_file,
+}
+
+
+def _stats(times):
+    return {'min': min(times), 'median': statistics.median(times), 'mean': statistics.mean(times),
+            'repeat': len(times)}
+
+
+def run_case(name, shape, repeat, seed=0, cli=True):
+    data = generate_class(shape, seed)
+    result = {'name': name, 'shape': shape._asdict(), 'seed': seed, 'class_size': len(data), 'phases': {}}
+    for phase, function in PHASES.items():
+        result['phases'][phase] = _stats([function(data) for i in range(repeat)])
+    if cli:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'Generated.class')
+            with open(path, 'wb') as f:
+                f.write(data)
+            result['phases']['cli'] = _stats([time_cli(path) for i in range(max(1, repeat // 10))])
+    return result
+
+
+def run(cases=None, repeat=50, seed=0, cli=True):
+    """Time every phase for the named CASES (all by default); times are in seconds."""
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'cases': [run_case(name, CASES[name], repeat, seed, cli) for name in (cases or CASES)],
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='time the class file parser on generated class files')
+    parser.add_argument('cases', nargs='*', help='cases to run, of {} (default: all)'.format(', '.join(CASES)))
+    parser.add_argument('-n', '--repeat', type=int, default=50, help='runs per phase; the CLI runs a tenth as many')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-cli', dest='cli', action='store_false', help='don\'t time javadec.py end to end')
+    parser.add_argument('-o', '--output', help='JSON output file (default: stdout)')
+
+    args = parser.parse_args()
+    for case in args.cases:
+        if case not in CASES:
+            parser.error('unknown case {}'.format(case))
+    results = run(args.cases, args.repeat, args.seed, args.cli)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
@@ -0,0 +1,242 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import struct
+from array import array
+from bisect import bisect_left
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+# Instructions are (offset, opcode, operands) tuples. Branch operands are absolute code offsets. Switch operands are
+# (default, low, high, targets) for tableswitch and (default, keys, targets) for lookupswitch. A wide instruction is
+# reported as WIDE with (modified opcode, index[, const]) operands.
+
+_S1 = struct.Struct('>b')
+_U1 = struct.Struct('>B')
+_S2 = struct.Struct('>h')
+_U2 = struct.Struct('>H')
+_S4 = struct.Struct('>i')
+
+# Operand kinds: b s1, B u1, k u1 constant pool index, K u2 constant pool index, s s2, j s2 branch, J s4 branch,
+# 0 u1 always zero (not reported).
+_OPERAND_KINDS = {
+    'b': (_S1, 1, False), 'B': (_U1, 1, False), 'k': (_U1, 1, False), 'K': (_U2, 2, False), 's': (_S2, 2, False),
+    'j': (_S2, 2, True), 'J': (_S4, 4, True), '0': (None, 1, False)}
+
+_OPCODES = (
+    (0x00, 'nop', ''), (0x01, 'aconst_null', ''), (0x02, 'iconst_m1', ''), (0x03, 'iconst_0', ''),
+    (0x04, 'iconst_1', ''), (0x05, 'iconst_2', ''), (0x06, 'iconst_3', ''), (0x07, 'iconst_4', ''),
+    (0x08, 'iconst_5', ''), (0x09, 'lconst_0', ''), (0x0a, 'lconst_1', ''), (0x0b, 'fconst_0', ''),
+    (0x0c, 'fconst_1', ''), (0x0d, 'fconst_2', ''), (0x0e, 'dconst_0', ''), (0x0f, 'dconst_1', ''),
+    (0x10, 'bipush', 'b'), (0x11, 'sipush', 's'), (0x12, 'ldc', 'k'), (0x13, 'ldc_w', 'K'), (0x14, 'ldc2_w', 'K'),
+    (0x15, 'iload', 'B'), (0x16, 'lload', 'B'), (0x17, 'fload', 'B'), (0x18, 'dload', 'B'), (0x19, 'aload', 'B'),
+    (0x1a, 'iload_0', ''), (0x1b, 'iload_1', ''), (0x1c, 'iload_2', ''), (0x1d, 'iload_3', ''),
+    (0x1e, 'lload_0', ''), (0x1f, 'lload_1', ''), (0x20, 'lload_2', ''), (0x21, 'lload_3', ''),
+    (0x22, 'fload_0', ''), (0x23, 'fload_1', ''), (0x24, 'fload_2', ''), (0x25, 'fload_3', ''),
+    (0x26, 'dload_0', ''), (0x27, 'dload_1', ''), (0x28, 'dload_2', ''), (0x29, 'dload_3', ''),
+    (0x2a, 'aload_0', ''), (0x2b, 'aload_1', ''), (0x2c, 'aload_2', ''), (0x2d, 'aload_3', ''),
+    (0x2e, 'iaload', ''), (0x2f, 'laload', ''), (0x30, 'faload', ''), (0x31, 'daload', ''), (0x32, 'aaload', ''),
+    (0x33, 'baload', ''), (0x34, 'caload', ''), (0x35, 'saload', ''),
+    (0x36, 'istore', 'B'), (0x37, 'lstore', 'B'), (0x38, 'fstore', 'B'), (0x39, 'dstore', 'B'),
+    (0x3a, 'astore', 'B'), (0x3b, 'istore_0', ''), (0x3c, 'istore_1', ''), (0x3d, 'istore_2', ''),
+    (0x3e, 'istore_3', ''), (0x3f, 'lstore_0', ''), (0x40, 'lstore_1', ''), (0x41, 'lstore_2', ''),
+    (0x42, 'lstore_3', ''), (0x43, 'fstore_0', ''), (0x44, 'fstore_1', ''), (0x45, 'fstore_2', ''),
+    (0x46, 'fstore_3', ''), (0x47, 'dstore_0', ''), (0x48, 'dstore_1', ''), (0x49, 'dstore_2', ''),
+    (0x4a, 'dstore_3', ''), (0x4b, 'astore_0', ''), (0x4c, 'astore_1', ''), (0x4d, 'astore_2', ''),
+    (0x4e, 'astore_3', ''), (0x4f, 'iastore', ''), (0x50, 'lastore', ''), (0x51, 'fastore', ''),
+    (0x52, 'dastore', ''), (0x53, 'aastore', ''), (0x54, 'bastore', ''), (0x55, 'castore', ''),
+    (0x56, 'sastore', ''), (0x57, 'pop', ''), (0x58, 'pop2', ''), (0x59, 'dup', ''), (0x5a, 'dup_x1', ''),
+    (0x5b, 'dup_x2', ''), (0x5c, 'dup2', ''), (0x5d, 'dup2_x1', ''), (0x5e, 'dup2_x2', ''), (0x5f, 'swap', ''),
+    (0x60, 'iadd', ''), (0x61, 'ladd', ''), (0x62, 'fadd', ''), (0x63, 'dadd', ''), (0x64, 'isub', ''),
+    (0x65, 'lsub', ''), (0x66, 'fsub', ''), (0x67, 'dsub', ''), (0x68, 'imul', ''), (0x69, 'lmul', ''),
+    (0x6a, 'fmul', ''), (0x6b, 'dmul', ''), (0x6c, 'idiv', ''), (0x6d, 'ldiv', ''), (0x6e, 'fdiv', ''),
+    (0x6f, 'ddiv', ''), (0x70, 'irem', ''), (0x71, 'lrem', ''), (0x72, 'frem', ''), (0x73, 'drem', ''),
+    (0x74, 'ineg', ''), (0x75, 'lneg', ''), (0x76, 'fneg', ''), (0x77, 'dneg', ''), (0x78, 'ishl', ''),
+    (0x79, 'lshl', ''), (0x7a, 'ishr', ''), (0x7b, 'lshr', ''), (0x7c, 'iushr', ''), (0x7d, 'lushr', ''),
+    (0x7e, 'iand', ''), (0x7f, 'land', ''), (0x80, 'ior', ''), (0x81, 'lor', ''), (0x82, 'ixor', ''),
+    (0x83, 'lxor', ''), (0x84, 'iinc', 'Bb'), (0x85, 'i2l', ''), (0x86, 'i2f', ''), (0x87, 'i2d', ''),
+    (0x88, 'l2i', ''), (0x89, 'l2f', ''), (0x8a, 'l2d', ''), (0x8b, 'f2i', ''), (0x8c, 'f2l', ''),
+    (0x8d, 'f2d', ''), (0x8e, 'd2i', ''), (0x8f, 'd2l', ''), (0x90, 'd2f', ''), (0x91, 'i2b', ''),
+    (0x92, 'i2c', ''), (0x93, 'i2s', ''), (0x94, 'lcmp', ''), (0x95, 'fcmpl', ''), (0x96, 'fcmpg', ''),
+    (0x97, 'dcmpl', ''), (0x98, 'dcmpg', ''), (0x99, 'ifeq', 'j'), (0x9a, 'ifne', 'j'), (0x9b, 'iflt', 'j'),
+    (0x9c, 'ifge', 'j'), (0x9d, 'ifgt', 'j'), (0x9e, 'ifle', 'j'), (0x9f, 'if_icmpeq', 'j'),
+    (0xa0, 'if_icmpne', 'j'), (0xa1, 'if_icmplt', 'j'), (0xa2, 'if_icmpge', 'j'), (0xa3, 'if_icmpgt', 'j'),
+    (0xa4, 'if_icmple', 'j'), (0xa5, 'if_acmpeq', 'j'), (0xa6, 'if_acmpne', 'j'), (0xa7, 'goto', 'j'),
+    (0xa8, 'jsr', 'j'), (0xa9, 'ret', 'B'), (0xaa, 'tableswitch', None), (0xab, 'lookupswitch', None),
+    (0xac, 'ireturn', ''), (0xad, 'lreturn', ''), (0xae, 'freturn', ''), (0xaf, 'dreturn', ''),
+    (0xb0, 'areturn', ''), (0xb1, 'return', ''), (0xb2, 'getstatic', 'K'), (0xb3, 'putstatic', 'K'),
+    (0xb4, 'getfield', 'K'), (0xb5, 'putfield', 'K'), (0xb6, 'invokevirtual', 'K'), (0xb7, 'invokespecial', 'K'),
+    (0xb8, 'invokestatic', 'K'), (0xb9, 'invokeinterface', 'KB0'), (0xba, 'invokedynamic', 'K00'),
+    (0xbb, 'new', 'K'), (0xbc, 'newarray', 'B'), (0xbd, 'anewarray', 'K'), (0xbe, 'arraylength', ''),
+    (0xbf, 'athrow', ''), (0xc0, 'checkcast', 'K'), (0xc1, 'instanceof', 'K'), (0xc2, 'monitorenter', ''),
+    (0xc3, 'monitorexit', ''), (0xc4, 'wide', None), (0xc5, 'multianewarray', 'KB'), (0xc6, 'ifnull', 'j'),
+    (0xc7, 'ifnonnull', 'j'), (0xc8, 'goto_w', 'J'), (0xc9, 'jsr_w', 'J'), (0xca, 'breakpoint', ''),
+    (0xfe, 'impdep1', ''), (0xff, 'impdep2', ''))
+
+TABLESWITCH = 0xaa
+LOOKUPSWITCH = 0xab
+WIDE = 0xc4
+IINC = 0x84
+
+MNEMONICS = [None] * 256
+# Fixed operands of each opcode as (struct, size, is branch) tuples; None for unknown and variable length opcodes.
+_OPERANDS = [None] * 256
+# Whole instruction length for fixed length opcodes, 0 otherwise.
+_LENGTHS = bytearray(256)
+BRANCH_OPCODES = set()
+CONSTANT_POOL_OPCODES = set()
+
+for _opcode, _mnemonic, _kinds in _OPCODES:
+    MNEMONICS[_opcode] = _mnemonic
+    if _kinds is None:
+        continue
+    _OPERANDS[_opcode] = tuple(_OPERAND_KINDS[kind] for kind in _kinds)
+    _LENGTHS[_opcode] = 1 + sum(_OPERAND_KINDS[kind][1] for kind in _kinds)
+    if _kinds[:1] in ('j', 'J'):
+        BRANCH_OPCODES.add(_opcode)
+    if _kinds[:1] in ('k', 'K'):
+        CONSTANT_POOL_OPCODES.add(_opcode)
+del _opcode, _mnemonic, _kinds
+
+RETURN_OPCODES = frozenset(range(0xac, 0xb2))
+UNCONDITIONAL_BRANCH_OPCODES = frozenset((0xa7, 0xc8))
+SUBROUTINE_OPCODES = frozenset((0xa8, 0xc9))
+ATHROW = 0xbf
+INVOKEDYNAMIC = 0xba
+RET = 0xa9
+BRANCH_OPCODES = frozenset(BRANCH_OPCODES)
+CONSTANT_POOL_OPCODES = frozenset(CONSTANT_POOL_OPCODES)
+
+_NO_OPERANDS = ()
+# Opcodes that wide can modify, besides iinc.
+_WIDE_OPCODES = frozenset((0x15, 0x16, 0x17, 0x18, 0x19, 0x36, 0x37, 0x38, 0x39, 0x3a, 0xa9))
+
+
+class InvalidBytecode(Exception):
+    def __init__(self, message, offset):
+        super().__init__('{} at offset {}'.format(message, offset))
+        self.message = message
+        self.offset = offset
+
+
+def _decode_switch(code, pc, opcode):
+    p = (pc + 4) & ~3
+    default = pc + _S4.unpack_from(code, p)[0]
+    if opcode == TABLESWITCH:
+        low, high = _S4.unpack_from(code, p + 4)[0], _S4.unpack_from(code, p + 8)[0]
+        if high < low:
+            raise InvalidBytecode('invalid tableswitch bounds', pc)
+        count = high - low + 1
+        targets = struct.unpack_from('>{}i'.format(count), code, p + 12)
+        return (default, low, high, tuple(pc + target for target in targets)), p + 12 + 4 * count
+    npairs = _S4.unpack_from(code, p + 4)[0]
+    if npairs < 0:
+        raise InvalidBytecode('invalid lookupswitch pairs count', pc)
+    pairs = struct.unpack_from('>{}i'.format(2 * npairs), code, p + 8)
+    return (default, pairs[0::2], tuple(pc + target for target in pairs[1::2])), p + 8 + 8 * npairs
+
+
+def _decode_wide(code, pc):
+    opcode = code[pc + 1]
+    index = _U2.unpack_from(code, pc + 2)[0]
+    if opcode == IINC:
+        return (opcode, index, _S2.unpack_from(code, pc + 4)[0]), pc + 6
+    if opcode not in _WIDE_OPCODES:
+        raise InvalidBytecode('invalid wide opcode {}'.format(opcode), pc)
+    return (opcode, index), pc + 4
+
+
+def iter_instructions(code):
+    """Yield the (offset, opcode, operands) instructions of the `code` bytes."""
+    length = len(code)
+    operands_table = _OPERANDS
+    lengths = _LENGTHS
+    pc = 0
+    try:
+        while pc < length:
+            opcode = code[pc]
+            size = lengths[opcode]
+            if size == 1:
+                yield pc, opcode, _NO_OPERANDS
+                pc += 1
+            elif size:
+                if pc + size > length:
+                    raise InvalidBytecode('truncated instruction', pc)
+                operands = []
+                p = pc + 1
+                for operand_struct, operand_size, branch in operands_table[opcode]:
+                    if operand_struct is not None:
+                        value = operand_struct.unpack_from(code, p)[0]
+                        operands.append(pc + value if branch else value)
+                    p += operand_size
+                yield pc, opcode, tuple(operands)
+                pc = p
+            elif opcode == TABLESWITCH or opcode == LOOKUPSWITCH:
+                operands, next_pc = _decode_switch(code, pc, opcode)
+                yield pc, opcode, operands
+                pc = next_pc
+            elif opcode == WIDE:
+                operands, next_pc = _decode_wide(code, pc)
+                yield pc, opcode, operands
+                pc = next_pc
+            else:
+                raise InvalidBytecode('invalid opcode {}'.format(opcode), pc)
+    except (struct.error, IndexError):
+        raise InvalidBytecode('truncated instruction', pc) from None
+
+
+class CompactCode:
+    """Instructions of a method as parallel arrays.
+
+    `operands` holds the first operand of each instruction (0 when it has none); instructions with more operands keep
+    the whole operands tuple in `extra_operands`, keyed by instruction number.
+    """
+    def __init__(self, code):
+        self.offsets = array('L')
+        self.opcodes = bytearray()
+        self.operands = array('q')
+        self.extra_operands = {}
+        for offset, opcode, operands in iter_instructions(code):
+            if len(operands) > 1:
+                self.extra_operands[len(self.opcodes)] = operands
+            self.offsets.append(offset)
+            self.opcodes.append(opcode)
+            self.operands.append(operands[0] if operands else 0)
+
+    def __len__(self):
+        return len(self.opcodes)
+
+    def __iter__(self):
+        for i in range(len(self.opcodes)):
+            yield self.instruction(i)
+
+    def instruction(self, i):
+        operands = self.extra_operands.get(i)
+        if operands is None:
+            operands = (self.operands[i],) if _LENGTHS[self.opcodes[i]] > 1 else _NO_OPERANDS
+        return self.offsets[i], self.opcodes[i], operands
+
+    def index_of(self, offset):
+        i = bisect_left(self.offsets, offset)
+        if i < len(self.offsets) and self.offsets[i] == offset:
+            return i
+        raise ValueError('no instruction at offset {}'.format(offset))
+
+    def constant(self, i, constant_pool):
+        if self.opcodes[i] not in CONSTANT_POOL_OPCODES:
+            return None
+        return constant_pool.at(self.operands[i])
+
+
+def constant_operand(constant_pool, opcode, operands):
+    """Return the constant pool entry an instruction refers to, or None."""
+    if opcode not in CONSTANT_POOL_OPCODES:
+        return None
+    return constant_pool.at(operands[0])
+
+
+def mnemonic(opcode):
+    return MNEMONICS[opcode]
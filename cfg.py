@@ -0,0 +1,155 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+from array import array
+from bisect import bisect_right
+
+from bytecode import (ATHROW, BRANCH_OPCODES, LOOKUPSWITCH, RET, RETURN_OPCODES, TABLESWITCH,
+                      UNCONDITIONAL_BRANCH_OPCODES, InvalidBytecode)
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+EDGE_FALLTHROUGH = 0
+EDGE_BRANCH = 1
+EDGE_SWITCH = 2
+EDGE_EXCEPTION = 3
+
+
+class ControlFlowGraph:
+    """Basic blocks and edges of a method's code.
+
+    Blocks are numbered in code order; block `b` spans the code offsets [block_starts[b], block_ends[b]) and the
+    instructions [block_first[b], block_first[b + 1]) of the method's CompactCode. Edges are kept in parallel arrays
+    grouped by source block: the edges of block `b` are [edge_first[b], edge_first[b + 1]). `ret` instructions have no
+    successors.
+    """
+    def __init__(self, code_attribute):
+        self.code = code_attribute.compact_code()
+        code_length = code_attribute.code_length
+        opcodes = self.code.opcodes
+        offsets = self.code.offsets
+        operands = self.code.operands
+        extra_operands = self.code.extra_operands
+        exception_table = code_attribute.exception_table
+
+        instruction_starts = bytearray(code_length + 1)
+        leaders = bytearray(code_length + 1)
+        leaders[0] = 1
+        for entry in exception_table:
+            for offset in (entry.start_pc, entry.end_pc, entry.handler_pc):
+                if offset > code_length:
+                    raise InvalidBytecode('exception table offset out of code', offset)
+                leaders[offset] = 1
+        if not opcodes:
+            raise InvalidBytecode('empty code', 0)
+        for i, opcode in enumerate(opcodes):
+            offset = offsets[i]
+            instruction_starts[offset] = 1
+            if opcode in BRANCH_OPCODES:
+                leaders[self._check_target(operands[i], code_length, offset)] = 1
+            elif opcode == TABLESWITCH or opcode == LOOKUPSWITCH:
+                switch = extra_operands[i]
+                leaders[self._check_target(switch[0], code_length, offset)] = 1
+                for target in switch[-1]:
+                    leaders[self._check_target(target, code_length, offset)] = 1
+            elif opcode not in RETURN_OPCODES and opcode != ATHROW and opcode != RET:
+                continue
+            if i + 1 < len(opcodes):
+                leaders[offsets[i + 1]] = 1
+
+        self.block_starts = array('L')
+        self.block_ends = array('L')
+        self.block_first = array('L')
+        for i, offset in enumerate(offsets):
+            if leaders[offset]:
+                if self.block_starts:
+                    self.block_ends.append(offset)
+                self.block_starts.append(offset)
+                self.block_first.append(i)
+        self.block_ends.append(code_length)
+        self.block_first.append(len(opcodes))
+        if leaders.count(1, 0, code_length) != len(self.block_starts):
+            offset = next(offset for offset in range(code_length) if leaders[offset] and not instruction_starts[offset])
+            raise InvalidBytecode('branch or exception offset is not an instruction', offset)
+
+        self.edge_first = array('L')
+        self.edge_to = array('L')
+        self.edge_kinds = bytearray()
+        for block in range(len(self.block_starts)):
+            self.edge_first.append(len(self.edge_to))
+            last = self.block_first[block + 1] - 1
+            opcode = opcodes[last]
+            successors = set()
+            if opcode in BRANCH_OPCODES:
+                self._add_edge(successors, self.block_at(operands[last]), EDGE_BRANCH)
+                if opcode not in UNCONDITIONAL_BRANCH_OPCODES:
+                    self._add_edge(successors, block + 1, EDGE_FALLTHROUGH)
+            elif opcode == TABLESWITCH or opcode == LOOKUPSWITCH:
+                switch = extra_operands[last]
+                self._add_edge(successors, self.block_at(switch[0]), EDGE_SWITCH)
+                for target in switch[-1]:
+                    self._add_edge(successors, self.block_at(target), EDGE_SWITCH)
+            elif opcode not in RETURN_OPCODES and opcode != ATHROW and opcode != RET:
+                self._add_edge(successors, block + 1, EDGE_FALLTHROUGH)
+            start = self.block_starts[block]
+            for entry in exception_table:
+                if entry.start_pc <= start < entry.end_pc:
+                    self._add_edge(successors, self.block_at(entry.handler_pc), EDGE_EXCEPTION)
+        self.edge_first.append(len(self.edge_to))
+        self._predecessors = None
+
+    def __len__(self):
+        return len(self.block_starts)
+
+    def block_at(self, offset):
+        return bisect_right(self.block_starts, offset) - 1
+
+    def successors(self, block):
+        return self.edge_to[self.edge_first[block]:self.edge_first[block + 1]]
+
+    def edges(self, block):
+        first, last = self.edge_first[block], self.edge_first[block + 1]
+        return list(zip(self.edge_to[first:last], self.edge_kinds[first:last]))
+
+    def predecessors(self, block):
+        if self._predecessors is None:
+            self._predecessors = [[] for i in range(len(self))]
+            for source in range(len(self)):
+                for target in self.successors(source):
+                    self._predecessors[target].append(source)
+        return self._predecessors[block]
+
+    def instructions(self, block):
+        for i in range(self.block_first[block], self.block_first[block + 1]):
+            yield self.code.instruction(i)
+
+    def reachable_blocks(self):
+        reachable = bytearray(len(self))
+        pending = [0] if len(self) else []
+        while pending:
+            block = pending.pop()
+            if not reachable[block]:
+                reachable[block] = 1
+                pending.extend(self.successors(block))
+        return reachable
+
+    def unreachable_blocks(self):
+        return [block for block, reachable in enumerate(self.reachable_blocks()) if not reachable]
+
+    def cyclomatic_complexity(self):
+        return len(self.edge_to) - len(self) + 2
+
+    def _add_edge(self, successors, target, kind):
+        if target < len(self.block_starts) and target not in successors:
+            successors.add(target)
+            self.edge_to.append(target)
+            self.edge_kinds.append(kind)
+
+    @staticmethod
+    def _check_target(target, code_length, offset):
+        if target < 0 or target >= code_length:
+            raise InvalidBytecode('branch target {} out of code'.format(target), offset)
+        return target
@@ -0,0 +1,123 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import argparse
+import base64
+import itertools
+import json
+import os
+import socket
+import sys
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+# Kept to the standard library so that a run only pays for the interpreter startup; parsing is left to server.py.
+
+
+class ServerError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class Client:
+    """Connection to a server.py parse server; see server.Server for the requests."""
+    def __init__(self, socket_path):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(socket_path)
+        self._file = self._socket.makefile('rwb')
+        self._ids = itertools.count()
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def request(self, op, **fields):
+        """Send a request and return its response, raising ServerError for failed requests."""
+        return next(self.pipeline([dict(fields, op=op)]))
+
+    def pipeline(self, requests):
+        """Send all `requests` at once and yield their responses in the same order."""
+        ids = []
+        for request in requests:
+            request = dict(request, id=next(self._ids))
+            ids.append(request['id'])
+            self._file.write(json.dumps(request, separators=(',', ':')).encode() + b'\n')
+        self._file.flush()
+        responses = {}
+        for request_id in ids:
+            while request_id not in responses:
+                line = self._file.readline()
+                if not line:
+                    raise ServerError('connection closed by the server')
+                response = json.loads(line)
+                responses[response.get('id')] = response
+            response = responses.pop(request_id)
+            if 'error' in response:
+                raise ServerError(response['error'])
+            yield response
+
+    def parse(self, sources, **options):
+        """Yield the result dicts of the class files under `sources`, in order.
+
+        Sources are paths, sent as absolute paths for the server to read, or (name, class file bytes) pairs.
+        `options` are the optional fields of parse requests.
+        """
+        requests = []
+        for source in sources:
+            if isinstance(source, str):
+                requests.append(dict(options, op='parse', paths=[os.path.abspath(source)]))
+            else:
+                name, data = source
+                requests.append(dict(options, op='parse', name=name, data=base64.b64encode(data).decode('ascii')))
+        for response in self.pipeline(requests):
+            yield from response['results']
+
+
+def print_result(result, args):
+    if args.check:
+        for name, pos, message in result['errors']:
+            print('{}:{}: {}'.format(name, pos, message))
+    if args.signature and result['summary'] is not None:
+        print('// ' + result['name'])
+        print(result['summary']['signature'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='parse class files with a running server.py')
+    parser.add_argument('socket', help='Unix domain socket path of the server')
+    parser.add_argument('class_file', nargs='*',
+                        help='class file, archive, directory or classpath; - reads a class file from stdin')
+    parser.add_argument('-C', '--check', action='store_true')
+    parser.add_argument('-S', '--signature', action='store_true')
+    parser.add_argument('-I', '--include', action='append', metavar='PATTERN',
+                        help='only archive entries matching this glob pattern (can be repeated)')
+    parser.add_argument('--no-nested', dest='nested', action='store_false', help='don\'t read nested archives')
+    parser.add_argument('--validation', choices=('none', 'structural', 'full'),
+                        help='how thoroughly to check class files (default: full with -C, none otherwise)')
+    parser.add_argument('--shutdown', action='store_true', help='stop the server once its requests are done')
+
+    args = parser.parse_intermixed_args()
+    options = {'profile': 'full' if args.check else 'signatures',
+               'validation': args.validation or ('full' if args.check else 'none'), 'nested': args.nested}
+    if args.include:
+        options['include'] = args.include
+    sources = [('<stdin>', sys.stdin.buffer.read()) if path == '-' else path for path in args.class_file]
+    try:
+        with Client(args.socket) as client:
+            for result in client.parse(sources, **options):
+                print_result(result, args)
+            if args.shutdown:
+                client.request('shutdown')
+    except (OSError, ServerError) as e:
+        print('{}: {}'.format(args.socket, getattr(e, 'message', None) or e), file=sys.stderr)
+        sys.exit(1)
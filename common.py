@@ -1,39 +1,51 @@
 #!/usr/bin/python3 -O
 #  -*- coding:utf-8 -*-
-from io import SEEK_SET, SEEK_CUR, SEEK_END
+import mmap
+import struct
+from io import SEEK_SET, SEEK_CUR, SEEK_END, UnsupportedOperation
+
+import instrumentation
 
 __author__ = 'Gonzalo Matamala'
 __date__ = ''
 __version__ = '0.1.0'
 
 
+_U1 = struct.Struct('>B')
+_U2 = struct.Struct('>H')
+_U4 = struct.Struct('>I')
+
+
 class BufferFile:
+    """Zero-copy reader over a bytes-like object; `read_buffer` returns memoryview slices."""
+    # When set, attributes' info is skipped while reading and only read when asked for.
+    skip_attributes = False
+
     def __init__(self, buffer, pos=0):
-        self._b = buffer
+        self._b = memoryview(buffer)
         self._prev = self._p = pos
 
     def read_buffer(self, length):
-        rv = self._b[self._p:self._p + length]
-        self._prev = self._p
-        self._p += length
-        return rv
+        self._prev = p = self._p
+        self._p = p + length
+        return self._b[p:self._p]
 
     def read_u1(self):
-        r = self.read_buffer(1)
-        rv = ord(r[0])
-        return rv
+        self._prev = p = self._p
+        self._p = p + 1
+        return _U1.unpack_from(self._b, p)[0]
 
     def read_u2(self):
-        r = self.read_buffer(2)
-        rv = ord(r[0] << 8 | r[1])
-        return rv
+        self._prev = p = self._p
+        self._p = p + 2
+        return _U2.unpack_from(self._b, p)[0]
 
     def read_u4(self):
-        r = self.read_buffer(4)
-        rv = ord(r[0] << 24 | r[1] << 16 | r[2] << 8 | r[3])
-        return rv
+        self._prev = p = self._p
+        self._p = p + 4
+        return _U4.unpack_from(self._b, p)[0]
 
-    def seek(self, offset, whence):
+    def seek(self, offset, whence=SEEK_SET):
         if whence == SEEK_SET:
             self._prev = self._p
             self._p = offset
@@ -41,7 +53,8 @@ class BufferFile:
             self._prev = self._p
             self._p += offset
         elif whence == SEEK_END:
-            raise NotImplemented()
+            self._prev = self._p
+            self._p = len(self._b) + offset
         else:
             raise ValueError()
         return self._p
@@ -53,7 +66,22 @@ class BufferFile:
         return self._prev
 
 
+class MappedFile(BufferFile):
+    """Reader over a memory mapped file, or over its content when it can't be mapped (pipes, empty files...)."""
+    def __init__(self, file):
+        try:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            pos = file.tell()
+        except (AttributeError, OSError, UnsupportedOperation, ValueError):
+            self._map = None
+            super().__init__(file.read())
+        else:
+            super().__init__(self._map, pos)
+
+
 class JavaFile:
+    skip_attributes = False
+
     def __init__(self, file):
         self._f = file
         self._prev = self._f.tell()
@@ -64,17 +92,17 @@ class JavaFile:
 
     def read_u1(self):
         self._prev = self._f.tell()
-        return ord(self._f.read(1))
+        return _U1.unpack(self._f.read(1))[0]
 
     def read_u2(self):
         self._prev = self._f.tell()
-        return ord(self._f.read(1)) << 8 | ord(self._f.read(1))
+        return _U2.unpack(self._f.read(2))[0]
 
     def read_u4(self):
         self._prev = self._f.tell()
-        return ord(self._f.read(1)) << 24 | ord(self._f.read(1)) << 16 | ord(self._f.read(1)) << 8 | ord(self._f.read(1))
+        return _U4.unpack(self._f.read(4))[0]
 
-    def seek(self, offset, whence):
+    def seek(self, offset, whence=SEEK_SET):
         self._prev = self._f.tell()
         return self._f.seek(offset, whence)
 
@@ -85,22 +113,94 @@ class JavaFile:
         return self._prev
 
 
+class _CountingReader:
+    """Reader mixin counting read calls and bytes read into instrumentation `stats`."""
+    def __init__(self, source, stats):
+        super().__init__(source)
+        self._stats = stats
+
+    def read_buffer(self, length):
+        data = super().read_buffer(length)
+        self._stats.counters['reader.read_calls'] += 1
+        self._stats.counters['reader.bytes_read'] += len(data)
+        return data
+
+    def read_u1(self):
+        self._stats.counters['reader.read_calls'] += 1
+        self._stats.counters['reader.bytes_read'] += 1
+        return super().read_u1()
+
+    def read_u2(self):
+        self._stats.counters['reader.read_calls'] += 1
+        self._stats.counters['reader.bytes_read'] += 2
+        return super().read_u2()
+
+    def read_u4(self):
+        self._stats.counters['reader.read_calls'] += 1
+        self._stats.counters['reader.bytes_read'] += 4
+        return super().read_u4()
+
+
+_COUNTING_READERS = {reader_type: type('Counting' + reader_type.__name__, (_CountingReader, reader_type), {})
+                     for reader_type in (BufferFile, MappedFile)}
+
+
+def open_reader(source):
+    """Return a reader for `source`.
+
+    `source` may be a reader, a bytes-like object, a binary file object or a path. While instrumentation stats are
+    collected, new readers count their reads.
+    """
+    if isinstance(source, (BufferFile, JavaFile)):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        return _new_reader(BufferFile, source)
+    if hasattr(source, 'read'):
+        return _new_reader(MappedFile, source)
+    with open(source, 'rb') as f:
+        return _new_reader(MappedFile, f)
+
+
+def _new_reader(reader_type, source):
+    stats = instrumentation.current
+    if stats is None:
+        return reader_type(source)
+    return _COUNTING_READERS[reader_type](source, stats)
+
+
+# Errors of entries without errors; entries get their own list on their first error.
+NO_ERRORS = ()
+
+
 class BaseEntry:
+    __slots__ = ('pos', 'errors')
+
     def __init__(self, f=None):
         if f:
             self.pos = f.tell()
         else:
             self.pos = None
-        self.errors = []
+        self.errors = NO_ERRORS
 
     def add_errors(self, errors):
-        self.errors += errors
+        if errors:
+            if self.errors is NO_ERRORS:
+                self.errors = []
+            self.errors += errors
 
     def append_error(self, message, pos):
+        if self.errors is NO_ERRORS:
+            self.errors = []
         self.errors.append((message, pos))
 
+    def release(self):
+        """Drop the raw bytes kept for data that was already decoded."""
+        pass
+
 
 class ListEntry(BaseEntry):
+    __slots__ = ('count', 'entries')
+
     def __init__(self, EntryType, f):
         super().__init__(f)
         self.count = f.read_u2()
@@ -116,3 +216,7 @@ class ListEntry(BaseEntry):
 
     def at(self, index):
         return self.entries[index]
+
+    def release(self):
+        for entry in self.entries:
+            entry.release()
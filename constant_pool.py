@@ -1,6 +1,12 @@
 #!/usr/bin/python3 -O
 #  -*- coding:utf-8 -*-
 
+import re
+import struct
+from array import array
+from collections import Counter, namedtuple
+
+import instrumentation
 from common import *
 from signatures import check_binary_name, name_from_binary_name, unqualify_name
 
@@ -23,9 +29,114 @@ CONSTANT_METHODREF = 10
 CONSTANT_NAME_AND_TYPE = 12
 CONSTANT_STRING = 8
 CONSTANT_UTF8 = 1
+CONSTANT_UNUSABLE = 0
+
+REF_GET_FIELD = 1
+REF_GET_STATIC = 2
+REF_PUT_FIELD = 3
+REF_PUT_STATIC = 4
+REF_INVOKE_VIRTUAL = 5
+REF_INVOKE_STATIC = 6
+REF_INVOKE_SPECIAL = 7
+REF_NEW_INVOKE_SPECIAL = 8
+REF_INVOKE_INTERFACE = 9
+
+# A resolved Fieldref, Methodref or InterfaceMethodref; `tag` tells which.
+MemberRef = namedtuple('MemberRef', ['tag', 'owner', 'name', 'descriptor'])
+
+# A resolved MethodHandle: `ref` is the MemberRef of the field or method it refers to.
+MethodHandle = namedtuple('MethodHandle', ['reference_kind', 'ref'])
+
+
+# Bytes that standard UTF-8 accepts but Modified UTF-8 doesn't: NUL and 4 bytes sequences.
+_NOT_MODIFIED_UTF8_RE = re.compile(b'[\x00\xf0-\xff]')
+_SURROGATES_RE = re.compile('[\ud800-\udfff]')
+
+
+def _join_surrogates(value):
+    if _SURROGATES_RE.search(value):
+        return value.encode('utf-16-le', 'surrogatepass').decode('utf-16-le', 'surrogatepass')
+    return value
+
+
+def _decode_modified_utf8_bytes(data):
+    value = []
+    errors = []
+    length = len(data)
+    i = 0
+    while i < length:
+        c = data[i]
+        i += 1
+        if c == 0:
+            errors.append((c, i))
+        elif c < 0x80:
+            value.append(chr(c))
+        elif c < 0xc0:
+            errors.append((c, i))
+        elif c < 0xe0:
+            if i >= length:
+                errors.append((c, i))
+                break
+            c2 = data[i]
+            i += 1
+            if c2 < 0x80 or c2 >= 0xc0:
+                errors.append((c2, i))
+            else:
+                value.append(chr(((c & 0x1f) << 6) + (c2 & 0x3f)))
+        elif c < 0xf0:
+            if i >= length:
+                errors.append((c, i))
+                break
+            c2 = data[i]
+            i += 1
+            if c2 < 0x80 or c2 >= 0xc0:
+                errors.append((c2, i))
+            elif i >= length:
+                errors.append((c2, i))
+            else:
+                c3 = data[i]
+                i += 1
+                if c3 < 0x80 or c3 >= 0xc0:
+                    errors.append((c3, i))
+                else:
+                    value.append(chr(((c & 0xf) << 12) + ((c2 & 0x3f) << 6) + (c3 & 0x3f)))
+        else:
+            errors.append((c, i))
+    return _join_surrogates(''.join(value)), errors
+
+
+def decode_modified_utf8(data, validate=True):
+    """Decode JVM Modified UTF-8 `data`.
+
+    Returns the decoded string and a list of (invalid byte, 1-based index after the byte) pairs. Supplementary
+    characters encoded as surrogate pairs are joined. Without `validate` the data is trusted: the search for bytes
+    Modified UTF-8 doesn't allow is skipped, and when the codec fails anyway invalid bytes are replaced with U+FFFD
+    and no errors are returned.
+    """
+    data = bytes(data)
+    stats = instrumentation.current
+    if stats is not None:
+        stats.counters['utf8.strings'] += 1
+        stats.counters['utf8.bytes'] += len(data)
+    if data.isascii():
+        if not validate or 0 not in data:
+            return data.decode('ascii'), []
+    elif not validate or not _NOT_MODIFIED_UTF8_RE.search(data):
+        try:
+            value = data.replace(b'\xc0\x80', b'\x00').decode('utf-8', 'surrogatepass')
+        except UnicodeDecodeError:
+            if not validate:
+                return data.replace(b'\xc0\x80', b'\x00').decode('utf-8', 'replace'), []
+        else:
+            return _join_surrogates(value), []
+    if stats is not None:
+        stats.counters['utf8.slow_path'] += 1
+    return _decode_modified_utf8_bytes(data)
 
 
 class ConstantPoolEntry(BaseEntry):
+    __slots__ = ('tag',)
+
     def __init__(self, tag, f):
         super().__init__(f)
         self.tag = tag
@@ -39,24 +150,52 @@ class ConstantPoolEntry(BaseEntry):
 
 
 class ConstantUnusable(ConstantPoolEntry):
+    __slots__ = ()
+
     def __init__(self, tag, f):
         super().__init__(tag, f)
 
 
 class ConstantRefInfo(ConstantPoolEntry):
+    __slots__ = ('class_index', 'name_and_type_index', '_ref')
+
     def __init__(self, tag, f):
         super().__init__(tag, f)
         self.class_index = f.read_u2()
         self.name_and_type_index = f.read_u2()
+        self._ref = None
+
+    def init(self, constant_pool):
+        try:
+            owner = constant_pool.get_class_name(self.class_index)
+        except ValueError as e:
+            self.append_error(str(e), self.pos + 1)
+            return False
+        try:
+            name_and_type = constant_pool.get_entry(self.name_and_type_index, CONSTANT_NAME_AND_TYPE)
+        except ValueError as e:
+            self.append_error(str(e), self.pos + 3)
+            return False
+        if name_and_type.name() is not None and name_and_type.descriptor() is not None:
+            self._ref = MemberRef(self.tag, owner, name_and_type.name(), name_and_type.descriptor())
+        return not self.errors
+
+    def ref(self):
+        """Return the resolved MemberRef, or None when the entry is invalid."""
+        return self._ref
 
 
 class Constant4BytesNumeric(ConstantPoolEntry):
+    __slots__ = ('bytes',)
+
     def __init__(self, tag, f):
         super().__init__(tag, f)
         self.bytes = f.read_u4()
 
 
 class Constant8BytesNumeric(ConstantPoolEntry):
+    __slots__ = ('high_bytes', 'low_bytes')
+
     def __init__(self, tag, f):
         super().__init__(tag, f)
         self.high_bytes = f.read_u4()
@@ -64,6 +203,8 @@ class Constant8BytesNumeric(ConstantPoolEntry):
 
 
 class ConstantClassInfo(ConstantPoolEntry):
+    __slots__ = ('name_index', '_name', '_unqualified_name')
+
     def __init__(self, f):
         super().__init__(CONSTANT_CLASS, f)
         self.name_index = f.read_u2()
@@ -73,12 +214,13 @@ class ConstantClassInfo(ConstantPoolEntry):
     def init(self, constant_pool):
         try:
             name = constant_pool.get_utf8(self.name_index)
-            if not check_binary_name(name):
+            if constant_pool.validation == 'full' and not check_binary_name(name):
                 self.append_error('invalid class\' binary name {}'.format(self.name), self.pos)
             self._name = name_from_binary_name(name)
             self._unqualified_name = unqualify_name(self._name)
         except ValueError as e:
             self.append_error(str(e), self.pos + 1)
+        return not self.errors
 
     def name(self):
         return self._name
@@ -88,54 +230,116 @@ class ConstantClassInfo(ConstantPoolEntry):
 
 
 class ConstantFieldrefInfo(ConstantRefInfo):
+    __slots__ = ()
+
     def __init__(self, f):
         super().__init__(CONSTANT_FIELDREF, f)
 
 
 class ConstantMethodrefInfo(ConstantRefInfo):
+    __slots__ = ()
+
     def __init__(self, f):
         super().__init__(CONSTANT_METHODREF, f)
 
 
 class ConstantInterfaceMethodrefInfo(ConstantRefInfo):
+    __slots__ = ()
+
     def __init__(self, f):
         super().__init__(CONSTANT_INTERFACE_METHODREF, f)
 
 
 class ConstantStringInfo(ConstantPoolEntry):
+    __slots__ = ('string_index', '_value')
+
     def __init__(self, f):
         super().__init__(CONSTANT_STRING, f)
         self.string_index = f.read_u2()
+        self._value = None
+
+    def init(self, constant_pool):
+        try:
+            self._value = constant_pool.get_utf8(self.string_index)
+        except ValueError as e:
+            self.append_error(str(e), self.pos + 1)
+        return not self.errors
+
+    def value(self):
+        return self._value
 
 
 class ConstantIntegerInfo(Constant4BytesNumeric):
+    __slots__ = ()
+
     def __init__(self, f):
         super().__init__(CONSTANT_INTEGER, f)
 
+    def value(self):
+        return struct.unpack('>i', struct.pack('>I', self.bytes))[0]
+
 
 class ConstantFloatInfo(Constant4BytesNumeric):
+    __slots__ = ()
+
     def __init__(self, f):
         super().__init__(CONSTANT_FLOAT, f)
 
+    def value(self):
+        return struct.unpack('>f', struct.pack('>I', self.bytes))[0]
+
 
 class ConstantLongInfo(Constant8BytesNumeric):
+    __slots__ = ()
+
     def __init__(self, f):
         super().__init__(CONSTANT_LONG, f)
 
+    def value(self):
+        return struct.unpack('>q', struct.pack('>II', self.high_bytes, self.low_bytes))[0]
+
 
 class ConstantDoubleInfo(Constant8BytesNumeric):
+    __slots__ = ()
+
     def __init__(self, f):
         super().__init__(CONSTANT_DOUBLE, f)
 
+    def value(self):
+        return struct.unpack('>d', struct.pack('>II', self.high_bytes, self.low_bytes))[0]
+
 
 class ConstantNameAndTypeInfo(ConstantPoolEntry):
+    __slots__ = ('name_index', 'descriptor_index', '_name', '_descriptor')
+
     def __init__(self, f):
         super().__init__(CONSTANT_NAME_AND_TYPE, f)
         self.name_index = f.read_u2()
         self.descriptor_index = f.read_u2()
+        self._name = None
+        self._descriptor = None
+
+    def init(self, constant_pool):
+        try:
+            self._name = constant_pool.get_utf8(self.name_index)
+        except ValueError as e:
+            self.append_error(str(e), self.pos + 1)
+        try:
+            self._descriptor = constant_pool.get_utf8(self.descriptor_index)
+        except ValueError as e:
+            self.append_error(str(e), self.pos + 3)
+        return not self.errors
+
+    def name(self):
+        return self._name
+
+    def descriptor(self):
+        return self._descriptor
 
 
 class ConstantUtf8_Info(ConstantPoolEntry):
+    __slots__ = ('length', 'bytes', '_value')
+
     def __init__(self, f):
         super().__init__(CONSTANT_UTF8, f)
         self.length = f.read_u2()
@@ -143,139 +347,199 @@ class ConstantUtf8_Info(ConstantPoolEntry):
         self._value = ''
 
     def init(self, constant_pool):
-        i = 0
-        while i < self.length:
-            c = self.bytes[i]
-            i += 1
-            if c == 0:
-                self._set_error(c, i)
-            elif c < 0x80:
-                self._value += chr(c)
-            elif c < 0xc0:
-                self._set_error(c, i)
-            elif c < 0xe0:
-                c2 = self.bytes[i]
-                i += 1
-                if c2 < 0x80 or c2 >= 0xc0:
-                    self._set_error(c2, i)
-                else:
-                    self._value += chr(((c & 0x1f) << 6) + (c2 & 0x3f))
-            elif c < 0xf0:
-                c2 = self.bytes[i]
-                i += 1
-                if c2 < 0x80 or c2 >= 0xc0:
-                    self._set_error(c2, i)
-                else:
-                    c3 = self.bytes[i]
-                    i += 1
-                    if c3 < 0x80 or c3 >= 0xc0:
-                        self._set_error(c3, i)
-                    else:
-                        self._value += chr(((c & 0xf) << 12) + ((c2 & 0x3f) << 6) + (c3 & 0x3f))
-            else:
-                self._set_error(c, i)
+        self._value, errors = decode_modified_utf8(self.bytes, constant_pool.validation == 'full')
+        for c, i in errors:
+            self._set_error(c, i)
         return not self.errors
 
     def value(self):
         return self._value
 
+    def release(self):
+        self.bytes = None
+
     def _set_error(self, c, i):
         self.append_error('invalid byte 0x{:2x}'.format(c), self.pos + 3 + i)
 
 
 class ConstantMethodHandleInfo(ConstantPoolEntry):
+    __slots__ = ('reference_kind', 'reference_index', '_handle')
+
     def __init__(self, f):
         super().__init__(CONSTANT_METHOD_HANDLE, f)
-        self.reference_kind = f.read_u2()
+        self.reference_kind = f.read_u1()
         self.reference_index = f.read_u2()
+        self._handle = None
+
+    def init(self, constant_pool):
+        if not REF_GET_FIELD <= self.reference_kind <= REF_INVOKE_INTERFACE:
+            self.append_error('invalid method handle reference kind {}'.format(self.reference_kind), self.pos + 1)
+            return False
+        try:
+            ref = constant_pool.get_ref(self.reference_index)
+        except ValueError as e:
+            self.append_error(str(e), self.pos + 2)
+            return False
+        if (ref is not None and constant_pool.validation != 'none' and
+                (ref.tag == CONSTANT_FIELDREF) != (self.reference_kind <= REF_PUT_STATIC)):
+            self.append_error('method handle reference kind {} doesn\'t match its reference'.format(
+                self.reference_kind), self.pos + 1)
+        elif ref is not None:
+            self._handle = MethodHandle(self.reference_kind, ref)
+        return not self.errors
+
+    def handle(self):
+        """Return the resolved MethodHandle, or None when the entry is invalid."""
+        return self._handle
 
 
 class ConstantMethodTypeInfo(ConstantPoolEntry):
+    __slots__ = ('descriptor_index', '_descriptor')
+
     def __init__(self, f):
         super().__init__(CONSTANT_METHOD_TYPE, f)
         self.descriptor_index = f.read_u2()
+        self._descriptor = None
+
+    def init(self, constant_pool):
+        try:
+            self._descriptor = constant_pool.get_utf8(self.descriptor_index)
+        except ValueError as e:
+            self.append_error(str(e), self.pos + 1)
+        return not self.errors
+
+    def descriptor(self):
+        return self._descriptor
 
 
 class ConstantInvokeDynamicInfo(ConstantPoolEntry):
+    __slots__ = ('bootstrap_method_attr_index', 'name_and_type_index', '_name', '_descriptor')
+
     def __init__(self, f):
         super().__init__(CONSTANT_INVOKE_DYNAMIC, f)
         self.bootstrap_method_attr_index = f.read_u2()
         self.name_and_type_index = f.read_u2()
+        self._name = None
+        self._descriptor = None
+
+    def init(self, constant_pool):
+        try:
+            name_and_type = constant_pool.get_entry(self.name_and_type_index, CONSTANT_NAME_AND_TYPE)
+        except ValueError as e:
+            self.append_error(str(e), self.pos + 3)
+        else:
+            self._name = name_and_type.name()
+            self._descriptor = name_and_type.descriptor()
+        return not self.errors
+
+    def name(self):
+        return self._name
+
+    def descriptor(self):
+        return self._descriptor
+
+
+_CONSTANT_TYPES = {
+    CONSTANT_CLASS: ConstantClassInfo, CONSTANT_DOUBLE: ConstantDoubleInfo, CONSTANT_FIELDREF: ConstantFieldrefInfo,
+    CONSTANT_FLOAT: ConstantFloatInfo, CONSTANT_INTEGER: ConstantIntegerInfo,
+    CONSTANT_INTERFACE_METHODREF: ConstantInterfaceMethodrefInfo, CONSTANT_INVOKE_DYNAMIC: ConstantInvokeDynamicInfo,
+    CONSTANT_LONG: ConstantLongInfo, CONSTANT_METHOD_HANDLE: ConstantMethodHandleInfo,
+    CONSTANT_METHOD_TYPE: ConstantMethodTypeInfo, CONSTANT_METHODREF: ConstantMethodrefInfo,
+    CONSTANT_NAME_AND_TYPE: ConstantNameAndTypeInfo, CONSTANT_STRING: ConstantStringInfo,
+    CONSTANT_UTF8: ConstantUtf8_Info}
+
+# Size of the entry's info after the tag; utf8 entries are variable sized (u2 length + bytes).
+_CONSTANT_SIZES = {
+    CONSTANT_CLASS: 2, CONSTANT_DOUBLE: 8, CONSTANT_FIELDREF: 4, CONSTANT_FLOAT: 4, CONSTANT_INTEGER: 4,
+    CONSTANT_INTERFACE_METHODREF: 4, CONSTANT_INVOKE_DYNAMIC: 4, CONSTANT_LONG: 8, CONSTANT_METHOD_HANDLE: 3,
+    CONSTANT_METHOD_TYPE: 2, CONSTANT_METHODREF: 4, CONSTANT_NAME_AND_TYPE: 4, CONSTANT_STRING: 2}
+
+_CONSTANT_NAMES = {
+    CONSTANT_CLASS: 'class', CONSTANT_DOUBLE: 'double', CONSTANT_FIELDREF: 'fieldref', CONSTANT_FLOAT: 'float',
+    CONSTANT_INTEGER: 'integer', CONSTANT_INTERFACE_METHODREF: 'interface methodref',
+    CONSTANT_INVOKE_DYNAMIC: 'invoke dynamic', CONSTANT_LONG: 'long', CONSTANT_METHOD_HANDLE: 'method handle',
+    CONSTANT_METHOD_TYPE: 'method type', CONSTANT_METHODREF: 'methodref', CONSTANT_NAME_AND_TYPE: 'name and type',
+    CONSTANT_STRING: 'string', CONSTANT_UTF8: 'utf8'}
+
+
+_REF_TAGS = (CONSTANT_FIELDREF, CONSTANT_METHODREF, CONSTANT_INTERFACE_METHODREF)
+
+
+def _indexes_view(*tags):
+    def indexes(self):
+        return self.indexes_of(*tags)
+    return property(indexes)
 
 
 class ConstantPool(BaseEntry):
-    def __init__(self, f):
+    """Constant pool of a class file.
+
+    In lazy mode the pool is only scanned: tags and offsets are recorded and each entry is read and initialized the
+    first time it is accessed. The reader must stay usable and seekable while the pool is in use.
+
+    `validation` is the level entries are checked at, see javadec.VALIDATION_LEVELS.
+
+    The tag of every index is kept in a table, so typed lookups are constant time. The per kind index lists are
+    derived from it.
+    """
+    __slots__ = ('constant_pool_count', 'constant_pool', 'lazy', 'validation', '_f', '_tags', '_offsets', '_indexes')
+    class_indexes = _indexes_view(CONSTANT_CLASS)
+    invoke_dynamic_indexes = _indexes_view(CONSTANT_INVOKE_DYNAMIC)
+    method_handle_indexes = _indexes_view(CONSTANT_METHOD_HANDLE)
+    method_type_indexes = _indexes_view(CONSTANT_METHOD_TYPE)
+    name_and_type_indexes = _indexes_view(CONSTANT_NAME_AND_TYPE)
+    numeric_indexes = _indexes_view(CONSTANT_INTEGER, CONSTANT_FLOAT, CONSTANT_LONG, CONSTANT_DOUBLE)
+    ref_indexes = _indexes_view(*_REF_TAGS)
+    utf8_indexes = _indexes_view(CONSTANT_UTF8)
+    string_indexes = _indexes_view(CONSTANT_STRING)
+
+    def __init__(self, f, lazy=False, validation='full'):
         super().__init__(f)
         self.constant_pool_count = f.read_u2()
         self.constant_pool = []
-        self.class_indexes = []
-        self.invoke_dynamic_indexes = []
-        self.method_handle_indexes = []
-        self.method_type_indexes = []
-        self.name_and_type_indexes = []
-        self.numeric_indexes = []
-        self.ref_indexes = []
-        self.utf8_indexes = []
-        self.string_indexes = []
+        self.lazy = lazy
+        self.validation = validation
+        self._f = f if lazy else None
+        self._tags = bytearray()
+        self._offsets = array('L')
+        self._indexes = {}
         index = 1
         while index < self.constant_pool_count:
+            offset = f.tell()
             tag = f.read_u1()
-            if tag == CONSTANT_CLASS:
-                self.constant_pool.append(ConstantClassInfo(f))
-                self.class_indexes.append(index)
-            elif tag == CONSTANT_FIELDREF:
-                self.constant_pool.append(ConstantFieldrefInfo(f))
-                self.ref_indexes.append(index)
-            elif tag == CONSTANT_METHODREF:
-                self.constant_pool.append(ConstantMethodrefInfo(f))
-                self.ref_indexes.append(index)
-            elif tag == CONSTANT_INTERFACE_METHODREF:
-                self.constant_pool.append(ConstantInterfaceMethodrefInfo(f))
-                self.ref_indexes.append(index)
-            elif tag == CONSTANT_STRING:
-                self.constant_pool.append(ConstantStringInfo(f))
-                self.string_indexes.append(index)
-            elif tag == CONSTANT_INTEGER:
-                self.constant_pool.append(ConstantIntegerInfo(f))
-                self.numeric_indexes.append(index)
-            elif tag == CONSTANT_FLOAT:
-                self.constant_pool.append(ConstantFloatInfo(f))
-                self.numeric_indexes.append(index)
-            elif tag == CONSTANT_LONG:
-                self.constant_pool.append(ConstantLongInfo(f))
-                self.constant_pool.append(ConstantUnusable(tag, f))
-                self.numeric_indexes.append(index)
-            elif tag == CONSTANT_DOUBLE:
-                self.constant_pool.append(ConstantDoubleInfo(f))
-                self.constant_pool.append(ConstantUnusable(tag, f))
-                self.numeric_indexes.append(index)
-            elif tag == CONSTANT_NAME_AND_TYPE:
-                self.constant_pool.append(ConstantNameAndTypeInfo(f))
-                self.name_and_type_indexes.append(index)
-            elif tag == CONSTANT_UTF8:
-                self.constant_pool.append(ConstantUtf8_Info(f))
-                self.utf8_indexes.append(index)
-            elif tag == CONSTANT_METHOD_HANDLE:
-                self.constant_pool.append(ConstantMethodHandleInfo(f))
-                self.method_handle_indexes.append(index)
-            elif tag == CONSTANT_METHOD_TYPE:
-                self.constant_pool.append(ConstantMethodTypeInfo(f))
-                self.method_type_indexes.append(index)
-            elif tag == CONSTANT_INVOKE_DYNAMIC:
-                self.constant_pool.append(ConstantInvokeDynamicInfo(f))
-                self.invoke_dynamic_indexes.append(index)
+            if tag not in _CONSTANT_TYPES:
+                self.append_error('invalid constant pool tag {}'.format(tag), offset)
+                continue
+            if lazy:
+                self.constant_pool.append(None)
+                if tag == CONSTANT_UTF8:
+                    f.seek(f.read_u2(), SEEK_CUR)
+                else:
+                    f.seek(_CONSTANT_SIZES[tag], SEEK_CUR)
             else:
-                self.append_error('invalid constant pool tag {}'.format(tag), f.tell() - 1)
+                self.constant_pool.append(_CONSTANT_TYPES[tag](f))
+            self._tags.append(tag)
+            self._offsets.append(offset)
+            if tag == CONSTANT_LONG or tag == CONSTANT_DOUBLE:
+                self.constant_pool.append(None if lazy else ConstantUnusable(tag, f))
+                self._tags.append(CONSTANT_UNUSABLE)
+                self._offsets.append(f.tell() - 1)
             index = len(self.constant_pool) + 1
-        self._init_indexes(self.numeric_indexes)
-        self._init_indexes(self.utf8_indexes)
-        self._init_indexes(self.class_indexes)
-        self._init_indexes(self.method_type_indexes)
-        self._init_indexes(self.name_and_type_indexes)
-        self._init_indexes(self.ref_indexes)
-        self._init_indexes(self.string_indexes)
-        self._init_indexes(self.invoke_dynamic_indexes)
-        self._init_indexes(self.method_handle_indexes)
+        stats = instrumentation.current
+        if stats is not None:
+            for tag, count in Counter(self._tags).items():
+                if tag != CONSTANT_UNUSABLE:
+                    stats.counters['constant_pool.' + _CONSTANT_NAMES[tag].replace(' ', '_')] += count
+        if not lazy:
+            self._init_indexes(self.numeric_indexes)
+            self._init_indexes(self.utf8_indexes)
+            self._init_indexes(self.class_indexes)
+            self._init_indexes(self.method_type_indexes)
+            self._init_indexes(self.name_and_type_indexes)
+            self._init_indexes(self.ref_indexes)
+            self._init_indexes(self.string_indexes)
+            self._init_indexes(self.invoke_dynamic_indexes)
+            self._init_indexes(self.method_handle_indexes)
 
     def __len__(self):
         return self.constant_pool_count - 1
@@ -283,17 +547,65 @@ class ConstantPool(BaseEntry):
     def at(self, index):
         if index < 1 or index >= self.constant_pool_count:
             raise IndexError()
-        return self.constant_pool[index - 1]
+        entry = self.constant_pool[index - 1]
+        if entry is None:
+            entry = self._load(index)
+        return entry
+
+    def tag(self, index):
+        if index < 1 or index > len(self._tags):
+            raise IndexError()
+        return self._tags[index - 1]
+
+    def indexes_of(self, *tags):
+        if tags not in self._indexes:
+            self._indexes[tags] = array('H', [index + 1 for index, tag in enumerate(self._tags) if tag in tags])
+        return self._indexes[tags]
+
+    def get_entry(self, index, tag):
+        if index < 1 or index > len(self._tags) or self._tags[index - 1] != tag:
+            raise ValueError('index {} not refers a constant {} entry'.format(index, _CONSTANT_NAMES[tag]))
+        return self.at(index)
 
     def get_class_name(self, index):
-        if index not in self.class_indexes:
-            return ValueError('index {} not refers a constant class entry'.format(index))
-        return self.at(index).name()
+        return self.get_entry(index, CONSTANT_CLASS).name()
 
     def get_utf8(self, index):
-        if index not in self.utf8_indexes:
-            raise ValueError('index {} not refers a constant utf8 entry'.format(index))
-        return self.at(index).value()
+        return self.get_entry(index, CONSTANT_UTF8).value()
+
+    def get_ref(self, index):
+        """Return the MemberRef of the Fieldref, Methodref or InterfaceMethodref entry at `index`."""
+        if index < 1 or index > len(self._tags) or self._tags[index - 1] not in _REF_TAGS:
+            raise ValueError('index {} not refers a constant field or method ref entry'.format(index))
+        return self.at(index).ref()
+
+    def refs(self):
+        """Yield (index, MemberRef) for the valid field and method refs of the pool."""
+        for index in self.ref_indexes:
+            ref = self.at(index).ref()
+            if ref is not None:
+                yield index, ref
+
+    def release(self):
+        """Drop the raw bytes of the UTF-8 entries read so far; their values are kept."""
+        for index in self.utf8_indexes:
+            entry = self.constant_pool[index - 1]
+            if entry is not None:
+                entry.release()
+
+    def _load(self, index):
+        tag = self._tags[index - 1]
+        pos = self._f.tell()
+        self._f.seek(self._offsets[index - 1] + 1, SEEK_SET)
+        if tag == CONSTANT_UNUSABLE:
+            entry = ConstantUnusable(self._tags[index - 2], self._f)
+        else:
+            entry = _CONSTANT_TYPES[tag](self._f)
+        self._f.seek(pos, SEEK_SET)
+        self.constant_pool[index - 1] = entry
+        if not entry.init(self):
+            self.add_errors(entry.errors)
+        return entry
 
     def _init_indexes(self, indexes):
         for index in indexes:
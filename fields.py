@@ -3,6 +3,7 @@
 from access_flags import FieldAccessFlags, InvalidFlags
 from attributes import AttributesInfo
 from common import *
+from generic_signatures import InvalidSignature, parse_field_signature
 from signatures import check_unqualified_name, check_field_descriptor
 
 __author__ = 'Gonzalo Matamala'
@@ -11,6 +12,9 @@ __version__ = '0.1.0'
 
 
 class FieldInfo(BaseEntry):
+    __slots__ = ('access_flags', 'name_index', 'descriptor_index', 'attributes', '_name', '_descriptor',
+                 '_generic_signature')
+
     def __init__(self, f):
         super().__init__(f)
         self.access_flags = FieldAccessFlags(f)
@@ -19,31 +23,64 @@ class FieldInfo(BaseEntry):
         self.attributes = AttributesInfo(f)
         self._name = None
         self._descriptor = None
+        self._generic_signature = None
 
-    def init(self, constant_pool):
-        try:
-            self.access_flags.init()
-        except InvalidFlags as e:
-            self.append_error('{}: 0x{:4x}'.format(e.message, e.flags), self.pos)
+    def init(self, constant_pool, is_interface):
+        full = constant_pool.validation == 'full'
+        if full:
+            try:
+                self.access_flags.init(is_interface)
+            except InvalidFlags as e:
+                self.append_error('{}: 0x{:4x}'.format(e.message, e.flags), self.pos)
         try:
             self._name = constant_pool.get_utf8(self.name_index)
-            if not check_unqualified_name(self._name):
+            if full and not check_unqualified_name(self._name):
                 self.append_error('invalid field\'s unqualified name {}'.format(self._name), self.pos + 2)
         except ValueError as e:
             self.append_error(str(e), self.pos + 2)
         try:
             self._descriptor = constant_pool.get_utf8(self.descriptor_index)
-            if not check_field_descriptor(self._descriptor):
+            if full and not check_field_descriptor(self._descriptor):
                 self.append_error('invalid field descriptor {}'.format(self._descriptor), self.pos + 4)
         except ValueError as e:
             self.append_error(str(e), self.pos + 4)
         if not self.attributes.init(constant_pool):
             self.add_errors(self.attributes.errors)
+        signature = self.attributes.get_signature()
+        if signature:
+            try:
+                self._generic_signature = parse_field_signature(signature)
+            except InvalidSignature as e:
+                self.append_error(str(e), self.pos)
+        return not self.errors
+
+    def name(self):
+        return self._name
+
+    def release(self):
+        self.attributes.release()
+
+    def descriptor(self):
+        return self._descriptor
+
+    def generic_signature(self):
+        return self._generic_signature
 
     def get_constant_value(self):
-        pass
+        constant_value = self.attributes.get('ConstantValue')
+        if constant_value is not None:
+            return constant_value.value()
+        return None
 
 
 class FieldsInfo(ListEntry):
+    __slots__ = ()
+
     def __init__(self, f):
         super().__init__(FieldInfo, f)
+
+    def init(self, constant_pool, is_interface):
+        for field in self.entries:
+            if not field.init(constant_pool, is_interface):
+                self.add_errors(field.errors)
+        return not self.errors
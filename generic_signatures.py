@@ -0,0 +1,297 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+from collections import namedtuple
+from functools import lru_cache
+
+from signatures import DESCRIPTOR_CACHE_SIZE, DescriptorCacheInfo, name_from_binary_name
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+# Parser and type trees for the generic signatures of JVMS 4.7.9.1. Trees are immutable and parsed signatures are
+# cached, so every occurrence of the same signature string shares the same tree.
+
+_BASE_TYPE = {
+    'B': 'byte', 'C': 'char', 'D': 'double', 'F': 'float', 'I': 'int', 'J': 'long', 'S': 'short', 'Z': 'boolean'}
+
+_IDENTIFIER_END = frozenset('.;[/<>:')
+
+_OBJECT_CLASS_NAME = 'java/lang/Object'
+
+
+class InvalidSignature(Exception):
+    def __init__(self, message, signature):
+        super().__init__('{}: {}'.format(message, signature))
+        self.message = message
+        self.signature = signature
+
+
+class BaseType(namedtuple('BaseType', ['descriptor'])):
+    __slots__ = ()
+
+    def name(self):
+        return _BASE_TYPE.get(self.descriptor, 'void')
+
+
+class TypeVariable(namedtuple('TypeVariable', ['identifier'])):
+    __slots__ = ()
+
+    def name(self):
+        return self.identifier
+
+
+class ArrayType(namedtuple('ArrayType', ['component_type'])):
+    __slots__ = ()
+
+    def name(self):
+        return self.component_type.name() + '[]'
+
+
+class ClassType(namedtuple('ClassType', ['class_name', 'type_arguments', 'outer'])):
+    """Class type; `class_name` is the binary name for top level classes and the simple name for inner classes."""
+    __slots__ = ()
+
+    def binary_name(self):
+        if self.outer is None:
+            return self.class_name
+        return self.outer.binary_name() + '$' + self.class_name
+
+    def name(self):
+        if self.outer is None:
+            name = name_from_binary_name(self.class_name)
+        else:
+            name = self.outer.name() + '.' + self.class_name
+        if self.type_arguments:
+            name += '<' + ', '.join(argument.name() for argument in self.type_arguments) + '>'
+        return name
+
+
+class TypeArgument(namedtuple('TypeArgument', ['wildcard', 'type'])):
+    """Type argument; `wildcard` is '' for exact types, '+' (extends), '-' (super) or '*' (unbounded)."""
+    __slots__ = ()
+
+    def name(self):
+        if self.wildcard == '*':
+            return '?'
+        if self.wildcard == '+':
+            return '? extends ' + self.type.name()
+        if self.wildcard == '-':
+            return '? super ' + self.type.name()
+        return self.type.name()
+
+
+class TypeParameter(namedtuple('TypeParameter', ['identifier', 'class_bound', 'interface_bounds'])):
+    __slots__ = ()
+
+    def name(self):
+        bounds = list(self.interface_bounds)
+        if self.class_bound is not None and not (isinstance(self.class_bound, ClassType) and
+                                                 self.class_bound.class_name == _OBJECT_CLASS_NAME and
+                                                 self.class_bound.outer is None):
+            bounds.insert(0, self.class_bound)
+        if not bounds:
+            return self.identifier
+        return self.identifier + ' extends ' + ' & '.join(bound.name() for bound in bounds)
+
+
+def _type_parameters_name(type_parameters):
+    if not type_parameters:
+        return ''
+    return '<' + ', '.join(parameter.name() for parameter in type_parameters) + '>'
+
+
+class ClassSignature(namedtuple('ClassSignature', ['type_parameters', 'superclass', 'interfaces'])):
+    __slots__ = ()
+
+    def type_parameters_name(self):
+        return _type_parameters_name(self.type_parameters)
+
+
+class MethodSignature(namedtuple('MethodSignature', ['type_parameters', 'parameters', 'result', 'throws'])):
+    __slots__ = ()
+
+    def type_parameters_name(self):
+        return _type_parameters_name(self.type_parameters)
+
+    def parameters_name(self):
+        return '(' + ', '.join(parameter.name() for parameter in self.parameters) + ')'
+
+
+class _SignatureParser:
+    def __init__(self, signature):
+        self.signature = signature
+        self.i = 0
+
+    def error(self, message):
+        raise InvalidSignature('{} at {}'.format(message, self.i), self.signature)
+
+    def peek(self):
+        if self.i < len(self.signature):
+            return self.signature[self.i]
+        return ''
+
+    def expect(self, c):
+        if self.peek() != c:
+            self.error('expected \'{}\''.format(c))
+        self.i += 1
+
+    def end(self):
+        if self.i != len(self.signature):
+            self.error('unexpected characters')
+
+    def identifier(self):
+        start = self.i
+        length = len(self.signature)
+        while self.i < length and self.signature[self.i] not in _IDENTIFIER_END:
+            self.i += 1
+        if self.i == start:
+            self.error('expected identifier')
+        return self.signature[start:self.i]
+
+    def java_type(self):
+        c = self.peek()
+        if c in _BASE_TYPE:
+            self.i += 1
+            return BaseType(c)
+        return self.reference_type()
+
+    def reference_type(self):
+        c = self.peek()
+        if c == 'L':
+            return self.class_type()
+        if c == 'T':
+            return self.type_variable()
+        if c == '[':
+            self.i += 1
+            return ArrayType(self.java_type())
+        self.error('expected reference type')
+
+    def type_variable(self):
+        self.expect('T')
+        identifier = self.identifier()
+        self.expect(';')
+        return TypeVariable(identifier)
+
+    def class_type(self):
+        self.expect('L')
+        name = self.identifier()
+        while self.peek() == '/':
+            self.i += 1
+            name += '/' + self.identifier()
+        class_type = ClassType(name, self.type_arguments(), None)
+        while self.peek() == '.':
+            self.i += 1
+            class_type = ClassType(self.identifier(), self.type_arguments(), class_type)
+        self.expect(';')
+        return class_type
+
+    def type_arguments(self):
+        if self.peek() != '<':
+            return ()
+        self.i += 1
+        arguments = []
+        while self.peek() != '>':
+            c = self.peek()
+            if c == '*':
+                self.i += 1
+                arguments.append(TypeArgument('*', None))
+            elif c == '+' or c == '-':
+                self.i += 1
+                arguments.append(TypeArgument(c, self.reference_type()))
+            else:
+                arguments.append(TypeArgument('', self.reference_type()))
+        if not arguments:
+            self.error('empty type arguments')
+        self.i += 1
+        return tuple(arguments)
+
+    def type_parameters(self):
+        if self.peek() != '<':
+            return ()
+        self.i += 1
+        parameters = []
+        while self.peek() != '>':
+            identifier = self.identifier()
+            self.expect(':')
+            class_bound = None
+            if self.peek() != ':':
+                class_bound = self.reference_type()
+            interface_bounds = []
+            while self.peek() == ':':
+                self.i += 1
+                interface_bounds.append(self.reference_type())
+            parameters.append(TypeParameter(identifier, class_bound, tuple(interface_bounds)))
+        if not parameters:
+            self.error('empty type parameters')
+        self.i += 1
+        return tuple(parameters)
+
+    def class_signature(self):
+        type_parameters = self.type_parameters()
+        superclass = self.class_type()
+        interfaces = []
+        while self.peek() == 'L':
+            interfaces.append(self.class_type())
+        self.end()
+        return ClassSignature(type_parameters, superclass, tuple(interfaces))
+
+    def method_signature(self):
+        type_parameters = self.type_parameters()
+        self.expect('(')
+        parameters = []
+        while self.peek() != ')':
+            if not self.peek():
+                self.error('unterminated parameters')
+            parameters.append(self.java_type())
+        self.i += 1
+        if self.peek() == 'V':
+            self.i += 1
+            result = BaseType('V')
+        else:
+            result = self.java_type()
+        throws = []
+        while self.peek() == '^':
+            self.i += 1
+            if self.peek() == 'T':
+                throws.append(self.type_variable())
+            else:
+                throws.append(self.class_type())
+        self.end()
+        return MethodSignature(type_parameters, tuple(parameters), result, tuple(throws))
+
+    def field_signature(self):
+        field_type = self.reference_type()
+        self.end()
+        return field_type
+
+
+@lru_cache(maxsize=DESCRIPTOR_CACHE_SIZE)
+def parse_class_signature(signature):
+    return _SignatureParser(signature).class_signature()
+
+
+@lru_cache(maxsize=DESCRIPTOR_CACHE_SIZE)
+def parse_method_signature(signature):
+    return _SignatureParser(signature).method_signature()
+
+
+@lru_cache(maxsize=DESCRIPTOR_CACHE_SIZE)
+def parse_field_signature(signature):
+    return _SignatureParser(signature).field_signature()
+
+
+_CACHED_SIGNATURE_FUNCTIONS = (parse_class_signature, parse_method_signature, parse_field_signature)
+
+
+def clear_signature_cache():
+    for function in _CACHED_SIGNATURE_FUNCTIONS:
+        function.cache_clear()
+
+
+def signature_cache_info():
+    infos = [function.cache_info() for function in _CACHED_SIGNATURE_FUNCTIONS]
+    return DescriptorCacheInfo(sum(info.hits for info in infos), sum(info.misses for info in infos),
+                               sum(info.maxsize for info in infos), sum(info.currsize for info in infos))
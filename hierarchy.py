@@ -0,0 +1,253 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+from array import array
+
+from access_flags import ACC_INTERFACE
+from index_format import (InvalidIndex, read_array, read_bytes, read_header, read_strings, write_array, write_bytes,
+                          write_header, write_strings)
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+NO_TYPE = -1
+
+_MAGIC = b'JHIX'
+_FORMAT_VERSION = 2
+
+
+class TypeHierarchy:
+    """Super/subtype relations of the classes on a classpath.
+
+    Type names are interned to integer ids, in order of first appearance; a type only referenced as a super type
+    gets an id too but isn't `defined`. Relations are kept in arrays: `super_ids[t]` is the super class of `t` (or
+    NO_TYPE) and the direct interfaces of `t` are `interface_ids[interface_first[t]:interface_first[t + 1]]`; direct
+    subtypes are kept the same way. The `*_ids` queries work on ids, the others on names. When a class is added more
+    than once the first one wins, like on a classpath. `errors` are the (item name, position, message) tuples of
+    the class files build() skipped, as in batch.ClassResult.
+    """
+    def __init__(self):
+        self.names = []
+        self._ids = {}
+        self.access_flags = array('H')
+        self.defined = bytearray()
+        self.super_ids = array('i')
+        self.interface_first = array('I', [0])
+        self.interface_ids = array('I')
+        self._pending = []
+        self._subtype_first = None
+        self._subtype_ids = None
+        self.errors = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        type_id = self._ids.get(name)
+        return type_id is not None and self.defined[type_id]
+
+    def intern(self, name):
+        type_id = self._ids.get(name)
+        if type_id is None:
+            type_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+            self.access_flags.append(0)
+            self.defined.append(0)
+            self.super_ids.append(NO_TYPE)
+            self._subtype_first = None
+        return type_id
+
+    def id_of(self, name):
+        """Return the id of `name`, or NO_TYPE when it's unknown."""
+        return self._ids.get(name, NO_TYPE)
+
+    def add(self, name, super_name, interfaces, access_flags=0):
+        """Add a class; `super_name` is None for java/lang/Object and module-info."""
+        type_id = self.intern(name)
+        if self.defined[type_id]:
+            return type_id
+        self.defined[type_id] = 1
+        self.access_flags[type_id] = access_flags
+        if super_name is not None:
+            self.super_ids[type_id] = self.intern(super_name)
+        self._pending.append((type_id, [self.intern(interface) for interface in interfaces]))
+        self._subtype_first = None
+        return type_id
+
+    def add_header(self, header):
+        """Add a class from its ClassFile.peek_header() or summary."""
+        access_flags = header.access_flags
+        return self.add(header.name, header.super_name, header.interfaces, getattr(access_flags, 'flags', access_flags))
+
+    @classmethod
+    def build(cls, paths, patterns=None, nested=True):
+        """Index the class files under `paths` (see batch.iter_sources), reading only their headers."""
+        from batch import exception_errors, iter_sources
+        from javadec import READ_ERRORS, ClassFile
+        hierarchy = cls()
+        for name, source in iter_sources(paths, patterns, nested):
+            try:
+                header = ClassFile.peek_header(source)
+            except READ_ERRORS as e:
+                hierarchy.errors += exception_errors(name, e)
+                continue
+            if header.errors:
+                hierarchy.errors += [(name, pos, message) for message, pos in header.errors]
+            elif header.name is not None:
+                hierarchy.add_header(header)
+        return hierarchy
+
+    def is_interface(self, type_id):
+        return bool(self.access_flags[type_id] & ACC_INTERFACE)
+
+    def supertype_ids(self, type_id):
+        """Direct super class and interfaces of `type_id`."""
+        self._freeze()
+        supertypes = [] if self.super_ids[type_id] == NO_TYPE else [self.super_ids[type_id]]
+        return supertypes + self.interface_ids[self.interface_first[type_id]:self.interface_first[type_id + 1]].tolist()
+
+    def direct_subtype_ids(self, type_id):
+        self._freeze()
+        return self._subtype_ids[self._subtype_first[type_id]:self._subtype_first[type_id + 1]].tolist()
+
+    def subtype_ids(self, type_id):
+        """All the subtypes of `type_id`, direct or not, in breadth first order."""
+        self._freeze()
+        subtype_first = self._subtype_first
+        subtype_ids = self._subtype_ids
+        seen = bytearray(len(self.names))
+        seen[type_id] = 1
+        subtypes = [type_id]
+        for current in subtypes:
+            for subtype in subtype_ids[subtype_first[current]:subtype_first[current + 1]]:
+                if not seen[subtype]:
+                    seen[subtype] = 1
+                    subtypes.append(subtype)
+        del subtypes[0]
+        return subtypes
+
+    def implementor_ids(self, type_id):
+        """The classes (not interfaces) that are subtypes of `type_id`."""
+        return [subtype for subtype in self.subtype_ids(type_id) if not self.access_flags[subtype] & ACC_INTERFACE]
+
+    def ancestry_ids(self, type_id):
+        """All the supertypes of `type_id`, depth first: super class first, then interfaces, each visited once."""
+        self._freeze()
+        super_ids = self.super_ids
+        interface_first = self.interface_first
+        interface_ids = self.interface_ids
+        seen = bytearray(len(self.names))
+        seen[type_id] = 1
+        ancestry = []
+        pending = [type_id]
+        while pending:
+            current = pending.pop()
+            if current != type_id:
+                ancestry.append(current)
+            supertypes = interface_ids[interface_first[current]:interface_first[current + 1]].tolist()
+            if super_ids[current] != NO_TYPE:
+                supertypes.insert(0, super_ids[current])
+            for supertype in reversed(supertypes):
+                if not seen[supertype]:
+                    seen[supertype] = 1
+                    pending.append(supertype)
+        return ancestry
+
+    def is_subtype_id(self, type_id, supertype_id):
+        return type_id == supertype_id or supertype_id in self.ancestry_ids(type_id)
+
+    def supertypes(self, name):
+        return self._names(self.supertype_ids, name)
+
+    def direct_subtypes(self, name):
+        return self._names(self.direct_subtype_ids, name)
+
+    def subtypes(self, name):
+        return self._names(self.subtype_ids, name)
+
+    def implementors(self, name):
+        return self._names(self.implementor_ids, name)
+
+    def ancestry(self, name):
+        return self._names(self.ancestry_ids, name)
+
+    def is_subtype(self, name, supertype):
+        type_id = self.id_of(name)
+        supertype_id = self.id_of(supertype)
+        return type_id != NO_TYPE and supertype_id != NO_TYPE and self.is_subtype_id(type_id, supertype_id)
+
+    def save(self, file):
+        """Write the index to a binary file object."""
+        self._freeze()
+        write_header(file, _MAGIC, _FORMAT_VERSION)
+        write_strings(file, self.names)
+        write_array(file, self.access_flags)
+        write_bytes(file, self.defined)
+        write_array(file, self.super_ids)
+        write_array(file, self.interface_first)
+        write_array(file, self.interface_ids)
+
+    @classmethod
+    def load(cls, file):
+        """Read an index written by save() from a binary file object."""
+        read_header(file, _MAGIC, _FORMAT_VERSION, 'type hierarchy')
+        hierarchy = cls()
+        hierarchy.names = read_strings(file)
+        hierarchy._ids = {name: type_id for type_id, name in enumerate(hierarchy.names)}
+        hierarchy.access_flags = read_array(file, 'H')
+        hierarchy.defined = bytearray(read_bytes(file))
+        hierarchy.super_ids = read_array(file, 'i')
+        hierarchy.interface_first = read_array(file, 'I')
+        hierarchy.interface_ids = read_array(file, 'I')
+        count = len(hierarchy.names)
+        if (len(hierarchy.access_flags) != count or len(hierarchy.defined) != count or
+                len(hierarchy.super_ids) != count or len(hierarchy.interface_first) != count + 1):
+            raise InvalidIndex('inconsistent type hierarchy index')
+        return hierarchy
+
+    def _names(self, query, name):
+        type_id = self.id_of(name)
+        if type_id == NO_TYPE:
+            return []
+        return [self.names[result] for result in query(type_id)]
+
+    def _freeze(self):
+        if self._pending:
+            # Merge the classes added since the last query into the interface adjacency arrays.
+            interfaces = {type_id: self.interface_ids[self.interface_first[type_id]:self.interface_first[type_id + 1]]
+                          for type_id in range(len(self.interface_first) - 1)}
+            interfaces.update(self._pending)
+            self._pending = []
+            self.interface_first = array('I', [0])
+            self.interface_ids = array('I')
+            for type_id in range(len(self.names)):
+                self.interface_ids.extend(interfaces.get(type_id, ()))
+                self.interface_first.append(len(self.interface_ids))
+        elif len(self.interface_first) <= len(self.names):
+            self.interface_first.extend([len(self.interface_ids)] * (len(self.names) + 1 - len(self.interface_first)))
+        if self._subtype_first is None:
+            self._build_subtypes()
+
+    def _build_subtypes(self):
+        count = len(self.names)
+        counts = array('I', bytes(4 * (count + 1)))
+        for type_id in range(count):
+            if self.super_ids[type_id] != NO_TYPE:
+                counts[self.super_ids[type_id] + 1] += 1
+        for interface in self.interface_ids:
+            counts[interface + 1] += 1
+        for type_id in range(count):
+            counts[type_id + 1] += counts[type_id]
+        self._subtype_first = array('I', counts)
+        self._subtype_ids = array('I', bytes(4 * counts[count]))
+        next_free = array('I', counts)
+        for type_id in range(count):
+            supertypes = self.interface_ids[self.interface_first[type_id]:self.interface_first[type_id + 1]].tolist()
+            if self.super_ids[type_id] != NO_TYPE:
+                supertypes.append(self.super_ids[type_id])
+            for supertype in supertypes:
+                self._subtype_ids[next_free[supertype]] = type_id
+                next_free[supertype] += 1
+
@@ -0,0 +1,83 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import struct
+import sys
+from array import array
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+# Index files start with a 4 bytes magic and a format version; everything is little endian.
+_HEADER = struct.Struct('<4sH')
+_COUNT = struct.Struct('<I')
+
+
+class InvalidIndex(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def write_header(file, magic, version):
+    file.write(_HEADER.pack(magic, version))
+
+
+def read_header(file, magic, version, kind):
+    file_magic, file_version = _HEADER.unpack(read_exactly(file, _HEADER.size))
+    if file_magic != magic:
+        raise InvalidIndex('not a {} index'.format(kind))
+    if file_version != version:
+        raise InvalidIndex('unsupported {} index version {}'.format(kind, file_version))
+
+
+def write_array(file, values):
+    """Write a length prefixed array."""
+    file.write(_COUNT.pack(len(values)))
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    file.write(values.tobytes())
+
+
+def read_array(file, typecode):
+    values = array(typecode)
+    values.frombytes(read_exactly(file, _COUNT.unpack(read_exactly(file, _COUNT.size))[0] * values.itemsize))
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def write_bytes(file, data):
+    file.write(_COUNT.pack(len(data)))
+    file.write(data)
+
+
+def read_bytes(file):
+    return read_exactly(file, _COUNT.unpack(read_exactly(file, _COUNT.size))[0])
+
+
+def write_strings(file, strings):
+    strings = [string.encode('utf-8', 'surrogatepass') for string in strings]
+    write_array(file, array('I', map(len, strings)))
+    file.write(b''.join(strings))
+
+
+def read_strings(file):
+    lengths = read_array(file, 'I')
+    data = read_exactly(file, sum(lengths))
+    strings = []
+    pos = 0
+    for length in lengths:
+        strings.append(data[pos:pos + length].decode('utf-8', 'surrogatepass'))
+        pos += length
+    return strings
+
+
+def read_exactly(file, size):
+    data = file.read(size)
+    if len(data) != size:
+        raise InvalidIndex('truncated index')
+    return data
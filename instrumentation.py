@@ -0,0 +1,103 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import heapq
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+# Stats being collected, or None. Instrumented code checks it once per call and does nothing more when it's None.
+current = None
+
+SLOWEST_CLASSES = 20
+
+
+class Stats:
+    """Counters and phase timers (in seconds) collected while parsing, plus the slowest classes of a batch."""
+    def __init__(self):
+        self.counters = Counter()
+        self.timers = Counter()
+        self.slowest = []
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def add_time(self, name, seconds):
+        self.timers[name] += seconds
+
+    def add_class_time(self, name, seconds):
+        entry = (seconds, name)
+        if len(self.slowest) < SLOWEST_CLASSES:
+            heapq.heappush(self.slowest, entry)
+        elif entry > self.slowest[0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def merge(self, stats):
+        """Add the counts and times of `stats`, a Stats or its as_dict()."""
+        if isinstance(stats, Stats):
+            stats = stats.as_dict()
+        self.counters.update(stats['counters'])
+        self.timers.update(stats['timers'])
+        for name, seconds in stats['slowest']:
+            self.add_class_time(name, seconds)
+
+    def as_dict(self):
+        return {'counters': dict(self.counters), 'timers': dict(self.timers),
+                'slowest': [(name, seconds) for seconds, name in sorted(self.slowest, reverse=True)]}
+
+    def report(self):
+        lines = ['counters:']
+        lines += ['  {:<40} {:>14}'.format(name, count) for name, count in sorted(self.counters.items())]
+        lines.append('timers (s):')
+        lines += ['  {:<40} {:>14.6f}'.format(name, seconds) for name, seconds in sorted(self.timers.items())]
+        if self.slowest:
+            lines.append('slowest classes (s):')
+            lines += ['  {:>10.6f}  {}'.format(seconds, name) for seconds, name in sorted(self.slowest, reverse=True)]
+        return '\n'.join(lines)
+
+
+@contextmanager
+def collect(stats=None):
+    """Collect parsing stats in `stats` (a new Stats by default) within the block; yields the Stats.
+
+    Descriptor and signature cache hits are taken from the caches' statistics when the block ends.
+    """
+    from generic_signatures import signature_cache_info
+    from signatures import descriptor_cache_info
+    global current
+    stats = stats if stats is not None else Stats()
+    previous = current
+    descriptor_info = descriptor_cache_info()
+    signature_info = signature_cache_info()
+    current = stats
+    try:
+        yield stats
+    finally:
+        current = previous
+        for prefix, before, after in (('descriptor_cache', descriptor_info, descriptor_cache_info()),
+                                      ('signature_cache', signature_info, signature_cache_info())):
+            stats.count(prefix + '.hits', after.hits - before.hits)
+            stats.count(prefix + '.misses', after.misses - before.misses)
+
+
+class timer:
+    """Add the time spent in the block to the `name` timer of the current stats, if any."""
+    __slots__ = ('name', 'stats', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.stats = current
+
+    def __enter__(self):
+        if self.stats is not None:
+            self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.stats is not None:
+            self.stats.add_time(self.name, perf_counter() - self.start)
@@ -15,7 +15,7 @@ class InterfacesInfo(BaseEntry):
         self.interfaces_count = f.read_u2()
         self.interfaces = []
         for i in range(self.interfaces_count):
-            self.interfaces.append(f.read_u2)
+            self.interfaces.append(f.read_u2())
         self._names = []
 
     def init(self, constant_pool):
@@ -28,5 +28,8 @@ class InterfacesInfo(BaseEntry):
             self._names.append(name)
         return not self.errors
 
+    def names(self):
+        return self._names
+
     def signature(self):
         return ', '.join(self._names)
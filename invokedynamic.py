@@ -0,0 +1,100 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+from collections import namedtuple
+
+from bytecode import INVOKEDYNAMIC
+from constant_pool import CONSTANT_INVOKE_DYNAMIC, CONSTANT_STRING, ConstantMethodHandleInfo
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+CALL_SITE_OTHER = 0
+CALL_SITE_LAMBDA = 1
+CALL_SITE_STRING_CONCAT = 2
+
+_LAMBDA_METAFACTORY = 'java.lang.invoke.LambdaMetafactory'
+_STRING_CONCAT_FACTORY = 'java.lang.invoke.StringConcatFactory'
+
+# A resolved invokedynamic constant. `bootstrap` is the bootstrap MethodHandle and `arguments` its static arguments'
+# constant pool entries; `name` and `descriptor` are the call site's. `target` is the implementation MethodHandle
+# for lambdas and method references, the recipe for string concatenations (None for makeConcat, which has none)
+# and None otherwise.
+CallSite = namedtuple('CallSite', ['index', 'bootstrap', 'arguments', 'name', 'descriptor', 'kind', 'target'])
+
+
+class CallSiteResolver:
+    """Resolves the invokedynamic constants of a class against its BootstrapMethods attribute.
+
+    Each constant is resolved once and the CallSite kept, as many call sites usually share few bootstrap methods.
+    """
+    def __init__(self, class_file):
+        self.constant_pool = class_file.constant_pool
+        self.this_class = class_file.this_class
+        bootstrap_methods = self.this_class.attributes.get('BootstrapMethods')
+        self.bootstrap_methods = bootstrap_methods.bootstrap_methods if bootstrap_methods is not None else []
+        self._call_sites = {}
+
+    def call_site(self, index):
+        """Return the CallSite of the invokedynamic constant at `index`; ValueError if it can't be resolved."""
+        call_site = self._call_sites.get(index)
+        if call_site is None:
+            call_site = self._call_sites[index] = self._resolve(index)
+        return call_site
+
+    def call_sites(self):
+        """Yield the CallSites of every invokedynamic constant of the class, skipping invalid ones."""
+        for index in self.constant_pool.invoke_dynamic_indexes:
+            try:
+                yield self.call_site(index)
+            except ValueError:
+                continue
+
+    def method_call_sites(self, method):
+        """Yield (offset, CallSite) for the invokedynamic instructions of `method`'s code.
+
+        Instructions whose call site can't be resolved are skipped, as in call_sites().
+        """
+        code_attribute = method.attributes.get_code()
+        if code_attribute is None:
+            return
+        code = code_attribute.compact_code()
+        for i, opcode in enumerate(code.opcodes):
+            if opcode == INVOKEDYNAMIC:
+                try:
+                    call_site = self.call_site(code.operands[i])
+                except ValueError:
+                    continue
+                yield code.offsets[i], call_site
+
+    def lambda_edges(self):
+        """Yield (method, offset, MemberRef) from each method to the lambda bodies and method references it binds."""
+        for method in self.this_class.methods.entries:
+            for offset, call_site in self.method_call_sites(method):
+                if call_site.kind == CALL_SITE_LAMBDA and call_site.target is not None:
+                    yield method, offset, call_site.target.ref
+
+    def _resolve(self, index):
+        entry = self.constant_pool.get_entry(index, CONSTANT_INVOKE_DYNAMIC)
+        if entry.errors:
+            raise ValueError(entry.errors[0][0])
+        if entry.bootstrap_method_attr_index >= len(self.bootstrap_methods):
+            raise ValueError('invalid bootstrap method index {}'.format(entry.bootstrap_method_attr_index))
+        bootstrap_method = self.bootstrap_methods[entry.bootstrap_method_attr_index]
+        if bootstrap_method.handle is None or bootstrap_method.arguments is None:
+            raise ValueError('invalid bootstrap method {}'.format(entry.bootstrap_method_attr_index))
+        bootstrap = bootstrap_method.handle
+        arguments = bootstrap_method.arguments
+        kind = CALL_SITE_OTHER
+        target = None
+        if bootstrap.ref.owner == _LAMBDA_METAFACTORY and bootstrap.ref.name in ('metafactory', 'altMetafactory'):
+            kind = CALL_SITE_LAMBDA
+            if len(arguments) >= 2 and isinstance(arguments[1], ConstantMethodHandleInfo):
+                target = arguments[1].handle()
+        elif bootstrap.ref.owner == _STRING_CONCAT_FACTORY:
+            kind = CALL_SITE_STRING_CONCAT
+            if bootstrap.ref.name == 'makeConcatWithConstants' and arguments and arguments[0].tag == CONSTANT_STRING:
+                target = arguments[0].value()
+        return CallSite(index, bootstrap, arguments, entry.name(), entry.descriptor(), kind, target)
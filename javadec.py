@@ -2,10 +2,18 @@
 #  -*- coding:utf-8 -*-
 
 import argparse
-
+import struct
+import sys
+from collections import namedtuple
+from contextlib import nullcontext
 
 from common import *
+from access_flags import ClassAccessFlags
+from archives import is_archive, iter_class_entries
 from constant_pool import ConstantPool
+from instrumentation import collect, timer
+from interfaces import InterfacesInfo
+from invokedynamic import CallSiteResolver
 from this_class import ThisClassInfo
 
 __author__ = 'Gonzalo Matamala'
@@ -15,7 +23,7 @@ __version__ = '0.1.0'
 
 class ClassFileError(Exception):
     def __init__(self, message='invalid class format'):
-        super().__init__(message=message)
+        super().__init__(message)
 
 
 class InvalidClassFileVersion(ClassFileError):
@@ -25,25 +33,108 @@ class InvalidClassFileVersion(ClassFileError):
         super().__init__('invalid versions {}.{}'.format(major_version, minor_version))
 
 
+# What reading an unreadable or invalid class file may raise.
+READ_ERRORS = (OSError, ClassFileError, ValueError, struct.error)
+
+PROFILES = ('full', 'signatures')
+
+# 'full' checks everything. 'structural' only checks what reading the file relies on (versions, constant pool tags
+# and references, attribute lengths) and skips the name and descriptor grammars, the access flags consistency and
+# the byte level UTF-8 checks. 'none' trusts the input further and doesn't check the magic value, the versions or
+# whether method handle kinds match their references.
+VALIDATION_LEVELS = ('none', 'structural', 'full')
+
+ClassHeader = namedtuple('ClassHeader', ['magic', 'minor_version', 'major_version', 'access_flags', 'name',
+                                         'super_name', 'interfaces', 'errors'])
+
+
 class ClassFile:
-    def __init__(self, class_file, ignore_invalid_format=False):
+    """Parsed class file.
+
+    With the 'signatures' profile attributes' content is skipped while reading and only read when an attribute is
+    asked for, which leaves method bodies alone for signature-only scans. `lazy` makes the constant pool lazy too.
+    Lazily read parts need `class_file` to stay open. `release` drops the raw bytes of what was decoded while
+    parsing, see release(). `validation` is one of VALIDATION_LEVELS; lower levels skip checks instead of
+    discarding their results, so they save time on trusted input.
+    """
+    def __init__(self, class_file, ignore_invalid_format=False, lazy=False, profile='full', release=False,
+                 validation='full'):
+        if profile not in PROFILES:
+            raise ValueError('invalid profile {}'.format(profile))
+        if validation not in VALIDATION_LEVELS:
+            raise ValueError('invalid validation level {}'.format(validation))
         self.errors = []
 
-        if isinstance(class_file, JavaFile):
-            self._f = class_file
-        else:
-            self._f = JavaFile(class_file)
-        self.magic = self._f.read_u4()
-        if self.magic != 0xcafebabe:
-            self._append_error('invalid magic value 0x{:8X}'.format(self.magic))
-        self.minor_version = self._f.read_u2()
-        self.major_version = self._f.read_u2()
-        if self.major_version < 45:
-            self._append_error('invalid version {}.{}'.format(self.major_version, self.minor_version))
-        self.constant_pool = ConstantPool(self._f)
-        self.this_class = ThisClassInfo(self._f)
-        if not self.this_class.init(self.constant_pool):
-            self._add_errors(self.this_class.errors)
+        with timer('class_file.header'):
+            self._f = open_reader(class_file)
+            self._f.skip_attributes = profile == 'signatures'
+            self.magic = self._f.read_u4()
+            if validation != 'none' and self.magic != 0xcafebabe:
+                self._append_error('invalid magic value 0x{:8X}'.format(self.magic))
+            self.minor_version = self._f.read_u2()
+            self.major_version = self._f.read_u2()
+            if validation != 'none' and self.major_version < 45:
+                self._append_error('invalid version {}.{}'.format(self.major_version, self.minor_version))
+        with timer('class_file.constant_pool'):
+            self.constant_pool = ConstantPool(self._f, lazy, validation)
+        with timer('class_file.this_class_read'):
+            self.this_class = ThisClassInfo(self._f)
+        with timer('class_file.this_class_init'):
+            if not self.this_class.init(self.constant_pool):
+                self._add_errors(self.this_class.errors)
+        self._call_site_resolver = None
+        if release:
+            self.release()
+
+    def release(self):
+        """Drop the raw bytes of decoded UTF-8 constants and attributes to save memory.
+
+        Values decoded so far are kept; attributes decoded later are still read from the class file.
+        """
+        self.constant_pool.release()
+        self.this_class.release()
+
+    def call_sites(self):
+        """Return the class' CallSiteResolver, which caches its resolved invokedynamic call sites."""
+        if self._call_site_resolver is None:
+            self._call_site_resolver = CallSiteResolver(self)
+        return self._call_site_resolver
+
+    @staticmethod
+    def peek_header(class_file):
+        """Read just the class' name, super class and interfaces.
+
+        The constant pool is only scanned and reading stops before fields; just the entries those names refer to are
+        decoded.
+        """
+        errors = []
+        f = open_reader(class_file)
+        magic = f.read_u4()
+        if magic != 0xcafebabe:
+            errors.append(('invalid magic value 0x{:8X}'.format(magic), f.tell_prev()))
+        minor_version = f.read_u2()
+        major_version = f.read_u2()
+        constant_pool = ConstantPool(f, lazy=True)
+        access_flags = ClassAccessFlags(f)
+        pos = f.tell()
+        this_class = f.read_u2()
+        super_class = f.read_u2()
+        interfaces = InterfacesInfo(f)
+        name = super_name = None
+        try:
+            name = constant_pool.get_class_name(this_class)
+        except ValueError as e:
+            errors.append((str(e), pos))
+        if super_class > 0:
+            try:
+                super_name = constant_pool.get_class_name(super_class)
+            except ValueError as e:
+                errors.append((str(e), pos + 2))
+        if not interfaces.init(constant_pool):
+            errors += interfaces.errors
+        errors += constant_pool.errors
+        return ClassHeader(magic, minor_version, major_version, access_flags, name, super_name,
+                           tuple(interfaces.names()), errors)
 
     def _append_error(self, message):
         self.errors.append((message, self._f.tell_prev()))
@@ -62,16 +153,66 @@ def list_this(class_file):
     print(class_file.signature_of('this'))
 
 
+def print_class_file(class_file, args, name=None):
+    if args.check:
+        for message, pos in class_file.errors:
+            if name:
+                print('{}:{}: {}'.format(name, pos, message))
+            else:
+                print('{}: {}'.format(pos, message))
+    if args.signature:
+        print(class_file.this_class.signature())
+
+
+def print_batch(args):
+    import batch
+    for result in batch.parse_batch(args.class_file, workers=args.jobs, patterns=args.include, nested=args.nested,
+                                    cache=args.cache, profile='full' if args.check else 'signatures',
+                                    validation=args.validation):
+        if args.check:
+            for name, pos, message in result.errors:
+                print('{}:{}: {}'.format(name, pos, message))
+        if args.signature and result.summary is not None:
+            print('// ' + result.name)
+            print(result.summary.signature)
+
+
+def print_class_files(args):
+    profile = 'full' if args.check else 'signatures'
+    for path in args.class_file:
+        with open(path, 'rb') as f:
+            if is_archive(path):
+                for name, data in iter_class_entries(f, args.include, args.nested):
+                    if args.signature:
+                        print('// ' + name)
+                    print_class_file(ClassFile(data, profile=profile, validation=args.validation), args, name)
+            else:
+                print_class_file(ClassFile(f, profile=profile, validation=args.validation), args)
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('class_file', type=argparse.FileType('rb'))
+    parser.add_argument('class_file', nargs='+',
+                        help='class file or jar/war/zip archive; with -B also directories and classpaths')
     parser.add_argument('-C', '--check', action='store_true')
     parser.add_argument('-S', '--signature', action='store_true')
+    parser.add_argument('-I', '--include', action='append', metavar='PATTERN',
+                        help='only archive entries matching this glob pattern (can be repeated)')
+    parser.add_argument('--no-nested', dest='nested', action='store_false', help='don\'t read nested archives')
+    parser.add_argument('-B', '--batch', action='store_true', help='parse in a pool of worker processes')
+    parser.add_argument('-j', '--jobs', type=int, help='number of worker processes in batch mode')
+    parser.add_argument('--cache', metavar='PATH', help='parse cache database for batch mode')
+    parser.add_argument('--stats', action='store_true', help='print parsing counters and timers to stderr')
+    parser.add_argument('--validation', choices=VALIDATION_LEVELS,
+                        help='how thoroughly to check class files (default: full with -C, none otherwise)')
 
     args = parser.parse_args()
-    class_file = ClassFile(args.class_file)
-    if args.check:
-        for error in class_file.errors:
-            print('{}: {}'.format(error(1), error(2)))
-    if args.signature:
-        print(class_file.this_class.signature())
+    if args.validation is None:
+        args.validation = 'full' if args.check else 'none'
+    with collect() if args.stats else nullcontext() as stats:
+        if args.batch:
+            print_batch(args)
+        else:
+            print_class_files(args)
+    if stats is not None:
+        print(stats.report(), file=sys.stderr)
@@ -3,7 +3,9 @@
 
 from access_flags import MethodAccessFlags, InvalidFlags
 from attributes import AttributesInfo
+from cfg import ControlFlowGraph
 from common import *
+from generic_signatures import InvalidSignature, parse_method_signature
 from signatures import check_method_descriptor, parse_method_descriptor, unqualify_name
 
 __author__ = 'Gonzalo Matamala'
@@ -12,6 +14,9 @@ __version__ = '0.1.0'
 
 
 class MethodInfo(BaseEntry):
+    __slots__ = ('access_flags', 'name_index', 'descriptor_index', 'attributes', '_name', '_descriptor',
+                 '_generic_signature', '_signature', '_cfg')
+
     def __init__(self, f):
         super().__init__(f)
         self.access_flags = MethodAccessFlags(f)
@@ -20,33 +25,56 @@ class MethodInfo(BaseEntry):
         self.attributes = AttributesInfo(f)
         self._name = None
         self._descriptor = None
+        self._generic_signature = None
         self._signature = None
+        self._cfg = None
 
     def init(self, constant_pool, is_interface):
+        full = constant_pool.validation == 'full'
         try:
             self._name = constant_pool.get_utf8(self.name_index)
         except ValueError as e:
             self.append_error(str(e), self.pos + 2)
-        try:
-            self.access_flags.init(is_interface, self.is_initialization())
-        except InvalidFlags as e:
-            self.append_error('{}: 0x{:4x}'.format(e.message, e.flags), self.pos)
+        if full:
+            try:
+                self.access_flags.init(is_interface, self.is_initialization())
+            except InvalidFlags as e:
+                self.append_error('{}: 0x{:4x}'.format(e.message, e.flags), self.pos)
         try:
             self._descriptor = constant_pool.get_utf8(self.descriptor_index)
-            if not check_method_descriptor(self._descriptor):
+            if full and not check_method_descriptor(self._descriptor):
                 self.append_error('invalid method descriptor {}'.format(self._descriptor), self.pos + 4)
         except ValueError as e:
             self.append_error(str(e), self.pos + 4)
         if not self.attributes.init(constant_pool):
-            self.errors += self.attributes.errors
+            self.add_errors(self.attributes.errors)
+        signature = self.attributes.get_signature()
+        if signature:
+            try:
+                self._generic_signature = parse_method_signature(signature)
+            except InvalidSignature as e:
+                self.append_error(str(e), self.pos)
         return not self.errors
 
     def name(self):
         return self._name
 
+    def release(self):
+        self.attributes.release()
+
     def descriptor(self):
         return self._descriptor
 
+    def cfg(self):
+        if self._cfg is None:
+            code = self.attributes.get_code()
+            if code is not None:
+                self._cfg = ControlFlowGraph(code)
+        return self._cfg
+
+    def generic_signature(self):
+        return self._generic_signature
+
     def is_initialization(self):
         return self._name == '<init>' or self._name == '<cinit>'
 
@@ -59,22 +87,32 @@ class MethodInfo(BaseEntry):
     def signature(self, class_name=None):
         if self._signature is None:
             flags_signature = self.access_flags.signature()
-            parameters_signature, return_signature = parse_method_descriptor(self._descriptor)
+            if self._generic_signature is not None:
+                parameters_signature = self._generic_signature.parameters_name()
+                return_signature = self._generic_signature.result.name()
+            else:
+                parameters_signature, return_signature = parse_method_descriptor(self._descriptor)
             self._signature = flags_signature
             if self._signature:
                 self._signature += ' '
             if self.is_class_initialization() and not self.access_flags._is_static():
                 self._signature += 'static '
+            if self._generic_signature is not None and self._generic_signature.type_parameters:
+                self._signature += self._generic_signature.type_parameters_name() + ' '
             self._signature += return_signature + ' '
             if self.is_initialization() and class_name:
                 self._signature += unqualify_name(class_name)
             else:
                 self._signature += self._name
             self._signature += parameters_signature
+            if self._generic_signature is not None and self._generic_signature.throws:
+                self._signature += ' throws ' + ', '.join(throw.name() for throw in self._generic_signature.throws)
         return self._signature
 
 
 class MethodsInfo(ListEntry):
+    __slots__ = ()
+
     def __init__(self, f):
         super().__init__(MethodInfo, f)
 
@@ -0,0 +1,136 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from functools import lru_cache
+
+from javadec import ClassFile
+from summary import summarize, summary_from_dict
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Modules whose code determines a summary; a change in any of them invalidates cached summaries.
+_PARSER_MODULES = ('access_flags', 'attributes', 'common', 'constant_pool', 'fields', 'generic_signatures',
+                   'interfaces', 'javadec', 'methods', 'signatures', 'summary', 'this_class')
+
+
+@lru_cache(maxsize=None)
+def parser_version():
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for module in _PARSER_MODULES:
+        with open(os.path.join(directory, module + '.py'), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class ParseCache:
+    """On-disk cache of class summaries, keyed by the class file content, the parser version and parse options.
+
+    Backed by sqlite, so it can be shared by concurrent processes; each process must open its own ParseCache. When
+    the stored summaries exceed `max_size` bytes the least recently used ones are evicted.
+    """
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT NOT NULL, '
+                         'size INTEGER NOT NULL, last_used REAL NOT NULL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY CHECK (id = 0), '
+                         'size INTEGER NOT NULL)')
+        self._db.execute('INSERT OR IGNORE INTO stats VALUES (0, 0)')
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def key(data, class_file_args=None):
+        digest = hashlib.sha256(data)
+        digest.update(parser_version().encode())
+        digest.update(json.dumps(sorted((class_file_args or {}).items())).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        row = self._db.execute('SELECT summary FROM summaries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._db.execute('UPDATE summaries SET last_used = ? WHERE key = ?', (time.time(), key))
+        return summary_from_dict(json.loads(row[0]))
+
+    def put(self, key, summary):
+        value = json.dumps(summary._asdict(), separators=(',', ':'))
+        size = len(key) + len(value)
+        with self._transaction():
+            cursor = self._db.execute('INSERT OR IGNORE INTO summaries VALUES (?, ?, ?, ?)',
+                                      (key, value, size, time.time()))
+            if cursor.rowcount:
+                self._db.execute('UPDATE stats SET size = size + ? WHERE id = 0', (size,))
+            total_size = self._db.execute('SELECT size FROM stats WHERE id = 0').fetchone()[0]
+            if total_size > self.max_size:
+                self._evict(total_size)
+
+    def summarize(self, source, **class_file_args):
+        """Return the summary of `source` (class file bytes or path), parsing it only on a cache miss."""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            data = bytes(source)
+        else:
+            with open(source, 'rb') as f:
+                data = f.read()
+        key = self.key(data, class_file_args)
+        summary = self.get(key)
+        if summary is None:
+            summary = summarize(ClassFile(data, **class_file_args))
+            self.put(key, summary)
+        return summary
+
+    def size(self):
+        return self._db.execute('SELECT size FROM stats WHERE id = 0').fetchone()[0]
+
+    def _evict(self, total_size):
+        # Evict down to 90% of the limit, so eviction doesn't run on every put once the cache is full.
+        target = self.max_size * 9 // 10
+        rows = self._db.execute('SELECT key, size FROM summaries ORDER BY last_used')
+        evicted = []
+        for key, size in rows:
+            if total_size <= target:
+                break
+            evicted.append((key,))
+            total_size -= size
+        rows.close()
+        self._db.executemany('DELETE FROM summaries WHERE key = ?', evicted)
+        self._db.execute('UPDATE stats SET size = ? WHERE id = 0', (total_size,))
+
+    def _transaction(self):
+        return _Transaction(self._db)
+
+
+class _Transaction:
+    def __init__(self, db):
+        self._db = db
+
+    def __enter__(self):
+        self._db.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._db.execute('COMMIT' if exc_type is None else 'ROLLBACK')
@@ -0,0 +1,216 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import iter_sources, parse_class
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+# Longest request line; class bytes are sent base64 encoded in a single line. Also the limit of each connection's
+# stream reader, which can buffer up to about twice as much unread input.
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
+
+class RequestError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def result_as_dict(result):
+    """JSON form of a batch.ClassResult; summary.summary_from_dict() rebuilds its summary."""
+    return {'name': result.name, 'summary': None if result.summary is None else result.summary._asdict(),
+            'errors': [list(error) for error in result.errors]}
+
+
+def parse_source(name, source, cache, class_file_args):
+    """Parse one class file (bytes or path) into a ClassResult dict.
+
+    Run by the server's worker processes, which keep their descriptor, signature, flag and parse caches between
+    requests.
+    """
+    return result_as_dict(parse_class(name, source, class_file_args, cache))
+
+
+def _init_worker():
+    # Workers are stopped by the server, not by the signals sent to it or to its process group.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+async def _parse_items(request):
+    data = request.get('data')
+    if data is not None:
+        try:
+            return [(request.get('name', '<data>'), base64.b64decode(data, validate=True))]
+        except ValueError:
+            raise RequestError('invalid base64 data')
+    paths = request.get('paths')
+    if not isinstance(paths, list) or not paths:
+        raise RequestError('a parse request needs paths or data')
+    # Directories are walked and archives read in a thread, not to block the event loop.
+    return await asyncio.to_thread(lambda: list(iter_sources(paths, request.get('include'),
+                                                             request.get('nested', True))))
+
+
+class Server:
+    """Parse server on a Unix domain socket.
+
+    Requests and responses are JSON objects, one per line. A request has an 'op' and an optional 'id' that is
+    copied into its response; responses of a connection may come out of order. Ops:
+
+    - 'parse': 'paths' (class files, archives, directories or classpaths, as seen by the server) or base64 class
+      file 'data' with its 'name'; optional 'include' patterns, 'nested', 'profile' and 'validation'. The response
+      has the 'results' of batch.parse_class as dicts, see result_as_dict().
+    - 'ping': an empty response.
+    - 'shutdown': stop the server once the requests being run are done.
+
+    Each class file of a parse request is a job for a pool of `workers` processes, with at most `max_pending` jobs
+    running or queued for it; the others wait for their turn. At most `max_requests` requests of a connection are
+    read and not answered yet; the next one is read when one of them is answered. That bounds the work queued for a
+    connection, not its memory: besides the requests being run, the connection's stream reader buffers up to about
+    2 * MAX_REQUEST_SIZE bytes of input. Failed requests get an 'error' message.
+    """
+    def __init__(self, socket_path, workers=None, max_pending=None, cache=None, max_requests=None):
+        self.socket_path = socket_path
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 2 * self.workers
+        self.max_requests = max_requests or self.max_pending
+        self.cache = cache
+        self._executor = None
+        self._semaphore = None
+        self._stopped = None
+        self._tasks = set()
+        self._connections = {}
+
+    async def serve(self):
+        self._semaphore = asyncio.Semaphore(self.max_pending)
+        self._stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, self._stopped.set)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        with self._executor:
+            server = await asyncio.start_unix_server(self._handle_connection, self.socket_path,
+                                                     limit=MAX_REQUEST_SIZE)
+            try:
+                async with server:
+                    await self._stopped.wait()
+                    server.close()
+                    if self._tasks:
+                        await asyncio.wait(self._tasks)
+                    for writer in self._connections.values():
+                        writer.close()
+                    if self._connections:
+                        await asyncio.wait(list(self._connections))
+            finally:
+                if os.path.exists(self.socket_path):
+                    os.unlink(self.socket_path)
+
+    def stop(self):
+        self._stopped.set()
+
+    async def _handle_connection(self, reader, writer):
+        tasks = set()
+        requests = asyncio.Semaphore(self.max_requests)
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                await requests.acquire()
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    await self._write(writer, {'id': None, 'error': 'request too long'})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    requests.release()
+                    continue
+                task = asyncio.create_task(self._run(line, writer))
+                tasks.add(task)
+                self._tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(self._tasks.discard)
+                task.add_done_callback(lambda task: requests.release())
+            if tasks:
+                await asyncio.wait(tasks)
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[asyncio.current_task()]
+            writer.close()
+
+    async def _run(self, line, writer):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise RequestError('a request must be a JSON object')
+            request_id = request.get('id')
+            response = await self._dispatch(request)
+        except ValueError as e:
+            response = {'error': 'invalid request: {}'.format(e)}
+        except RequestError as e:
+            response = {'error': e.message}
+        except Exception as e:
+            response = {'error': '{}: {}'.format(type(e).__name__, e)}
+        response['id'] = request_id
+        try:
+            await self._write(writer, response)
+        except ConnectionError:
+            pass
+
+    async def _dispatch(self, request):
+        op = request.get('op')
+        if op == 'parse':
+            class_file_args = {key: request[key] for key in ('profile', 'validation') if key in request}
+            items = await _parse_items(request)
+            return {'results': list(await asyncio.gather(*(self._parse(name, source, class_file_args)
+                                                           for name, source in items)))}
+        if op == 'ping':
+            return {}
+        if op == 'shutdown':
+            self.stop()
+            return {}
+        raise RequestError('unknown op {}'.format(op))
+
+    async def _parse(self, name, source, class_file_args):
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, parse_source, name, source,
+                                                                    self.cache, class_file_args)
+
+    @staticmethod
+    async def _write(writer, response):
+        writer.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+        await writer.drain()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='serve class file parse requests on a Unix domain socket')
+    parser.add_argument('socket', help='Unix domain socket path')
+    parser.add_argument('-j', '--jobs', type=int, help='number of worker processes (default: one per CPU)')
+    parser.add_argument('--max-pending', type=int, help='class files parsed or queued at once (default: 2 * jobs)')
+    parser.add_argument('--max-requests', type=int,
+                        help='requests read ahead per connection (default: --max-pending)')
+    parser.add_argument('--cache', metavar='PATH', help='parse cache database')
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(Server(args.socket, args.jobs, args.max_pending, args.cache, args.max_requests).serve())
+    except OSError as e:
+        print('{}: {}'.format(args.socket, e.strerror or e), file=sys.stderr)
+        sys.exit(1)
@@ -1,7 +1,9 @@
 #!/usr/bin/python3 -O
-#  -*- coding:utf-8 -*-
+#  -*- coding:utf-8 -*-
 
 import re
+from collections import namedtuple
+from functools import lru_cache
 
 __author__ = 'Gonzalo Matamala'
 __date__ = ''
@@ -9,64 +11,139 @@ __version__ = '0.1.0'
 
 
 _CLASS_BINARY_NAME_RE = re.compile(r'([A-Za-z_$][\w$]*(?:/[A-Za-z_$][\w$]*)*)$')
-_FIELD_DESCRIPTOR_RE = re.compile(r'([BCDFIJSZ])|L([\w$/]+);|\[([\w$/;[]+)$')
-_METHOD_DESCRIPTOR_RE = re.compile(r'\(([\w$/;[]*)\)([\w;[/]*)$')
-_PARAMETER_DESCRIPTOR_RE = re.compile(r'([BCDFIJSZ])|L([\w$/]+);|\[([\w$/;[]+)')
-_RETURN_DESCRIPTOR_RE = re.compile(r'([BCDFIJSZV])|L([\w$/]+);|\[([\w$/;[]+)$')
 _UNQUALIFIED_NAME_RE = re.compile(r'([A-Za-z_$][\w$]*)$')
+# What the JVM requires of a binary name (JVMS 4.2.1): non-empty '/' separated parts without '.', ';' or '['.
+_BINARY_NAME_STRUCTURE_RE = re.compile(r'[^./;\[]+(?:/[^./;\[]+)*$')
+
+# Bound of each descriptor cache; the same few thousand descriptors are used over and over across a classpath.
+DESCRIPTOR_CACHE_SIZE = 4096
+
+DescriptorCacheInfo = namedtuple('DescriptorCacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
 
 _BASE_TYPE = {
     'B': 'byte', 'C': 'char', 'D': 'double', 'F': 'float', 'I': 'int', 'J': 'long', 'S': 'short', 'Z': 'boolean'}
 
+_MAX_ARRAY_DIMENSIONS = 255
+
 
 class InvalidDescriptor(Exception):
     def __init__(self, message, descriptor):
-        super().__init__(message=message, descriptor=descriptor)
+        super().__init__('{}: {}'.format(message, descriptor))
+        self.message = message
+        self.descriptor = descriptor
+
+
+class FieldType(namedtuple('FieldType', ['base_type', 'class_name', 'dimensions'])):
+    """Parsed field type.
+
+    `base_type` is a base type character, 'L' for class types (then `class_name` is the binary name) or 'V' for void.
+    """
+    __slots__ = ()
+
+    def name(self):
+        if self.base_type == 'L':
+            name = name_from_binary_name(self.class_name)
+        elif self.base_type == 'V':
+            name = 'void'
+        else:
+            name = _BASE_TYPE[self.base_type]
+        return name + '[]' * self.dimensions
+
+
+MethodDescriptor = namedtuple('MethodDescriptor', ['parameters', 'return_type'])
+
+
+def _scan_field_type(descriptor, i, allow_void=False):
+    length = len(descriptor)
+    start = i
+    while i < length and descriptor[i] == '[':
+        i += 1
+    dimensions = i - start
+    if dimensions > _MAX_ARRAY_DIMENSIONS:
+        raise InvalidDescriptor('too many array dimensions', descriptor)
+    if i >= length:
+        raise InvalidDescriptor('missing field type', descriptor)
+    c = descriptor[i]
+    if c in _BASE_TYPE or (c == 'V' and allow_void and not dimensions):
+        return FieldType(c, None, dimensions), i + 1
+    if c == 'L':
+        end = descriptor.find(';', i + 1)
+        if end == -1:
+            raise InvalidDescriptor('unterminated class type', descriptor)
+        class_name = descriptor[i + 1:end]
+        if not _BINARY_NAME_STRUCTURE_RE.match(class_name):
+            raise InvalidDescriptor('invalid class name', descriptor)
+        return FieldType(c, class_name, dimensions), end + 1
+    raise InvalidDescriptor('invalid field type', descriptor)
+
+
+def _scan_parameters(descriptor, i, end_char=None):
+    length = len(descriptor)
+    parameters = []
+    while i < length and descriptor[i] != end_char:
+        field_type, i = _scan_field_type(descriptor, i)
+        parameters.append(field_type)
+    return tuple(parameters), i
+
+
+@lru_cache(maxsize=DESCRIPTOR_CACHE_SIZE)
+def tokenize_field_descriptor(descriptor):
+    field_type, end = _scan_field_type(descriptor, 0)
+    if end != len(descriptor):
+        raise InvalidDescriptor('unexpected characters after field type', descriptor)
+    return field_type
+
+
+@lru_cache(maxsize=DESCRIPTOR_CACHE_SIZE)
+def tokenize_method_descriptor(descriptor):
+    if not descriptor.startswith('('):
+        raise InvalidDescriptor('missing parameters', descriptor)
+    parameters, i = _scan_parameters(descriptor, 1, ')')
+    if i >= len(descriptor):
+        raise InvalidDescriptor('unterminated parameters', descriptor)
+    return_type, end = _scan_field_type(descriptor, i + 1, True)
+    if end != len(descriptor):
+        raise InvalidDescriptor('unexpected characters after return type', descriptor)
+    return MethodDescriptor(parameters, return_type)
 
 
 def check_binary_name(name):
     return bool(_CLASS_BINARY_NAME_RE.match(name))
 
 
+def _check_class_names(field_types):
+    # The tokenizer only checks the structure of class names; the check_* functions also check their identifiers.
+    return all(field_type.class_name is None or check_binary_name(field_type.class_name) for field_type in field_types)
+
+
 def check_field_descriptor(descriptor):
-    m = _FIELD_DESCRIPTOR_RE.match(descriptor)
-    if not m:
+    try:
+        return _check_class_names((tokenize_field_descriptor(descriptor),))
+    except InvalidDescriptor:
         return False
-    if m.group(2):
-        return check_binary_name(m.group(2))
-    if m.group(3):
-        return check_field_descriptor(m.group(3))
-    return True
 
 
 def check_parameters_descriptor(descriptor):
-    m = _PARAMETER_DESCRIPTOR_RE.match(descriptor)
-    while m:
-        if m.group(2) and not check_binary_name(m.group(2)):
-            return False
-        if m.group(3) and not check_field_descriptor(m.group(3)):
-            return False
-        descriptor = descriptor[m.end(0):]
-        m = _PARAMETER_DESCRIPTOR_RE.match(descriptor)
-    return not descriptor
+    try:
+        return _check_class_names(_scan_parameters(descriptor, 0)[0])
+    except InvalidDescriptor:
+        return False
 
 
 def check_return_descriptor(descriptor):
-    m = _RETURN_DESCRIPTOR_RE.match(descriptor)
-    if not m:
+    try:
+        return_type, end = _scan_field_type(descriptor, 0, True)
+    except InvalidDescriptor:
         return False
-    if m.group(2):
-        return check_binary_name(m.group(2))
-    if m.group(3):
-        return check_field_descriptor(m.group(3))
-    return True
+    return end == len(descriptor) and _check_class_names((return_type,))
 
 
 def check_method_descriptor(descriptor):
-    m = _METHOD_DESCRIPTOR_RE.match(descriptor)
-    if not m:
+    try:
+        method_descriptor = tokenize_method_descriptor(descriptor)
+    except InvalidDescriptor:
         return False
-    return check_parameters_descriptor(m.group(1)) and check_return_descriptor(m.group(2))
+    return _check_class_names(method_descriptor.parameters + (method_descriptor.return_type,))
 
 
 def check_unqualified_name(name):
@@ -77,49 +154,42 @@ def name_from_binary_name(binary_name):
     return binary_name.replace('/', '.')
 
 
+@lru_cache(maxsize=DESCRIPTOR_CACHE_SIZE)
 def parse_field_type_descriptor(descriptor):
-    m = _FIELD_DESCRIPTOR_RE.match(descriptor)
-    if not m:
-        raise InvalidDescriptor('Invalid field type', descriptor)
-    if m.group(1):
-        return _BASE_TYPE[m.group(1)]
-    if m.group(2):
-        return name_from_binary_name(m.group(2))
-    if m.group(3):
-        return parse_field_type_descriptor(m.group(3)) + '[]'
-    raise InvalidDescriptor('Invalid field type', descriptor)
+    return tokenize_field_descriptor(descriptor).name()
 
 
 def parse_parameters_descriptor(descriptor):
-    parameters = []
-    m = _PARAMETER_DESCRIPTOR_RE.match(descriptor)
-    while m:
-        if m.group(1):
-            parameters.append(_BASE_TYPE[m.group(1)])
-        elif m.group(2):
-            parameters.append(name_from_binary_name(m.group(2)))
-        elif m.group(3):
-            parameters.append(parse_field_type_descriptor(m.group(3)) + '[]')
-        else:
-            raise InvalidDescriptor('invalid parameter', descriptor)
-        descriptor = descriptor[m.end(0):]
-        m = _PARAMETER_DESCRIPTOR_RE.match(descriptor)
-    return '(' + ', '.join(parameters) + ')'
+    parameters, _ = _scan_parameters(descriptor, 0)
+    return _parameters_signature(parameters)
 
 
 def parse_return_descriptor(descriptor):
-    if descriptor == 'V':
-        return 'void'
-    return parse_field_type_descriptor(descriptor)
+    return_type, end = _scan_field_type(descriptor, 0, True)
+    if end != len(descriptor):
+        raise InvalidDescriptor('unexpected characters after return type', descriptor)
+    return return_type.name()
 
 
+@lru_cache(maxsize=DESCRIPTOR_CACHE_SIZE)
 def parse_method_descriptor(descriptor):
-    m = _METHOD_DESCRIPTOR_RE.match(descriptor)
-    if not m:
-        raise InvalidDescriptor('invalid MethodDescriptor', descriptor)
-    parameters_sign = parse_parameters_descriptor(m.group(1))
-    return_sign = parse_return_descriptor(m.group(2))
-    return parameters_sign, return_sign
+    method_descriptor = tokenize_method_descriptor(descriptor)
+    return _parameters_signature(method_descriptor.parameters), method_descriptor.return_type.name()
+
+
+def _parameters_signature(parameters):
+    return '(' + ', '.join(parameter.name() for parameter in parameters) + ')'
+
+
+def clear_descriptor_cache():
+    for function in _CACHED_DESCRIPTOR_FUNCTIONS:
+        function.cache_clear()
+
+
+def descriptor_cache_info():
+    infos = [function.cache_info() for function in _CACHED_DESCRIPTOR_FUNCTIONS]
+    return DescriptorCacheInfo(sum(info.hits for info in infos), sum(info.misses for info in infos),
+                               sum(info.maxsize for info in infos), sum(info.currsize for info in infos))
 
 
 def unqualify_name(q_name):
@@ -127,3 +197,7 @@ def unqualify_name(q_name):
     if last_period == -1:
         return q_name
     return q_name[last_period + 1:]
+
+
+_CACHED_DESCRIPTOR_FUNCTIONS = (tokenize_field_descriptor, tokenize_method_descriptor, parse_field_type_descriptor,
+                                parse_method_descriptor)
@@ -0,0 +1,39 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+from collections import namedtuple
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+# Summary of a parsed class: what batch jobs need, small and picklable. `fields` and `methods` are
+# (name, descriptor, access flags) tuples and `errors` (message, position) tuples.
+ClassSummary = namedtuple('ClassSummary', ['name', 'super_name', 'interfaces', 'access_flags', 'signature',
+                                           'fields', 'methods', 'errors'])
+
+
+def summarize(class_file):
+    this_class = class_file.this_class
+    errors = list(class_file.errors)
+    try:
+        signature = this_class.signature()
+    except Exception as e:
+        signature = None
+        errors.append((str(e), this_class.pos))
+    return ClassSummary(this_class.name(), this_class.super_name(), tuple(this_class.interfaces.names()),
+                        this_class.access_flags.flags, signature,
+                        tuple((field.name(), field.descriptor(), field.access_flags.flags)
+                              for field in this_class.fields.entries),
+                        tuple((method.name(), method.descriptor(), method.access_flags.flags)
+                              for method in this_class.methods.entries),
+                        tuple(errors))
+
+
+def summary_from_dict(summary):
+    """Rebuild a ClassSummary from its `_asdict()` form, e.g. after a JSON round trip."""
+    return ClassSummary(summary['name'], summary['super_name'], tuple(summary['interfaces']), summary['access_flags'],
+                        summary['signature'], tuple(tuple(field) for field in summary['fields']),
+                        tuple(tuple(method) for method in summary['methods']),
+                        tuple(tuple(error) for error in summary['errors']))
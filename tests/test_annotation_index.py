@@ -0,0 +1,86 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import io
+import os
+import struct
+import tempfile
+import unittest
+
+from annotation_index import (TARGET_CLASS, TARGET_FIELD, TARGET_METHOD, AnnotationIndex, AnnotationTarget,
+                              EnumValue)
+from benchmarks.generator import ClassWriter
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+def _u2(*values):
+    return struct.pack('>{}H'.format(len(values)), *values)
+
+
+def _annotations(writer, name, annotations):
+    """An annotations attribute of (type descriptor, [(element name, element_value bytes)]) annotations."""
+    body = _u2(len(annotations))
+    for descriptor, elements in annotations:
+        body += _u2(writer.utf8(descriptor), len(elements))
+        for element_name, element_value in elements:
+            body += _u2(writer.utf8(element_name)) + element_value
+    return writer.attribute(name, body)
+
+
+def _service_class():
+    """@Deprecated class bench.Service, with a @Deprecated field `count` and an invisible @bench.Timed method."""
+    writer = ClassWriter()
+    deprecated = ('Ljava/lang/Deprecated;', [])
+    timed = ('Lbench/Timed;', [
+        ('value', b'I' + _u2(writer.integer(5))),
+        ('name', b's' + _u2(writer.utf8('x'))),
+        ('unit', b'e' + _u2(writer.utf8('Ljava/util/concurrent/TimeUnit;'), writer.utf8('SECONDS'))),
+        ('tags', b'[' + _u2(2) + b's' + _u2(writer.utf8('a')) + b's' + _u2(writer.utf8('b')))])
+    fields = [writer.member(0x0002, 'count', 'I', [_annotations(writer, 'RuntimeVisibleAnnotations', [deprecated])])]
+    methods = [writer.member(0x0401, 'run', '()V', [_annotations(writer, 'RuntimeInvisibleAnnotations', [timed])])]
+    attributes = [_annotations(writer, 'RuntimeVisibleAnnotations', [deprecated])]
+    return writer.build('bench/Service', fields, methods, attributes)
+
+
+class AnnotationIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        for name, data in (('Service', _service_class()), ('Broken', b'\xca\xfe')):
+            with open(os.path.join(self.directory.name, name + '.class'), 'wb') as f:
+                f.write(data)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check_index(self, index):
+        self.assertEqual(sorted(index.annotation_types()), ['bench.Timed', 'java.lang.Deprecated'])
+        self.assertEqual(index.targets('java.lang.Deprecated'),
+                         [AnnotationTarget(TARGET_CLASS, 'bench.Service', None, None, -1),
+                          AnnotationTarget(TARGET_FIELD, 'bench.Service', 'count', 'I', -1)])
+        self.assertEqual(index.targets('java.lang.Deprecated', TARGET_METHOD), [])
+        timed, = index.annotations('bench.Timed')
+        self.assertEqual(timed.target, AnnotationTarget(TARGET_METHOD, 'bench.Service', 'run', '()V', -1))
+        self.assertFalse(timed.visible)
+        self.assertEqual(timed.values(), {'value': 5, 'name': 'x', 'tags': ('a', 'b'),
+                                          'unit': EnumValue('java.util.concurrent.TimeUnit', 'SECONDS')})
+
+    def test_build(self):
+        for workers in (None, 2):
+            with self.subTest(workers=workers):
+                index = AnnotationIndex.build([self.directory.name], workers)
+                self.check_index(index)
+                self.assertEqual([(name, pos) for name, pos, message in index.errors],
+                                 [(os.path.join(self.directory.name, 'Broken.class'), None)])
+
+    def test_save_and_load(self):
+        f = io.BytesIO()
+        AnnotationIndex.build([self.directory.name]).save(f)
+        f.seek(0)
+        self.check_index(AnnotationIndex.load(f))
+
+
+if __name__ == '__main__':
+    unittest.main()
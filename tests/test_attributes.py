@@ -0,0 +1,36 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import unittest
+
+from benchmarks.generator import ClassWriter
+from javadec import ClassFile
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+def _truncated_code_class():
+    writer = ClassWriter()
+    methods = [writer.member(0x0009, 'run', '()V', [writer.attribute('Code', b'\x00\x01')])]
+    return writer.build('Truncated', methods=methods)
+
+
+class TruncatedAttributeTest(unittest.TestCase):
+    def test_reported(self):
+        class_file = ClassFile(_truncated_code_class())
+        self.assertIn('truncated Code attribute', [message for message, pos in class_file.errors])
+
+    def test_code_users(self):
+        for validation in ('none', 'structural', 'full'):
+            with self.subTest(validation=validation):
+                class_file = ClassFile(_truncated_code_class(), validation=validation)
+                run = class_file.this_class.methods.entries[0]
+                self.assertIsNone(run.attributes.get_code())
+                self.assertIsNone(run.cfg())
+                self.assertEqual(list(class_file.call_sites().method_call_sites(run)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import struct
+import unittest
+
+from bytecode import IINC, LOOKUPSWITCH, TABLESWITCH, WIDE, CompactCode, InvalidBytecode, iter_instructions
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+def _s4(*values):
+    return struct.pack('>{}i'.format(len(values)), *values)
+
+
+# nop; tableswitch at 1 (2 padding bytes); lookupswitch at 24 (3 padding bytes); wide iload; wide iinc; return
+SWITCH_CODE = (b'\x00' +
+               b'\xaa\x00\x00' + _s4(61, 1, 2, 23, 27) +
+               b'\xab\x00\x00\x00' + _s4(38, 2, -5, 28, 100, 32) +
+               b'\xc4\x15\x01\x00' +
+               b'\xc4\x84\x01\x01\xff\x38' +
+               b'\xb1')
+
+
+class InstructionsTest(unittest.TestCase):
+    def test_switches_and_wide(self):
+        self.assertEqual(list(iter_instructions(SWITCH_CODE)), [
+            (0, 0x00, ()),
+            (1, TABLESWITCH, (62, 1, 2, (24, 28))),
+            (24, LOOKUPSWITCH, (62, (-5, 100), (52, 56))),
+            (52, WIDE, (0x15, 0x100)),
+            (56, WIDE, (IINC, 0x101, -200)),
+            (62, 0xb1, ())])
+
+    def test_operands(self):
+        # bipush -1; sipush 300; ifeq -4 (absolute 1); invokeinterface #7 count 2; goto_w +5
+        code = b'\x10\xff\x11\x01\x2c\x99\xff\xfc\xb9\x00\x07\x02\x00\xc8\x00\x00\x00\x05'
+        self.assertEqual(list(iter_instructions(code)), [
+            (0, 0x10, (-1,)), (2, 0x11, (300,)), (5, 0x99, (1,)), (8, 0xb9, (7, 2)), (13, 0xc8, (18,))])
+
+    def test_compact_code(self):
+        code = CompactCode(SWITCH_CODE)
+        self.assertEqual(list(code), list(iter_instructions(SWITCH_CODE)))
+        self.assertEqual(code.index_of(52), 3)
+        with self.assertRaises(ValueError):
+            code.index_of(2)
+
+    def test_invalid(self):
+        for code, message in ((b'\x11\x00', 'truncated instruction'),
+                              (b'\xaa\x00\x00\x00' + _s4(0, 2, 1), 'invalid tableswitch bounds'),
+                              (b'\xab\x00\x00\x00' + _s4(0, 1), 'truncated instruction'),
+                              (b'\xc4\x10\x00\x00', 'invalid wide opcode 16'),
+                              (b'\xcb', 'invalid opcode 203')):
+            with self.subTest(message=message):
+                with self.assertRaises(InvalidBytecode) as context:
+                    list(iter_instructions(code))
+                self.assertEqual(context.exception.message, message)
+
+
+if __name__ == '__main__':
+    unittest.main()
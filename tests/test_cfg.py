@@ -0,0 +1,63 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import struct
+import unittest
+
+from benchmarks.generator import ClassWriter
+from bytecode import InvalidBytecode
+from cfg import EDGE_BRANCH, EDGE_EXCEPTION, EDGE_FALLTHROUGH, EDGE_SWITCH
+from javadec import ClassFile
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+# for (int i = 0; i < 10; i++) {}
+LOOP_CODE = b'\x03\x3b\x1a\x10\x0a\xa2\x00\x09\x84\x00\x01\xa7\xff\xf7\xb1'
+# try { throw null; } catch (Throwable e) {}
+CATCH_CODE = b'\x01\xbf\x4b\xb1'
+# switch (i) { case 0: return; case 1: return; default: return; }
+SWITCH_CODE = b'\x1a\xaa\x00\x00' + struct.pack('>5i', 25, 0, 1, 23, 24) + b'\xb1\xb1\xb1'
+# goto into its own operands
+BAD_CODE = b'\xa7\x00\x01\xb1'
+
+
+def _method_cfg(code, exception_table=()):
+    writer = ClassWriter()
+    methods = [writer.member(0x0009, 'run', '(I)V', [writer.code(1, 1, code, exception_table)])]
+    return ClassFile(writer.build('Blocks', methods=methods)).this_class.methods.entries[0].cfg()
+
+
+class ControlFlowGraphTest(unittest.TestCase):
+    def test_loop(self):
+        cfg = _method_cfg(LOOP_CODE)
+        self.assertEqual(list(zip(cfg.block_starts, cfg.block_ends)), [(0, 2), (2, 8), (8, 14), (14, 15)])
+        self.assertEqual([cfg.edges(block) for block in range(len(cfg))],
+                         [[(1, EDGE_FALLTHROUGH)], [(3, EDGE_BRANCH), (2, EDGE_FALLTHROUGH)], [(1, EDGE_BRANCH)], []])
+        self.assertEqual(cfg.predecessors(1), [0, 2])
+        self.assertEqual([offset for offset, opcode, operands in cfg.instructions(1)], [2, 3, 5])
+        self.assertEqual(cfg.cyclomatic_complexity(), 2)
+        self.assertEqual(cfg.unreachable_blocks(), [])
+
+    def test_exception_handler(self):
+        cfg = _method_cfg(CATCH_CODE, [(0, 2, 2, 0)])
+        self.assertEqual(list(cfg.block_starts), [0, 2])
+        self.assertEqual(cfg.edges(0), [(1, EDGE_EXCEPTION)])
+        self.assertEqual(cfg.unreachable_blocks(), [])
+        self.assertEqual(_method_cfg(CATCH_CODE).unreachable_blocks(), [1])
+
+    def test_switch(self):
+        cfg = _method_cfg(SWITCH_CODE)
+        self.assertEqual(list(cfg.block_starts), [0, 24, 25, 26])
+        self.assertEqual(cfg.edges(0), [(3, EDGE_SWITCH), (1, EDGE_SWITCH), (2, EDGE_SWITCH)])
+
+    def test_invalid_target(self):
+        with self.assertRaises(InvalidBytecode) as context:
+            _method_cfg(BAD_CODE)
+        self.assertEqual(context.exception.message, 'branch or exception offset is not an instruction')
+
+
+if __name__ == '__main__':
+    unittest.main()
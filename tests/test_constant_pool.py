@@ -0,0 +1,39 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import unittest
+
+from common import BufferFile
+from constant_pool import ConstantPool, decode_modified_utf8
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+# A constant pool of one Utf8 entry, 'a' 0xff 'b', which isn't valid Modified UTF-8.
+INVALID_UTF8_POOL = b'\x00\x02\x01\x00\x03a\xffb'
+
+
+class ModifiedUtf8Test(unittest.TestCase):
+    def test_valid(self):
+        for validate in (True, False):
+            with self.subTest(validate=validate):
+                self.assertEqual(decode_modified_utf8(b'a\xc0\x80\xc3\xbc', validate), ('a\x00\xfc', []))
+                self.assertEqual(decode_modified_utf8(b'\xed\xa0\xbd\xed\xb8\x80', validate), ('\U0001f600', []))
+
+    def test_invalid(self):
+        self.assertEqual(decode_modified_utf8(b'a\xffb'), ('ab', [(0xff, 2)]))
+        self.assertEqual(decode_modified_utf8(b'a\xffb', validate=False), ('a\ufffdb', []))
+
+    def test_invalid_pool_entry(self):
+        for validation, errors in (('none', []), ('structural', []), ('full', ['invalid byte 0xff'])):
+            for lazy in (False, True):
+                with self.subTest(validation=validation, lazy=lazy):
+                    constant_pool = ConstantPool(BufferFile(INVALID_UTF8_POOL), lazy, validation)
+                    constant_pool.get_utf8(1)
+                    self.assertEqual([message for message, pos in constant_pool.errors], errors)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import io
+import os
+import tempfile
+import unittest
+
+from benchmarks.generator import ClassWriter, generate_class
+from hierarchy import TypeHierarchy
+from index_format import InvalidIndex
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+def _write_classes(directory):
+    """A implements Runnable; B extends A; C extends B implements interface I; Broken isn't a class file."""
+    classes = {'A': generate_class(name='bench/A'),
+               'B': ClassWriter().build('bench/B', super_name='bench/A'),
+               'I': ClassWriter().build('bench/I', access_flags=0x0601),
+               'C': ClassWriter().build('bench/C', super_name='bench/B', interfaces=['bench/I']),
+               'Broken': b'\xca\xfe'}
+    for name, data in classes.items():
+        with open(os.path.join(directory, name + '.class'), 'wb') as f:
+            f.write(data)
+
+
+class TypeHierarchyTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        _write_classes(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check_hierarchy(self, hierarchy):
+        self.assertIn('bench.C', hierarchy)
+        self.assertNotIn('java.lang.Object', hierarchy)
+        self.assertEqual(hierarchy.subtypes('java.lang.Runnable'), ['bench.A', 'bench.B', 'bench.C'])
+        self.assertEqual(hierarchy.ancestry('bench.C'),
+                         ['bench.B', 'bench.A', 'java.lang.Object', 'java.lang.Runnable', 'bench.I'])
+        self.assertEqual(hierarchy.implementors('bench.I'), ['bench.C'])
+        self.assertTrue(hierarchy.is_interface(hierarchy.id_of('bench.I')))
+        self.assertTrue(hierarchy.is_subtype('bench.C', 'bench.A'))
+
+    def test_build(self):
+        hierarchy = TypeHierarchy.build([self.directory.name])
+        self.check_hierarchy(hierarchy)
+        self.assertEqual([(name, pos) for name, pos, message in hierarchy.errors],
+                         [(os.path.join(self.directory.name, 'Broken.class'), None)])
+
+    def test_save_and_load(self):
+        f = io.BytesIO()
+        TypeHierarchy.build([self.directory.name]).save(f)
+        f.seek(0)
+        self.check_hierarchy(TypeHierarchy.load(f))
+        with self.assertRaises(InvalidIndex):
+            TypeHierarchy.load(io.BytesIO(b'JXRF' + f.getvalue()[4:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
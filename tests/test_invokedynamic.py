@@ -0,0 +1,66 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import unittest
+
+from benchmarks.generator import ClassWriter
+from constant_pool import REF_INVOKE_STATIC
+from invokedynamic import CALL_SITE_LAMBDA
+from javadec import ClassFile
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+METAFACTORY_DESCRIPTOR = ('(Ljava/lang/invoke/MethodHandles$Lookup;Ljava/lang/String;Ljava/lang/invoke/MethodType;'
+                          'Ljava/lang/invoke/MethodType;Ljava/lang/invoke/MethodHandle;Ljava/lang/invoke/MethodType;)'
+                          'Ljava/lang/invoke/CallSite;')
+
+
+def _lambda_class(bad_argument):
+    """Class whose method `run` binds a lambda at offset 0 and, at offset 5, a call site whose bootstrap method has
+    a Utf8 (not loadable) static argument when `bad_argument` is true."""
+    writer = ClassWriter()
+    metafactory = writer.method_handle(REF_INVOKE_STATIC, writer.method_ref(
+        'java/lang/invoke/LambdaMetafactory', 'metafactory', METAFACTORY_DESCRIPTOR))
+    body = writer.method_handle(REF_INVOKE_STATIC, writer.method_ref('Lambdas', 'lambda$run$0', '()V'))
+    arguments = [writer.method_type('()V'), body, writer.method_type('()V')]
+    first_argument = writer.utf8('not loadable') if bad_argument else arguments[0]
+    bootstrap_methods = [(metafactory, arguments), (metafactory, [first_argument] + arguments[1:])]
+    first = writer.invoke_dynamic(0, 'run', '()Ljava/lang/Runnable;')
+    second = writer.invoke_dynamic(1, 'run', '()Ljava/lang/Runnable;')
+    code = (b'\xba' + first.to_bytes(2, 'big') + b'\x00\x00' + b'\xba' + second.to_bytes(2, 'big') + b'\x00\x00' +
+            b'\x57\x57\xb1')
+    methods = [writer.member(0x0009, 'run', '()V', [writer.code(2, 0, code)]),
+               writer.member(0x100a, 'lambda$run$0', '()V', [writer.code(0, 0, b'\xb1')])]
+    attributes = [writer.bootstrap_methods(bootstrap_methods)]
+    return writer.build('Lambdas', methods=methods, attributes=attributes), first, second
+
+
+class CallSiteResolverTest(unittest.TestCase):
+    def test_lambdas(self):
+        data, first, second = _lambda_class(False)
+        resolver = ClassFile(data).call_sites()
+        self.assertEqual([call_site.index for call_site in resolver.call_sites()], [first, second])
+        self.assertTrue(all(call_site.kind == CALL_SITE_LAMBDA for call_site in resolver.call_sites()))
+        edges = [(method.name(), offset, ref.name) for method, offset, ref in resolver.lambda_edges()]
+        self.assertEqual(edges, [('run', 0, 'lambda$run$0'), ('run', 5, 'lambda$run$0')])
+
+    def test_bad_bootstrap_argument(self):
+        data, first, second = _lambda_class(True)
+        class_file = ClassFile(data)
+        bootstrap_methods = class_file.this_class.attributes.get('BootstrapMethods')
+        self.assertIn('not refers a loadable constant', bootstrap_methods.errors[0][0])
+        self.assertIsNone(bootstrap_methods.bootstrap_methods[1].handle)
+        resolver = class_file.call_sites()
+        with self.assertRaises(ValueError):
+            resolver.call_site(second)
+        self.assertEqual([call_site.index for call_site in resolver.call_sites()], [first])
+        run = class_file.this_class.methods.entries[0]
+        self.assertEqual([offset for offset, call_site in resolver.method_call_sites(run)], [0])
+        self.assertEqual([(method.name(), offset) for method, offset, ref in resolver.lambda_edges()], [('run', 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import itertools
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.generator import DEFAULT_SHAPE, generate_class
+from javadec import ClassFile
+from parse_cache import ParseCache
+from summary import summarize
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+SHAPE = DEFAULT_SHAPE._replace(pool_size=10, methods=3)
+
+
+class ParseCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'cache.db')
+        self.classes = [generate_class(SHAPE, i, 'bench/Class{}'.format(i)) for i in range(3)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hit_and_miss(self):
+        with ParseCache(self.path) as cache:
+            summary = cache.summarize(self.classes[0])
+            self.assertEqual((cache.hits, cache.misses), (0, 1))
+            self.assertEqual(summary, summarize(ClassFile(self.classes[0])))
+            self.assertEqual(cache.summarize(self.classes[0]), summary)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            cache.summarize(self.classes[0], profile='signatures')
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+        with ParseCache(self.path) as cache:
+            self.assertEqual(cache.summarize(self.classes[0]), summary)
+            self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+    def test_parser_version(self):
+        with ParseCache(self.path) as cache:
+            key = cache.key(self.classes[0])
+            cache.summarize(self.classes[0])
+            with mock.patch('parse_cache.parser_version', return_value='0' * 16):
+                self.assertNotEqual(cache.key(self.classes[0]), key)
+                cache.summarize(self.classes[0])
+            self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_eviction(self):
+        keys = [ParseCache.key(data) for data in self.classes]
+        with ParseCache(self.path) as cache:
+            sizes = []
+            for data in self.classes:
+                cache.summarize(data)
+                sizes.append(cache.size() - sum(sizes))
+        # Adding the third class goes over the limit and evicts the least recently used one, the second.
+        max_size = sizes[0] + sizes[2] + sizes[1] // 2
+        path = os.path.join(self.directory.name, 'small.db')
+        with ParseCache(path, max_size) as cache, mock.patch('parse_cache.time.time', side_effect=itertools.count()):
+            cache.summarize(self.classes[0])
+            cache.summarize(self.classes[1])
+            cache.summarize(self.classes[0])
+            cache.summarize(self.classes[2])
+            self.assertEqual([cache.get(key) is not None for key in keys], [True, False, True])
+            self.assertEqual(cache.size(), sizes[0] + sizes[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import asyncio
+import os
+import socket
+import tempfile
+import unittest
+import zipfile
+
+from client import Client, ServerError
+from server import Server
+from summary import summary_from_dict
+
+from benchmarks.generator import DEFAULT_SHAPE, generate_class
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+SHAPE = DEFAULT_SHAPE._replace(pool_size=10, methods=3)
+
+
+def _raw_request(socket_path, line):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(socket_path)
+        s.sendall(line)
+        s.shutdown(socket.SHUT_WR)
+        return s.makefile('rb').read()
+
+
+class ServerTest(unittest.TestCase):
+    """Runs a Server on a temporary socket and talks to it with client.Client from a thread."""
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.socket_path = os.path.join(self.directory, 'javadec.sock')
+        self.class_path = os.path.join(self.directory, 'Generated.class')
+        with open(self.class_path, 'wb') as f:
+            f.write(generate_class(SHAPE, name='bench/Generated'))
+        self.jar_path = os.path.join(self.directory, 'classes.jar')
+        with zipfile.ZipFile(self.jar_path, 'w') as jar:
+            for i in range(3):
+                jar.writestr('bench/Jar{}.class'.format(i), generate_class(SHAPE, i, 'bench/Jar{}'.format(i)))
+
+    def test_requests(self):
+        asyncio.run(self._test_requests())
+
+    async def _test_requests(self):
+        server = Server(self.socket_path, workers=2, max_pending=2, max_requests=2)
+        serving = asyncio.create_task(server.serve())
+        while not os.path.exists(self.socket_path):
+            self.assertFalse(serving.done())
+            await asyncio.sleep(0.01)
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self._talk), 60)
+        finally:
+            server.stop()
+            await asyncio.wait_for(serving, 60)
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def _talk(self):
+        with Client(self.socket_path) as client:
+            self.assertEqual(client.request('ping'), {'id': 0})
+
+            results = list(client.parse([self.class_path, ('Bytes.class', generate_class(SHAPE, 1, 'bench/Bytes')),
+                                         self.jar_path], profile='full', validation='full'))
+            self.assertEqual([result['name'] for result in results],
+                             [self.class_path, 'Bytes.class'] +
+                             [self.jar_path + '!/bench/Jar{}.class'.format(i) for i in range(3)])
+            summaries = [summary_from_dict(result['summary']) for result in results]
+            self.assertEqual([summary.name for summary in summaries],
+                             ['bench.Generated', 'bench.Bytes', 'bench.Jar0', 'bench.Jar1', 'bench.Jar2'])
+            self.assertTrue(all(summary.signature and not summary.errors for summary in summaries))
+
+            missing = os.path.join(self.directory, 'Missing.class')
+            self.assertIn('FileNotFoundError', next(client.parse([missing]))['errors'][0][2])
+            with self.assertRaisesRegex(ServerError, 'unknown op'):
+                client.request('unknown')
+            with self.assertRaisesRegex(ServerError, 'needs paths or data'):
+                client.request('parse')
+
+        responses = _raw_request(self.socket_path, b'not json\n[1]\n').splitlines()
+        self.assertEqual(sorted(responses),
+                         [b'{"error":"a request must be a JSON object","id":null}',
+                          b'{"error":"invalid request: Expecting value: line 1 column 1 (char 0)","id":null}'])
+
+        with Client(self.socket_path) as client:
+            client.request('shutdown')
+
+
+if __name__ == '__main__':
+    unittest.main()
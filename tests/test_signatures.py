@@ -0,0 +1,53 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import unittest
+
+from benchmarks.generator import ClassWriter
+from javadec import ClassFile
+from signatures import (InvalidDescriptor, check_field_descriptor, check_method_descriptor, clear_descriptor_cache,
+                        parse_field_type_descriptor, parse_method_descriptor)
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+NON_ASCII_DESCRIPTOR = '(Lcom/example/Über;)V'
+
+
+class DescriptorTest(unittest.TestCase):
+    def setUp(self):
+        clear_descriptor_cache()
+
+    def test_non_ascii_class_name(self):
+        self.assertEqual(parse_method_descriptor(NON_ASCII_DESCRIPTOR), ('(com.example.Über)', 'void'))
+        self.assertEqual(parse_field_type_descriptor('[Lcom/example/Über;'), 'com.example.Über[]')
+
+    def test_checks_keep_identifier_rules(self):
+        self.assertFalse(check_method_descriptor(NON_ASCII_DESCRIPTOR))
+        self.assertFalse(check_field_descriptor('Lcom/example/Über;'))
+        self.assertTrue(check_method_descriptor('(ILjava/lang/String;)V'))
+
+    def test_invalid_class_name_structure(self):
+        for descriptor in ('(L;)V', '(La//b;)V', '(La/;)V', '(La.b;)V', '(La[b;)V'):
+            with self.subTest(descriptor=descriptor):
+                with self.assertRaises(InvalidDescriptor):
+                    parse_method_descriptor(descriptor)
+
+
+class NonAsciiClassFileTest(unittest.TestCase):
+    def setUp(self):
+        clear_descriptor_cache()
+
+    def test_non_ascii_parameter(self):
+        writer = ClassWriter()
+        data = writer.build('Example', methods=[writer.member(0x0001, 'take', NON_ASCII_DESCRIPTOR)])
+        class_file = ClassFile(data)
+        self.assertIn('take(com.example.Über)', class_file.this_class.methods.entries[0].signature())
+        self.assertIn('invalid method descriptor {}'.format(NON_ASCII_DESCRIPTOR),
+                      [message for message, pos in class_file.errors])
+
+
+if __name__ == '__main__':
+    unittest.main()
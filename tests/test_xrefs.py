@@ -0,0 +1,71 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+import io
+import os
+import tempfile
+import unittest
+
+from benchmarks.generator import ClassWriter, generate_class
+from constant_pool import CONSTANT_METHODREF, MemberRef
+from xrefs import XrefIndex
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+def _class_with_refs(name, refs):
+    writer = ClassWriter()
+    for owner, member, descriptor in refs:
+        writer.method_ref(owner, member, descriptor)
+    return writer.build(name)
+
+
+def _write_classes(directory):
+    classes = {'A': generate_class(name='bench/A'),
+               'B': _class_with_refs('bench/B', [('bench/Util', 'f', '()V'), ('java/lang/Object', '<init>', '()V')]),
+               'C': _class_with_refs('bench/C', [('bench/Util', 'f', '()V'), ('bench/Util', 'g', '(I)V')]),
+               'Broken': b'\xca\xfe'}
+    for name, data in classes.items():
+        with open(os.path.join(directory, name + '.class'), 'wb') as f:
+            f.write(data)
+
+
+class XrefIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        _write_classes(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check_index(self, index):
+        self.assertEqual(len(index), 3)
+        self.assertIn('bench.B', index)
+        self.assertNotIn('bench.Util', index)
+        self.assertEqual(index.referencing('bench.Util'), ['bench.B', 'bench.C'])
+        self.assertEqual(index.referencing('bench.Util', 'g', '(I)V'), ['bench.C'])
+        self.assertEqual(index.referencing('java.lang.Object', '<init>'), ['bench.A', 'bench.B'])
+        self.assertEqual(sorted(index.members('bench.Util')),
+                         [MemberRef(CONSTANT_METHODREF, 'bench.Util', 'f', '()V'),
+                          MemberRef(CONSTANT_METHODREF, 'bench.Util', 'g', '(I)V')])
+        self.assertEqual(index.refs('bench.A'), [MemberRef(CONSTANT_METHODREF, 'java.lang.Object', '<init>', '()V')])
+
+    def test_build(self):
+        for workers in (None, 2):
+            with self.subTest(workers=workers):
+                index = XrefIndex.build([self.directory.name], workers)
+                self.check_index(index)
+                self.assertEqual([(name, pos) for name, pos, message in index.errors],
+                                 [(os.path.join(self.directory.name, 'Broken.class'), None)])
+
+    def test_save_and_load(self):
+        f = io.BytesIO()
+        XrefIndex.build([self.directory.name]).save(f)
+        f.seek(0)
+        self.check_index(XrefIndex.load(f))
+
+
+if __name__ == '__main__':
+    unittest.main()
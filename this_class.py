@@ -5,6 +5,8 @@ from access_flags import ClassAccessFlags, InvalidFlags
 from attributes import AttributesInfo
 from common import *
 from fields import FieldsInfo
+from generic_signatures import InvalidSignature, parse_class_signature
+from instrumentation import timer
 from interfaces import InterfacesInfo
 from methods import MethodsInfo
 from signatures import unqualify_name
@@ -28,36 +30,60 @@ class ThisClassInfo(BaseEntry):
         self._name = None
         self._unqualified_name = None
         self._super_name = None
+        self._generic_signature = None
         self._signature = None
 
     def init(self, constant_pool):
-        try:
-            self.access_flags.init()
-        except InvalidFlags as e:
-            self.append_error('{}: 0x{:4x}'.format(e.message, e.flags), self.pos)
-        try:
-            self._name = constant_pool.get_class_name(self.this_class)
-            self._unqualified_name = unqualify_name(self._name)
-        except ValueError as e:
-            self.append_error(str(e), self.pos + 2)
-        if self.super_class > 0:
+        with timer('this_class.names'):
+            if constant_pool.validation == 'full':
+                try:
+                    self.access_flags.init()
+                except InvalidFlags as e:
+                    self.append_error('{}: 0x{:4x}'.format(e.message, e.flags), self.pos)
             try:
-                self._super_name = constant_pool.get_class_name(self.super_class)
+                self._name = constant_pool.get_class_name(self.this_class)
+                self._unqualified_name = unqualify_name(self._name)
             except ValueError as e:
-                self.append_error(str(e), self.pos + 4)
-        if not self.interfaces.init(constant_pool):
-            self.add_errors(self.interfaces.errors)
-        if not self.fields.init(constant_pool):
-            self.add_errors(self.fields.errors)
-        if not self.methods.init(constant_pool, self.is_interface()):
-            self.add_errors(self.methods.errors)
-        if not self.attributes.init(constant_pool):
-            self.add_errors(self.attributes.errors)
+                self.append_error(str(e), self.pos + 2)
+            if self.super_class > 0:
+                try:
+                    self._super_name = constant_pool.get_class_name(self.super_class)
+                except ValueError as e:
+                    self.append_error(str(e), self.pos + 4)
+        with timer('this_class.interfaces'):
+            if not self.interfaces.init(constant_pool):
+                self.add_errors(self.interfaces.errors)
+        with timer('this_class.fields'):
+            if not self.fields.init(constant_pool, self.is_interface()):
+                self.add_errors(self.fields.errors)
+        with timer('this_class.methods'):
+            if not self.methods.init(constant_pool, self.is_interface()):
+                self.add_errors(self.methods.errors)
+        with timer('this_class.attributes'):
+            if not self.attributes.init(constant_pool):
+                self.add_errors(self.attributes.errors)
+            signature = self.attributes.get_signature()
+            if signature:
+                try:
+                    self._generic_signature = parse_class_signature(signature)
+                except InvalidSignature as e:
+                    self.append_error(str(e), self.pos)
         return not self.errors
 
     def name(self):
         return self._name
 
+    def release(self):
+        self.fields.release()
+        self.methods.release()
+        self.attributes.release()
+
+    def super_name(self):
+        return self._super_name
+
+    def generic_signature(self):
+        return self._generic_signature
+
     def is_enum(self):
         return self.access_flags._is_enum()
 
@@ -67,10 +93,17 @@ class ThisClassInfo(BaseEntry):
     def signature(self):
         if self._signature is None:
             self._signature = self.access_flags.signature() + ' ' + self._unqualified_name
-            if self._super_name:
-                self._signature += ' extends ' + self._super_name
-            if self.interfaces.interfaces_count:
-                self._signature += ' implements ' + self.interfaces.signature()
+            if self._generic_signature is not None:
+                self._signature += self._generic_signature.type_parameters_name()
+                self._signature += ' extends ' + self._generic_signature.superclass.name()
+                if self._generic_signature.interfaces:
+                    self._signature += ' implements ' + ', '.join(interface.name()
+                                                                  for interface in self._generic_signature.interfaces)
+            else:
+                if self._super_name:
+                    self._signature += ' extends ' + self._super_name
+                if self.interfaces.interfaces_count:
+                    self._signature += ' implements ' + self.interfaces.signature()
             self._signature += ' {\n'
             for method in self.methods.entries:
                 self._signature += '\t' + method.signature(self._unqualified_name) + ';\n'
@@ -0,0 +1,205 @@
+#!/usr/bin/python3 -O
+#  -*- coding:utf-8 -*-
+
+from array import array
+
+from constant_pool import MemberRef
+from index_format import (InvalidIndex, read_array, read_bytes, read_header, read_strings, write_array, write_bytes,
+                          write_header, write_strings)
+
+__author__ = 'Gonzalo Matamala'
+__date__ = ''
+__version__ = '0.1.0'
+
+
+_MAGIC = b'JXRF'
+_FORMAT_VERSION = 1
+
+
+def read_refs(name, source):
+    """Return (class name, MemberRefs, errors) for a class file; a batch.map_batch function.
+
+    When the class file can't be read or has no valid name, the class name is None and errors say why, as
+    batch.ClassResult errors.
+    """
+    from batch import exception_errors
+    from javadec import READ_ERRORS, ClassFile
+    try:
+        class_file = ClassFile(source, lazy=True, profile='signatures')
+        if class_file.this_class.name() is None:
+            return None, None, tuple((name, pos, message) for message, pos in class_file.errors)
+        return class_file.this_class.name(), [ref for index, ref in class_file.constant_pool.refs()], ()
+    except READ_ERRORS as e:
+        return None, None, exception_errors(name, e)
+
+
+class XrefIndex:
+    """Which classes reference which fields and methods, from their constant pools' refs.
+
+    Class, member and descriptor names are interned as symbols. Member `m` is the ref (member_tags[m],
+    member_owners[m], member_names[m], member_descriptors[m]) of symbols, and the members referenced by the `c`th
+    indexed class (named symbols[class_ids[c]]) are class_members[class_first[c]:class_first[c + 1]]. The reverse
+    relation is derived on the first query. When a class is added more than once the first one wins. `errors` are
+    those of the class files build() skipped, see read_refs().
+    """
+    def __init__(self):
+        self.symbols = []
+        self._symbol_ids = {}
+        self.class_ids = array('I')
+        self.class_first = array('I', [0])
+        self.class_members = array('I')
+        self.member_tags = bytearray()
+        self.member_owners = array('I')
+        self.member_names = array('I')
+        self.member_descriptors = array('I')
+        self._classes = {}
+        self._members = {}
+        self._ref_first = None
+        self._ref_classes = None
+        self._owner_members = None
+        self.errors = []
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    def __contains__(self, class_name):
+        symbol = self._symbol_ids.get(class_name)
+        return symbol is not None and symbol in self._classes
+
+    def intern(self, symbol):
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    def add(self, class_name, refs):
+        """Add the MemberRefs of a class."""
+        class_id = self.intern(class_name)
+        if class_id in self._classes:
+            return
+        self._classes[class_id] = len(self.class_ids)
+        self.class_ids.append(class_id)
+        members = {self._intern_member(ref) for ref in refs}
+        self.class_members.extend(sorted(members))
+        self.class_first.append(len(self.class_members))
+        self._ref_first = None
+        self._owner_members = None
+
+    @classmethod
+    def build(cls, paths, workers=None, patterns=None, nested=True):
+        """Index the class files under `paths`, read by batch.map_batch `workers`."""
+        from batch import map_batch
+        index = cls()
+        for class_name, refs, errors in map_batch(read_refs, paths, workers, patterns=patterns, nested=nested):
+            index.errors += errors
+            if class_name is not None:
+                index.add(class_name, refs)
+        return index
+
+    def member(self, member_id):
+        return MemberRef(self.member_tags[member_id], self.symbols[self.member_owners[member_id]],
+                         self.symbols[self.member_names[member_id]], self.symbols[self.member_descriptors[member_id]])
+
+    def member_ids(self, owner, name=None, descriptor=None):
+        """Ids of the referenced members of `owner`, optionally only those with `name` and `descriptor`."""
+        if self._owner_members is None:
+            self._owner_members = {}
+            for member_id, owner_id in enumerate(self.member_owners):
+                self._owner_members.setdefault(owner_id, []).append(member_id)
+        member_ids = self._owner_members.get(self._symbol_ids.get(owner), [])
+        if name is not None:
+            name_id = self._symbol_ids.get(name)
+            member_ids = [member_id for member_id in member_ids if self.member_names[member_id] == name_id]
+        if descriptor is not None:
+            descriptor_id = self._symbol_ids.get(descriptor)
+            member_ids = [member_id for member_id in member_ids if self.member_descriptors[member_id] == descriptor_id]
+        return member_ids
+
+    def referencing_ids(self, member_id):
+        """Indexes (in class_ids) of the classes that reference member `member_id`."""
+        if self._ref_first is None:
+            self._build_references()
+        return self._ref_classes[self._ref_first[member_id]:self._ref_first[member_id + 1]].tolist()
+
+    def members(self, owner):
+        """The referenced members of `owner`, as MemberRefs."""
+        return [self.member(member_id) for member_id in self.member_ids(owner)]
+
+    def referencing(self, owner, name=None, descriptor=None):
+        """Names of the classes referencing a member of `owner`, optionally only with `name` and `descriptor`."""
+        classes = set()
+        for member_id in self.member_ids(owner, name, descriptor):
+            classes.update(self.referencing_ids(member_id))
+        return [self.symbols[self.class_ids[index]] for index in sorted(classes)]
+
+    def refs(self, class_name):
+        """The MemberRefs referenced by `class_name`."""
+        index = self._classes.get(self._symbol_ids.get(class_name))
+        if index is None:
+            return []
+        return [self.member(member_id)
+                for member_id in self.class_members[self.class_first[index]:self.class_first[index + 1]]]
+
+    def save(self, file):
+        """Write the index to a binary file object."""
+        write_header(file, _MAGIC, _FORMAT_VERSION)
+        write_strings(file, self.symbols)
+        write_array(file, self.class_ids)
+        write_array(file, self.class_first)
+        write_array(file, self.class_members)
+        write_bytes(file, self.member_tags)
+        write_array(file, self.member_owners)
+        write_array(file, self.member_names)
+        write_array(file, self.member_descriptors)
+
+    @classmethod
+    def load(cls, file):
+        """Read an index written by save() from a binary file object."""
+        read_header(file, _MAGIC, _FORMAT_VERSION, 'cross-reference')
+        index = cls()
+        index.symbols = read_strings(file)
+        index._symbol_ids = {symbol: symbol_id for symbol_id, symbol in enumerate(index.symbols)}
+        index.class_ids = read_array(file, 'I')
+        index.class_first = read_array(file, 'I')
+        index.class_members = read_array(file, 'I')
+        index.member_tags = bytearray(read_bytes(file))
+        index.member_owners = read_array(file, 'I')
+        index.member_names = read_array(file, 'I')
+        index.member_descriptors = read_array(file, 'I')
+        member_count = len(index.member_tags)
+        if (len(index.class_first) != len(index.class_ids) + 1 or len(index.member_owners) != member_count or
+                len(index.member_names) != member_count or len(index.member_descriptors) != member_count):
+            raise InvalidIndex('inconsistent cross-reference index')
+        index._classes = {class_id: i for i, class_id in enumerate(index.class_ids)}
+        index._members = {(tag, owner, name, descriptor): member_id for member_id, (tag, owner, name, descriptor) in
+                          enumerate(zip(index.member_tags, index.member_owners, index.member_names,
+                                        index.member_descriptors))}
+        return index
+
+    def _intern_member(self, ref):
+        key = (ref.tag, self.intern(ref.owner), self.intern(ref.name), self.intern(ref.descriptor))
+        member_id = self._members.get(key)
+        if member_id is None:
+            member_id = self._members[key] = len(self.member_tags)
+            self.member_tags.append(key[0])
+            self.member_owners.append(key[1])
+            self.member_names.append(key[2])
+            self.member_descriptors.append(key[3])
+        return member_id
+
+    def _build_references(self):
+        member_count = len(self.member_tags)
+        counts = array('I', bytes(4 * (member_count + 1)))
+        for member_id in self.class_members:
+            counts[member_id + 1] += 1
+        for member_id in range(member_count):
+            counts[member_id + 1] += counts[member_id]
+        ref_classes = array('I', bytes(4 * counts[member_count]))
+        next_free = array('I', counts)
+        for index in range(len(self.class_ids)):
+            for member_id in self.class_members[self.class_first[index]:self.class_first[index + 1]]:
+                ref_classes[next_free[member_id]] = index
+                next_free[member_id] += 1
+        self._ref_first = counts
+        self._ref_classes = ref_classes